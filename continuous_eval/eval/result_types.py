@@ -2,18 +2,53 @@ import json
 from collections import ChainMap
 from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from continuous_eval.eval.dataset import Dataset
 from continuous_eval.eval.pipeline import Pipeline
 from continuous_eval.utils.types import instantiate_type
 from continuous_eval.eval.logger import PipelineLogger
+from continuous_eval.utils.columnar import (
+    is_table,
+    table_columns,
+    rows_from_columns,
+)
 from continuous_eval.utils.generic import all_sets_equal
 
 
 class PipelineResults:
     def __init__(self) -> None:
-        self.results: List[Dict] = list()
+        self._results: Optional[List[Dict]] = list()
+        # Column-oriented samples (e.g., read from a DataFrame), exploded into
+        # `results` only if a row-wise consumer asks for them
+        self.columns: Optional[Dict[str, Sequence]] = None
+
+    @property
+    def results(self) -> List[Dict]:
+        if self._results is None:
+            self._results = rows_from_columns(self.columns or dict())
+        return self._results
+
+    @results.setter
+    def results(self, value: List[Dict]):
+        self._results = value
+        self.columns = None
+
+    @classmethod
+    def from_table(cls, table: Any, column_mapping: Optional[Dict] = None):
+        """
+        Build the results from a pandas DataFrame or a pyarrow Table, one
+        sample per row. Columns are kept as they are and passed to the metrics
+        without materializing per-row dictionaries.
+        """
+        if not is_table(table):
+            raise ValueError("Invalid data type")
+        eval_results = cls()
+        eval_results.columns = table_columns(
+            table, column_mapping=column_mapping
+        )
+        eval_results._results = None
+        return eval_results
 
     @classmethod
     def from_dataset(cls, dataset: Dataset):
@@ -73,10 +108,12 @@ class PipelineResults:
         ]
 
     def __len__(self):
+        if self._results is None and self.columns:
+            return len(next(iter(self.columns.values())))
         return len(self.results)
 
     def is_empty(self) -> bool:
-        return not bool(self.results)
+        return len(self) == 0
 
     def _build_empty_samples(self, pipeline: Pipeline):
         if pipeline is None:
@@ -107,6 +144,10 @@ class MetricsResults:
     def __init__(self, pipeline: Optional[Pipeline]) -> None:
         self.pipeline = pipeline
         self.samples = dict()
+        # Instrumentation of the run, per module and metric (see MetricStats)
+        self.run_stats = dict()
+        # Estimates of a sequential evaluation (see EvaluationRunner.estimate)
+        self.sampling: Optional[Dict[str, Any]] = None
 
     def is_empty(self) -> bool:
         return not bool(self.samples)
@@ -171,6 +212,75 @@ class MetricsResults:
         }
         return actual_results
 
+    def summary(self):
+        """
+        Distribution statistics of the metric values for each module.
+
+        Returns:
+            dict: For each module, a dictionary mapping every numeric field to
+            its count, mean, std, min, max and quantiles.
+        """
+        if self.pipeline is None:
+            raise ValueError("Pipeline not set")
+        summary = dict()
+        for module_name, metrics_results in self.samples.items():
+            summary[module_name] = dict()
+            for metric_name, metric_values in metrics_results.items():
+                metric = self.pipeline.get_metric(module_name, metric_name)
+                summary[module_name].update(
+                    metric.aggregator().update(metric_values).summary()
+                )
+        return summary
+
+    def usage(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        LLM usage of the run for each module: the requests, prompt,
+        completion and cached tokens and the cost (USD, None if no model has
+        a price, see `LLMFactory.set_price`) of every metric, and their
+        total under "total".
+        """
+        fields = (
+            "requests",
+            "prompt_tokens",
+            "completion_tokens",
+            "cached_tokens",
+            "tokens",
+        )
+        usage = dict()
+        for module_name, metrics_stats in self.run_stats.items():
+            module_usage = dict()
+            total: Dict[str, Any] = {k: 0 for k in fields}
+            total["cost"] = None
+            for metric_name, stats in metrics_stats.items():
+                metric_usage = {k: stats.get(k, 0) for k in fields}
+                for k in fields:
+                    total[k] += metric_usage[k]
+                cost = metric_usage["cost"] = stats.get("cost")
+                if cost is not None:
+                    total["cost"] = (total["cost"] or 0.0) + cost
+                module_usage[metric_name] = metric_usage
+            module_usage["total"] = total
+            usage[module_name] = module_usage
+        return usage
+
+    def run_stats_json(self, **kwargs) -> str:
+        """
+        The run instrumentation as JSON: for every module and metric, the
+        number of items, errors and retries, the wall time, the throughput
+        (items/sec and, for LLM metrics, tokens/sec) and the latency and
+        queue wait distributions (mean, p50, p95, p99, in seconds). LLM
+        metrics also report their requests, prompt, completion and cached
+        tokens, the mean request latency and the cost (see `usage`).
+        """
+        return json.dumps(self.run_stats, **kwargs)
+
+    def save_run_stats(self, filepath: Union[str, Path]):
+        if isinstance(filepath, str):
+            filepath = Path(filepath)
+        assert filepath.suffix == ".json", "File must be a JSON file"
+        with open(filepath, "w") as f:
+            f.write(self.run_stats_json(indent=2))
+
     def save(self, filepath: Union[str, Path]):
         if isinstance(filepath, str):
             filepath = Path(filepath)
@@ -191,6 +301,8 @@ class MetricsResults:
 class TestResults:
     def __init__(self) -> None:
         self.results = dict()
+        # Samples scored per module in gate mode (see EvaluationRunner.gate)
+        self.scored: Dict[str, int] = dict()
 
     def __repr__(self) -> str:
         return str(self.results)
@@ -1,5 +1,11 @@
+import asyncio
 import logging
-from typing import Optional, Union
+import math
+from collections import ChainMap
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
 
 from continuous_eval.eval.dataset import Dataset, DatasetField, LambdaField
 from continuous_eval.eval.logger import PipelineLogger
@@ -11,6 +17,10 @@ from continuous_eval.eval.result_types import (
     TestResults,
 )
 from continuous_eval.metrics import Metric
+from continuous_eval.metrics.base.aggregation import MetricAggregator
+from continuous_eval.metrics.base.instrumentation import MetricStats
+from continuous_eval.metrics.base.metric import shared_concurrency
+from continuous_eval.utils.columnar import is_table
 from continuous_eval.utils.telemetry import telemetry_event
 from copy import deepcopy
 
@@ -18,9 +28,35 @@ logger = logging.getLogger("eval-manager")
 
 
 class EvaluationRunner:
-    def __init__(self, pipeline: Pipeline):
+    def __init__(self, pipeline: Pipeline, result_cache: Any = None):
+        """
+        Args:
+            pipeline (Pipeline): The pipeline to evaluate.
+            result_cache: Cache the metric results across runs, so that only
+                new or changed samples are computed again (see
+                `Metric.with_result_cache`). A `ResponseCache`, the path of its
+                SQLite database, or True for the default one. Metrics with a
+                cache of their own keep it.
+        """
         assert isinstance(pipeline, Pipeline), "Pipeline not set"
         self._pipeline = pipeline
+        if result_cache is not None and result_cache is not False:
+            self._use_result_cache(result_cache)
+
+    def _use_result_cache(self, cache: Any):
+        metrics = [
+            metric
+            for module in self._pipeline.modules
+            if module.eval is not None
+            for metric in module.eval
+            if metric.result_cache is None
+        ]
+        if not metrics:
+            return
+        # Open the database once, shared by all the metrics
+        cache = metrics[0].with_result_cache(cache).result_cache
+        for metric in metrics[1:]:
+            metric.with_result_cache(cache)
 
     @property
     def pipeline(self) -> Pipeline:
@@ -43,11 +79,14 @@ class EvaluationRunner:
         metric: Metric,
     ):
         kwargs = dict()
+        columns = eval_results.columns
         if metric.overloaded_params is not None:
             for key, val in metric.overloaded_params.items():
                 if key == "uid":
                     continue
-                if isinstance(val, DatasetField):
+                if isinstance(val, DatasetField) and columns is not None:
+                    kwargs[key] = columns[val.name]
+                elif isinstance(val, DatasetField):
                     try:
                         kwargs[key] = [
                             x[module.name][val.name] for x in dataset.data
@@ -102,6 +141,8 @@ class EvaluationRunner:
                 else:
                     raise ValueError(f"Invalid promised parameter {key}={val}")
             return kwargs
+        elif columns is not None:
+            kwargs = dict(columns)
         else:
             for item in eval_results.results:
                 itr = item[module.name] if module.name in item else item
@@ -111,14 +152,18 @@ class EvaluationRunner:
                     kwargs[key].append(value)
         return kwargs
 
-    @telemetry_event(name="EvaluationRunner.evaluate")
-    def evaluate(
+    def _pipeline_results(
         self,
         data: Optional[Union[PipelineResults, PipelineLogger, Dataset]] = None,
-    ) -> MetricsResults:
-        logger.info("Running evaluation")
+        column_mapping: Optional[Dict[str, str]] = None,
+    ) -> PipelineResults:
         if data is None:
             eval_results = PipelineResults.from_dataset(self.dataset)
+        elif is_table(data):
+            eval_results = PipelineResults.from_table(data, column_mapping)
+        elif isinstance(data, PipelineResults) and data.columns is not None:
+            # Metrics never write into the columns, no need to copy them
+            eval_results = data
         elif isinstance(data, PipelineResults):
             eval_results = deepcopy(data)
         elif isinstance(data, Dataset):
@@ -129,23 +174,269 @@ class EvaluationRunner:
             raise ValueError("Invalid data type")
         assert self._pipeline is not None, "Pipeline not set"
         assert (
-            len(eval_results.results) > 0
+            len(eval_results) > 0
         ), "No evaluation samples to run the metrics on"
+        return eval_results
+
+    @telemetry_event(name="EvaluationRunner.evaluate")
+    def evaluate(
+        self,
+        data: Optional[Union[PipelineResults, PipelineLogger, Dataset]] = None,
+        column_mapping: Optional[Dict[str, str]] = None,
+    ) -> MetricsResults:
+        """
+        Run the metrics of the pipeline on `data`: a dataset, pipeline logs,
+        pipeline results or a table (pandas DataFrame or pyarrow Table, one
+        sample per row, with `column_mapping` renaming its columns).
+        """
+        logger.info("Running evaluation")
+        eval_results = self._pipeline_results(data, column_mapping)
         metrics_results = MetricsResults(self.pipeline)
-        metrics_results.samples = {
-            module.name: {
-                metric.name: metric.batch(
+        for module in self._pipeline.modules:
+            if module.eval is None:
+                continue
+            for metric in module.eval:
+                output = metric.batch(
                     **self.prepare(self.dataset, eval_results, module, metric)
                 )
-                for metric in module.eval
-            }
+                self._collect(metrics_results, module, metric, output)
+        return metrics_results
+
+    @staticmethod
+    def _collect(
+        metrics_results: MetricsResults,
+        module: Module,
+        metric: Metric,
+        output: List,
+    ):
+        metrics_results.samples.setdefault(module.name, dict())
+        metrics_results.samples[module.name][metric.name] = output
+        metrics_results.run_stats.setdefault(module.name, dict())
+        metrics_results.run_stats[module.name][metric.name] = (
+            metric.stats.summary()
+        )
+
+    @telemetry_event(name="EvaluationRunner.aevaluate")
+    async def aevaluate(
+        self,
+        data: Optional[Union[PipelineResults, PipelineLogger, Dataset]] = None,
+        max_concurrency: Optional[int] = None,
+        column_mapping: Optional[Dict[str, str]] = None,
+    ) -> MetricsResults:
+        """
+        Asynchronous counterpart of `evaluate`, to be awaited from a running
+        event loop (e.g. a notebook or an async web worker).
+
+        All the metrics of the pipeline run concurrently and share a bound of
+        `max_concurrency` samples in flight.
+        """
+        logger.info("Running evaluation")
+        eval_results = self._pipeline_results(data, column_mapping)
+        jobs = [
+            (module, metric)
+            for module in self._pipeline.modules
+            if module.eval is not None
+            for metric in module.eval
+        ]
+        with shared_concurrency(max_concurrency):
+            outputs = await asyncio.gather(
+                *(
+                    metric.abatch(
+                        max_concurrency=max_concurrency,
+                        **self.prepare(
+                            self.dataset, eval_results, module, metric
+                        ),
+                    )
+                    for module, metric in jobs
+                )
+            )
+        metrics_results = MetricsResults(self.pipeline)
+        for (module, metric), output in zip(jobs, outputs):
+            self._collect(metrics_results, module, metric, output)
+        return metrics_results
+
+    @telemetry_event(name="EvaluationRunner.estimate")
+    def estimate(
+        self,
+        targets: Dict[str, float],
+        data: Optional[Union[PipelineResults, PipelineLogger, Dataset]] = None,
+        batch_size: int = 100,
+        confidence: float = 0.95,
+        max_samples: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        seed: Optional[int] = None,
+        column_mapping: Optional[Dict[str, str]] = None,
+    ) -> MetricsResults:
+        """
+        Estimate the mean of some metric fields from a random subset of
+        `data` instead of scoring every sample.
+
+        Samples are drawn in random order and evaluated `batch_size` at a
+        time. After every batch, the confidence interval of the mean of every
+        numeric field is updated (normal approximation, with the finite
+        population correction). Sampling stops as soon as the half-width of
+        every field in `targets` is at most its target, or when a budget is
+        exhausted.
+
+        Args:
+            targets (Dict[str, float]): Target half-width of the confidence
+                interval of each field (e.g., {"faithfulness": 0.02}), looked
+                up in every module.
+            batch_size (int): Samples drawn between two checks.
+            confidence (float): Confidence level of the intervals.
+            max_samples (int, optional): Budget on the number of samples.
+            max_cost (float, optional): Budget on the cost of the LLM
+                requests, in USD (see `LLMFactory.set_price`).
+            seed (int, optional): Seed of the sampling order.
+
+        Returns:
+            MetricsResults: The results of the evaluated samples (in draw
+            order) and, in `sampling`, the estimates (mean, half-width and
+            count of every field), the samples drawn and why sampling
+            stopped ("converged", "max_samples", "max_cost" or "exhausted").
+        """
+        if not targets:
+            raise ValueError("No target half-width given")
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        if max_samples is not None and max_samples < 0:
+            raise ValueError("max_samples must not be negative")
+        logger.info("Running sequential evaluation")
+        eval_results = self._pipeline_results(data, column_mapping)
+        population = len(eval_results)
+        jobs = [
+            (
+                module,
+                metric,
+                self.prepare(self.dataset, eval_results, module, metric),
+            )
             for module in self._pipeline.modules
             if module.eval is not None
+            for metric in module.eval
+        ]
+        order = np.random.default_rng(seed).permutation(population).tolist()
+        budget = min(
+            population, population if max_samples is None else max_samples
+        )
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        aggregators: Dict[str, MetricAggregator] = dict()
+        outputs: Dict[Any, List] = {
+            (module.name, metric.name): list() for module, metric, _ in jobs
+        }
+        stats = {key: MetricStats() for key in outputs}
+        drawn: List[int] = list()
+        cost = 0.0
+        stop_reason = "exhausted"
+        while len(drawn) < budget:
+            indices = order[len(drawn) : min(len(drawn) + batch_size, budget)]
+            for module, metric, kwargs in jobs:
+                output = metric.batch(**self._take(kwargs, indices))
+                outputs[(module.name, metric.name)].extend(output)
+                stats[(module.name, metric.name)].merge(metric.stats)
+                aggregators.setdefault(module.name, MetricAggregator())
+                aggregators[module.name].update(output)
+                cost += metric.stats.usage.cost or 0.0
+            drawn.extend(indices)
+            estimates = self._estimates(aggregators, z, population)
+            if self._converged(estimates, targets):
+                stop_reason = "converged"
+                break
+            if max_cost is not None and cost >= max_cost:
+                stop_reason = "max_cost"
+                break
+        else:
+            if budget < population:
+                stop_reason = "max_samples"
+        metrics_results = MetricsResults(self.pipeline)
+        for module, metric, _ in jobs:
+            key = (module.name, metric.name)
+            metric.stats = stats[key]
+            self._collect(metrics_results, module, metric, outputs[key])
+        metrics_results.sampling = {
+            "samples": len(drawn),
+            "population": population,
+            "indices": drawn,
+            "confidence": confidence,
+            "cost": cost,
+            "stop_reason": stop_reason,
+            "estimates": self._estimates(aggregators, z, population),
         }
         return metrics_results
 
+    @staticmethod
+    def _schema(metrics) -> Dict[str, Any]:
+        # Fields of the metrics of a module, for those defining a schema
+        schema = dict()
+        for metric in metrics:
+            try:
+                schema.update(metric.schema)
+            except NotImplementedError:
+                pass
+        return schema
+
+    @staticmethod
+    def _take(kwargs: Dict[str, Any], indices) -> Dict[str, List]:
+        # Arguments of the samples at `indices`
+        return {
+            key: [values[idx] for idx in indices]
+            for key, values in kwargs.items()
+        }
+
+    @staticmethod
+    def _estimates(
+        aggregators: Dict[str, MetricAggregator], z: float, population: int
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        estimates = dict()
+        for module_name, aggregator in aggregators.items():
+            estimates[module_name] = dict()
+            for field, acc in aggregator.accumulators.items():
+                if acc.count == 0:
+                    continue
+                half_width = None
+                if acc.count > 1:
+                    # Finite population correction: no uncertainty left once
+                    # every sample is evaluated
+                    fpc = (
+                        math.sqrt((population - acc.count) / (population - 1))
+                        if population > 1
+                        else 0.0
+                    )
+                    half_width = z * acc.std / math.sqrt(acc.count) * fpc
+                estimates[module_name][field] = {
+                    "mean": acc.mean,
+                    "half_width": half_width,
+                    "count": acc.count,
+                }
+        return estimates
+
+    @staticmethod
+    def _converged(
+        estimates: Dict[str, Dict[str, Dict[str, Any]]],
+        targets: Dict[str, float],
+    ) -> bool:
+        for field, target in targets.items():
+            found = [
+                module_estimates[field]
+                for module_estimates in estimates.values()
+                if field in module_estimates
+            ]
+            if not found:
+                raise ValueError(f"Field {field} not found in the results")
+            if any(
+                est["half_width"] is None or est["half_width"] > target
+                for est in found
+            ):
+                return False
+        return True
+
     @telemetry_event(name="EvaluationRunner.evaluate")
     def test(self, metrics: MetricsResults) -> TestResults:
+        """
+        Run the tests of the pipeline on the results of `evaluate`.
+
+        A sample without a value for a tested metric (e.g., an error record,
+        left by a failed computation) fails the test.
+        """
         logger.info("Running tests")
         test_results = TestResults()
         test_results.results = {
@@ -157,3 +448,90 @@ class EvaluationRunner:
             if module.tests is not None
         }
         return test_results
+
+    @telemetry_event(name="EvaluationRunner.gate")
+    def gate(
+        self,
+        data: Optional[Union[PipelineResults, PipelineLogger, Dataset]] = None,
+        batch_size: int = 32,
+        column_mapping: Optional[Dict[str, str]] = None,
+    ) -> TestResults:
+        """
+        Run the tests of the pipeline on `data`, computing the metrics only
+        until every test outcome is decided (e.g., for a CI check).
+
+        Samples are scored in order, `batch_size` at a time, by the metrics
+        of the modules with tests. After every batch each test that is still
+        open is given the results so far (see `Test.decide`), and the modules
+        whose tests are all decided are not scored any further. A failing
+        `GreaterOrEqualThan` thus stops at the first batch with a sample
+        below its threshold.
+
+        Returns:
+            TestResults: The outcome of every test and, in `scored`, the
+            number of samples scored per module.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        logger.info("Running tests (gate)")
+        eval_results = self._pipeline_results(data, column_mapping)
+        num_samples = len(eval_results)
+        modules = [
+            module
+            for module in self._pipeline.modules
+            if module.tests is not None and module.eval is not None
+        ]
+        jobs = {
+            module.name: [
+                (
+                    metric,
+                    self.prepare(self.dataset, eval_results, module, metric),
+                )
+                for metric in module.eval  # type: ignore
+            ]
+            for module in modules
+        }
+        samples: Dict[str, List[Dict]] = {module.name: [] for module in modules}
+        verdicts: Dict[str, Dict[str, bool]] = {
+            module.name: dict() for module in modules
+        }
+        num_tests = {module.name: len(module.tests) for module in modules}  # type: ignore
+        for module in modules:
+            schema = self._schema(metric for metric, _ in jobs[module.name])
+            for test in module.tests:  # type: ignore
+                test.bind(schema)
+        for start in range(0, num_samples, batch_size):
+            pending = [
+                module
+                for module in modules
+                if len(verdicts[module.name]) < num_tests[module.name]
+            ]
+            if not pending:
+                break
+            indices = range(start, min(start + batch_size, num_samples))
+            for module in pending:
+                outputs = [
+                    metric.batch(**self._take(kwargs, indices))
+                    for metric, kwargs in jobs[module.name]
+                ]
+                samples[module.name].extend(
+                    dict(ChainMap(*x)) for x in zip(*outputs)
+                )
+                for test in module.tests:  # type: ignore
+                    if test.name in verdicts[module.name]:
+                        continue
+                    verdict = test.decide(samples[module.name], num_samples)
+                    if verdict is not None:
+                        verdicts[module.name][test.name] = verdict
+        test_results = TestResults()
+        test_results.results = {
+            module.name: {
+                test.name: verdicts[module.name][test.name]
+                for test in module.tests  # type: ignore
+            }
+            for module in modules
+        }
+        test_results.scored = {
+            module.name: len(samples[module.name]) for module in modules
+        }
+        return test_results
@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from continuous_eval.metrics.base import Field
 
 
 class Test(ABC):
+    """
+    Check on the metric results of a module.
+
+    A sample without a value for the tested field (e.g., an error record,
+    left by a failed metric computation) fails the test.
+    """
+
     @property
     def name(self) -> str:
         """Name of the test."""
@@ -20,6 +30,32 @@ class Test(ABC):
         """
         raise NotImplementedError
 
+    def decide(
+        self, metrics_per_sample: List[Dict[str, Any]], num_samples: int
+    ) -> Optional[bool]:
+        """Outcome of the test from the results of the first samples.
+
+        Args:
+            metrics_per_sample: The results scored so far.
+            num_samples (int): The number of samples of the full run.
+
+        Returns:
+            Optional[bool]: Pass (True) or Fail (False) if the outcome no
+            longer depends on the samples left, None otherwise. By default
+            the outcome is only known once every sample is scored.
+        """
+        if len(metrics_per_sample) < num_samples:
+            return None
+        return self.run(metrics_per_sample)
+
+    def bind(self, schema: Dict[str, "Field"]):  # noqa: B027
+        """Called with the schema of the metrics of the module before they
+        are scored (e.g., to read the limits of a field).
+
+        Intentionally a no-op by default, not abstract: only the tests using
+        the schema override it.
+        """
+
     def asdict(self):
         return {
             "__class__": self.__class__.__name__,
@@ -40,23 +76,78 @@ class GreaterOrEqualThan(Test):
 
     def run(self, metrics_per_sample: List[Dict[str, Any]]) -> bool:
         return all(
-            sample[self._key] >= self._value for sample in metrics_per_sample
+            sample.get(self._key) is not None
+            and sample[self._key] >= self._value
+            for sample in metrics_per_sample
         )
 
+    def decide(
+        self, metrics_per_sample: List[Dict[str, Any]], num_samples: int
+    ) -> Optional[bool]:
+        # Fails at the first sample below the threshold (or without value)
+        if not self.run(metrics_per_sample):
+            return False
+        return super().decide(metrics_per_sample, num_samples)
+
 
 class MeanGreaterOrEqualThan(Test):
-    def __init__(self, test_name: str, metric_name: str, min_value: float):
+    def __init__(
+        self,
+        test_name: str,
+        metric_name: str,
+        min_value: float,
+        bounds: Optional[Tuple[float, float]] = None,
+    ):
+        """
+        Args:
+            bounds (Tuple[float, float], optional): Lowest and highest
+                possible values of the metric (e.g., (0, 1)), by default the
+                limits of its field if the metric defines them. If known,
+                the test is decided early once the samples left can no
+                longer change its outcome (see `decide`).
+        """
         self._name = test_name
         self._key = metric_name
         self._value = min_value
+        self._bounds = bounds
+        self._limits: Optional[Tuple[float, float]] = None
 
     @property
     def name(self) -> str:
         return self._name
 
+    def bind(self, schema: Dict[str, "Field"]):
+        field = schema.get(self._key)
+        self._limits = None if field is None else field.limits
+
+    def _missing(self, metrics_per_sample: List[Dict[str, Any]]) -> bool:
+        return any(
+            sample.get(self._key) is None for sample in metrics_per_sample
+        )
+
     def run(self, metrics_per_sample: List[Dict[str, Any]]) -> bool:
+        if self._missing(metrics_per_sample):
+            return False
         return (
             sum(sample[self._key] for sample in metrics_per_sample)
             / len(metrics_per_sample)
             >= self._value
         )
+
+    def decide(
+        self, metrics_per_sample: List[Dict[str, Any]], num_samples: int
+    ) -> Optional[bool]:
+        if self._missing(metrics_per_sample):
+            return False
+        bounds = self._bounds or self._limits
+        if bounds is None or len(metrics_per_sample) >= num_samples:
+            return super().decide(metrics_per_sample, num_samples)
+        low, high = bounds
+        total = sum(sample[self._key] for sample in metrics_per_sample)
+        left = num_samples - len(metrics_per_sample)
+        # Mean of the full run if the samples left all score the worst / best
+        if (total + left * high) / num_samples < self._value:
+            return False
+        if (total + left * low) / num_samples >= self._value:
+            return True
+        return None
@@ -0,0 +1,144 @@
+import atexit
+import hashlib
+import logging
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+logger = logging.getLogger("Execution")
+
+ExecutorKind = Literal["thread", "process", "fan_out"]
+
+_EXECUTOR_CLASSES = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+    # Sub-requests of samples (e.g., one LLM call per retrieved chunk), kept
+    # apart from the threads running the samples that wait on them
+    "fan_out": ThreadPoolExecutor,
+}
+
+_lock = threading.Lock()
+_executors: Dict[Tuple[str, int], Executor] = dict()
+
+
+def _is_alive(executor: Executor) -> bool:
+    # Executors do not expose their state publicly: a broken process pool or
+    # an executor shut down by the user can not accept new work anymore.
+    return not (
+        getattr(executor, "_broken", False)
+        or getattr(executor, "_shutdown", False)
+        or getattr(executor, "_shutdown_thread", False)
+    )
+
+
+def get_executor(kind: ExecutorKind, size: int) -> Executor:
+    """
+    Get the process-wide executor of the given kind and size.
+
+    Executors are created on first use and reused across metrics, modules and
+    evaluation runs, so that the pool start-up cost (and, for process pools,
+    the import of the heavy dependencies in every worker) is paid only once.
+
+    Args:
+        kind (str): "thread", "process" or "fan_out".
+        size (int): Maximum number of workers.
+
+    Returns:
+        Executor: The shared executor.
+    """
+    if kind not in _EXECUTOR_CLASSES:
+        raise ValueError(f"Invalid executor kind: {kind}")
+    if size < 1:
+        raise ValueError("Executor size must be positive")
+    key = (kind, size)
+    with _lock:
+        executor = _executors.get(key)
+        if executor is None or not _is_alive(executor):
+            if executor is not None:
+                logger.debug(f"Replacing dead {kind} executor (size={size})")
+            executor = _EXECUTOR_CLASSES[kind](max_workers=size)
+            _executors[key] = executor
+        return executor
+
+
+def shutdown_executor(kind: ExecutorKind, size: int, wait: bool = True):
+    """Shut down (and unregister) a single shared executor, if it exists."""
+    with _lock:
+        executor = _executors.pop((kind, size), None)
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def shutdown_executors(wait: bool = True):
+    """Shut down (and unregister) all the shared executors."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def active_executors() -> Dict[Tuple[str, int], Executor]:
+    """Snapshot of the registered executors, keyed by (kind, size)."""
+    with _lock:
+        return dict(_executors)
+
+
+atexit.register(shutdown_executors)
+
+
+# Worker-side protocol for process pools
+#
+# Instead of pickling the metric for every sample, the parent process ships a
+# descriptor (the pickled metric) only the first time a worker sees it. The
+# worker rebuilds the metric and caches it, subsequent tasks carry only the
+# descriptor key and a chunk of per-sample arguments.
+
+_MAX_WORKER_METRICS = 32
+_worker_metrics: "OrderedDict[str, Any]" = OrderedDict()
+
+
+class MetricNotLoaded(Exception):
+    """Raised in a worker that has not received the metric descriptor yet."""
+
+
+def metric_descriptor(metric: Any) -> Tuple[str, bytes]:
+    """
+    Serialize a metric once for shipping to process-pool workers.
+
+    Metrics can keep the descriptor lightweight by implementing
+    `__getstate__`/`__setstate__` (e.g., dropping tokenizers or encoders that
+    can be rebuilt in the worker). The key is content-addressed, so a metric
+    whose configuration changed between two batches gets a new key.
+    """
+    payload = pickle.dumps(metric, protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha1(payload).hexdigest(), payload
+
+
+def run_chunk(
+    key: str,
+    payload: Optional[bytes],
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    submitted: float,
+) -> List[Tuple[int, Any, Any]]:
+    """
+    Compute a chunk of samples in a worker, rebuilding the metric once.
+
+    Returns `(index, result, item_record)` triples, `submitted` being the
+    wall-clock time at which the chunk was submitted.
+    """
+    metric = _worker_metrics.get(key)
+    if metric is None:
+        if payload is None:
+            raise MetricNotLoaded(key)
+        metric = pickle.loads(payload)
+        _worker_metrics[key] = metric
+        if len(_worker_metrics) > _MAX_WORKER_METRICS:
+            _worker_metrics.popitem(last=False)
+    else:
+        _worker_metrics.move_to_end(key)
+    return [
+        (idx, *metric._timed_call(submitted, kwargs)) for idx, kwargs in chunk
+    ]
@@ -1,18 +1,37 @@
 import os
-from typing import Dict, Optional
+import time
+from typing import Any, Dict, Optional
 
-from .base import LLMInterface
+from .base import LLMInterface, LoopClients
 
 try:
     from anthropic import Anthropic as _Anthropic
+    from anthropic import AsyncAnthropic as _AsyncAnthropic
 
     ANTHROPIC_AVAILABLE = True
 except ImportError:
     ANTHROPIC_AVAILABLE = False
 
 
+def _usage_counts(usage) -> Dict[str, int]:
+    # Cached and newly cached prompt tokens are not part of `input_tokens`
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return dict(
+        prompt_tokens=usage.input_tokens + cache_read + cache_write,
+        completion_tokens=usage.output_tokens,
+        cached_tokens=cache_read,
+    )
+
+
 class Anthropic(LLMInterface):
-    def __init__(self, model: str, api_key: Optional[str] = None, **kwargs):
+    def __init__(
+        self,
+        model: str,
+        api_key: Optional[str] = None,
+        cache_system_prompt: bool = True,
+        **kwargs,
+    ):
         if not ANTHROPIC_AVAILABLE:
             raise ValueError("Anthropic is not available")
         if api_key is None and os.getenv("ANTHROPIC_API_KEY") is None:
@@ -23,7 +42,15 @@ class Anthropic(LLMInterface):
         self.client = _Anthropic(
             api_key=api_key or os.getenv("ANTHROPIC_API_KEY")
         )
+        self.async_clients = LoopClients(
+            lambda: _AsyncAnthropic(
+                api_key=api_key or os.getenv("ANTHROPIC_API_KEY")
+            )
+        )
         self.model = model
+        # The system prompt is the static prefix of the judge prompts: mark
+        # it for Anthropic's prompt cache (only used past a minimum length)
+        self.cache_system_prompt = cache_system_prompt
         self.defaults = {
             "max_tokens": 2048,
             "temperature": 1.0,
@@ -32,12 +59,48 @@ class Anthropic(LLMInterface):
         }
         self.defaults.update(kwargs)
 
+    def _system(self, system_prompt: str) -> Any:
+        if not self.cache_system_prompt:
+            return system_prompt
+        return [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
     def run(self, prompt: Dict[str, str], temperature: float = 1.0) -> str:
         kwargs = self.defaults.copy()
         kwargs["temperature"] = temperature
+        tic = time.perf_counter()
         response = self.client.messages.create(
             model=self.model,
-            system=prompt["system_prompt"],
+            system=self._system(prompt["system_prompt"]),
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt["user_prompt"]}
+                    ],
+                }
+            ],
+            **kwargs,
+        )
+        self._report_usage(
+            latency=time.perf_counter() - tic, **_usage_counts(response.usage)
+        )
+        return response.content[0].text
+
+    async def arun(
+        self, prompt: Dict[str, str], temperature: float = 1.0
+    ) -> str:
+        kwargs = self.defaults.copy()
+        kwargs["temperature"] = temperature
+        tic = time.perf_counter()
+        response = await self.async_clients.get().messages.create(
+            model=self.model,
+            system=self._system(prompt["system_prompt"]),
             messages=[
                 {
                     "role": "user",
@@ -48,4 +111,7 @@ class Anthropic(LLMInterface):
             ],
             **kwargs,
         )
+        self._report_usage(
+            latency=time.perf_counter() - tic, **_usage_counts(response.usage)
+        )
         return response.content[0].text
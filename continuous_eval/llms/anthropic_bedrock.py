@@ -1,4 +1,5 @@
 import json
+import time
 
 import boto3
 
@@ -28,10 +29,21 @@ class AnthropicBedrock(LLMInterface):
         body = self.defaults.copy()
         body["system"] = prompt["system_prompt"]
         body["messages"] = [{"role": "user", "content": prompt["user_prompt"]}]
+        tic = time.perf_counter()
         response = self.client.invoke_model(
             modelId=self.model, body=json.dumps(body)
         )
         model_response = json.loads(response["body"].read())
+        usage = model_response.get("usage", {})
+        cache_read = usage.get("cache_read_input_tokens", 0)
+        self._report_usage(
+            prompt_tokens=usage.get("input_tokens", 0)
+            + cache_read
+            + usage.get("cache_creation_input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+            cached_tokens=cache_read,
+            latency=time.perf_counter() - tic,
+        )
         return model_response["content"][0]["text"]
 
 
@@ -1,4 +1,5 @@
 import os
+import time
 from typing import Dict, Optional
 
 from .base import LLMInterface, LLMInterfaceFactory
@@ -46,6 +47,7 @@ class AzureAI(LLMInterface):
     def run(self, prompt: Dict[str, str], temperature: float = 0) -> str:
         kwargs = self.defaults.copy()
         kwargs["temperature"] = temperature
+        tic = time.perf_counter()
         response = self.client.complete(
             messages=[
                 {"role": "system", "content": prompt["system_prompt"]},
@@ -53,6 +55,12 @@ class AzureAI(LLMInterface):
             ],
             **kwargs,
         )
+        if response.usage is not None:
+            self._report_usage(
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens,
+                latency=time.perf_counter() - tic,
+            )
         return response.choices[0].message.content
 
 
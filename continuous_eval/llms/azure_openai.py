@@ -1,9 +1,13 @@
 import os
+import time
 from typing import Dict, Optional
 
-from .base import LLMInterface, LLMInterfaceFactory
+from continuous_eval.llms.openai import usage_counts
+
+from .base import LLMInterface, LLMInterfaceFactory, LoopClients
 
 try:
+    from openai import AsyncAzureOpenAI as _AsyncAzureOpenAI
     from openai import AzureOpenAI as _AzureOpenAI
 
     AZURE_OPENAI_AVAILABLE = True
@@ -76,12 +80,16 @@ class AzureOpenAI(LLMInterface):
                 "Please set the environment variable AZURE_DEPLOYMENT. "
                 "You can get one at https://portal.azure.com."
             )
-        self.client = _AzureOpenAI(
+        client_kwargs = dict(
             api_key=api_key or os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=api_version or os.getenv("AZURE_OPENAI_API_VERSION"),
             azure_endpoint=endpoint or os.getenv("AZURE_ENDPOINT"),  # type: ignore
             azure_deployment=deployment or os.getenv("AZURE_DEPLOYMENT"),
         )
+        self.client = _AzureOpenAI(**client_kwargs)
+        self.async_clients = LoopClients(
+            lambda: _AsyncAzureOpenAI(**client_kwargs)
+        )
         self.defaults = {
             "seed": 0,
             "temperature": 0.0,
@@ -95,6 +103,7 @@ class AzureOpenAI(LLMInterface):
     def run(self, prompt: Dict[str, str], temperature: float = 0) -> str:
         kwargs = self.defaults.copy()
         kwargs["temperature"] = temperature
+        tic = time.perf_counter()
         response = self.client.chat.completions.create(
             model="<ignored>",
             messages=[
@@ -103,6 +112,26 @@ class AzureOpenAI(LLMInterface):
             ],
             **kwargs,
         )
+        self._report_usage(
+            latency=time.perf_counter() - tic, **usage_counts(response.usage)
+        )
+        return response.choices[0].message.content
+
+    async def arun(self, prompt: Dict[str, str], temperature: float = 0) -> str:
+        kwargs = self.defaults.copy()
+        kwargs["temperature"] = temperature
+        tic = time.perf_counter()
+        response = await self.async_clients.get().chat.completions.create(
+            model="<ignored>",
+            messages=[
+                {"role": "system", "content": prompt["system_prompt"]},
+                {"role": "user", "content": prompt["user_prompt"]},
+            ],
+            **kwargs,
+        )
+        self._report_usage(
+            latency=time.perf_counter() - tic, **usage_counts(response.usage)
+        )
         return response.choices[0].message.content
 
 
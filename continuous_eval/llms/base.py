@@ -1,14 +1,216 @@
+import asyncio
+import inspect
 import os
+import threading
 from abc import ABC, abstractmethod
 from collections import defaultdict
-from typing import Dict, Optional, Union
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from continuous_eval.llms.cache import cache_key, response_cache
+from continuous_eval.llms.pricing import Price, prices
+from continuous_eval.llms.rate_limit import rate_limits
+from continuous_eval.llms.single_flight import flight_key, single_flight
+from continuous_eval.metrics.base.instrumentation import (
+    Usage,
+    record_usage,
+    track_usage,
+)
+
+
+def report_usage(
+    model: Optional[str],
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+    latency: float = 0.0,
+):
+    """
+    Report the usage of a request to `model` (`provider:model`) to the
+    sample being computed, priced with the price table (see
+    `LLMFactory.set_price`).
+    """
+    record_usage(
+        Usage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            latency=latency,
+            requests=1,
+            cost=prices.cost(
+                model, prompt_tokens, completion_tokens, cached_tokens
+            ),
+        )
+    )
+
+
+# Set while a request goes through the cache, coalescing and rate limiter:
+# nested calls (e.g., a `run` calling `super().run()`) go straight through
+_managing: ContextVar[bool] = ContextVar("managing", default=False)
+
+
+def _call_args(signature: inspect.Signature, args, kwargs):
+    bound = signature.bind_partial(None, *args, **kwargs)
+    bound.apply_defaults()
+    return bound.arguments.get("prompt", ""), bound.arguments.get("temperature")
+
+
+def _managed(run):
+    # Requests go through the response cache, then join an identical request
+    # in flight if any (at temperature 0), or else go through the rate limiter
+    signature = inspect.signature(run)
+
+    @wraps(run)
+    def wrapper(self, *args, **kwargs):
+        if _managing.get():
+            return run(self, *args, **kwargs)
+        prompt, temperature = _call_args(signature, args, kwargs)
+        key = self._request_key(prompt, temperature)
+        cache = response_cache(temperature)
+        if cache is not None and (hit := cache.get(key)) is not None:
+            return hit
+
+        def request():
+            rate_limits.throttle(self.rate_limit_key, prompt)
+            token = _managing.set(True)
+            try:
+                response = run(self, *args, **kwargs)
+            finally:
+                _managing.reset(token)
+            if cache is not None and response is not None:
+                cache.set(key, response)
+            return response
+
+        return single_flight.do(flight_key(key, temperature), request)
+
+    return wrapper
+
+
+def _amanaged(arun):
+    signature = inspect.signature(arun)
+
+    @wraps(arun)
+    async def wrapper(self, *args, **kwargs):
+        if _managing.get():
+            return await arun(self, *args, **kwargs)
+        prompt, temperature = _call_args(signature, args, kwargs)
+        key = self._request_key(prompt, temperature)
+        cache = response_cache(temperature)
+        if cache is not None and (hit := cache.get(key)) is not None:
+            return hit
+
+        async def request():
+            await rate_limits.athrottle(self.rate_limit_key, prompt)
+            token = _managing.set(True)
+            try:
+                response = await arun(self, *args, **kwargs)
+            finally:
+                _managing.reset(token)
+            if cache is not None and response is not None:
+                cache.set(key, response)
+            return response
+
+        return await single_flight.ado(flight_key(key, temperature), request)
+
+    return wrapper
+
+
+class LoopClients:
+    """
+    Async clients, one per event loop: a client's connections are bound to
+    the loop that opened them and would fail once it is closed (e.g., by
+    successive `asyncio.run` calls). `get` returns the client of the running
+    loop, created by `factory` on first use.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._clients: WeakKeyDictionary = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                # A client may keep its loop alive, drop those of closed ones
+                for closed in [lp for lp in self._clients if lp.is_closed()]:
+                    del self._clients[closed]
+                client = self._clients[loop] = self._factory()
+            return client
 
 
 class LLMInterface(ABC):
+    # `provider:model`, set by the LLMFactory: requests are admitted by the
+    # rate limiter registered for this key, if any (see `set_rate_limit`)
+    rate_limit_key: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every implementation goes through the shared response cache,
+        # request coalescing and rate limiter
+        if "run" in cls.__dict__:
+            cls.run = _managed(cls.__dict__["run"])
+        if "arun" in cls.__dict__:
+            cls.arun = _amanaged(cls.__dict__["arun"])
+
+    def _request_key(
+        self, prompt: Dict[str, str], temperature: Optional[float]
+    ) -> str:
+        # Identifies a request for the response cache and for coalescing
+        if not isinstance(prompt, dict):
+            prompt = {"user_prompt": prompt}
+        return cache_key(
+            provider=self.rate_limit_key or type(self).__name__,
+            model=getattr(self, "model", None),
+            temperature=temperature,
+            params=getattr(self, "defaults", None),
+            system_prompt=prompt.get("system_prompt"),
+            user_prompt=prompt.get("user_prompt"),
+            response_format=None,
+        )
+
+    def _report_usage(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        latency: float = 0.0,
+    ):
+        # Called by the implementations after every request
+        report_usage(
+            self.rate_limit_key or getattr(self, "model", None),
+            prompt_tokens,
+            completion_tokens,
+            cached_tokens,
+            latency,
+        )
+
     @abstractmethod
     def run(self, prompt: Dict[str, str], temperature: float = 0) -> str:
         pass
 
+    def run_with_usage(
+        self, prompt: Dict[str, str], temperature: float = 0
+    ) -> Tuple[str, Usage]:
+        """
+        `run`, also returning the usage of the request: prompt, completion
+        and cached tokens, latency and cost. Responses served by the response
+        cache have no usage.
+        """
+        with track_usage() as usage:
+            response = self.run(prompt=prompt, temperature=temperature)
+        return response, usage
+
+    async def arun(self, prompt: Dict[str, str], temperature: float = 0) -> str:
+        # Providers with an async client override this method, the others
+        # run the synchronous request in a worker thread.
+        return await asyncio.to_thread(
+            self.run, prompt=prompt, temperature=temperature
+        )
+
 
 class LLMInterfaceFactory:
     @abstractmethod
@@ -28,6 +230,52 @@ class _LLMFactory:
     ):
         self.providers[provider][model] = provider_class
 
+    @staticmethod
+    def set_rate_limit(
+        model: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        completion_tokens: int = 0,
+    ):
+        """
+        Set the requests-per-minute and tokens-per-minute budgets of a
+        `provider:model`, shared by all the LLM clients (and probabilistic
+        metrics) using it, across threads and event loops.
+
+        Args:
+            model (str): The `provider:model` key, e.g. "openai:gpt-4o-mini".
+            rpm (Optional[float]): Requests per minute, unlimited if not set.
+            tpm (Optional[float]): Tokens per minute, unlimited if not set.
+                Prompt tokens are estimated with tiktoken before dispatch.
+            completion_tokens (int): Expected completion tokens per request,
+                counted against the TPM budget as well.
+        """
+        rate_limits.set(model, rpm, tpm, completion_tokens)
+
+    @staticmethod
+    def remove_rate_limit(model: str):
+        rate_limits.remove(model)
+
+    @staticmethod
+    def set_price(
+        model: str,
+        prompt: float,
+        completion: float,
+        cached_prompt: Optional[float] = None,
+    ):
+        """
+        Set the price of a `provider:model`, in USD per million tokens, used
+        to report the cost of the metrics (see `MetricsResults.usage`).
+
+        Args:
+            model (str): The `provider:model` key, e.g. "openai:gpt-4o-mini".
+            prompt (float): Price of the prompt tokens.
+            completion (float): Price of the completion tokens.
+            cached_prompt (Optional[float]): Price of the prompt tokens read
+                from the provider's prompt cache, the prompt price if not set.
+        """
+        prices.set(model, Price(prompt, completion, cached_prompt))
+
     @staticmethod
     def default() -> str:
         return os.getenv("DEFAULT_EVAL_MODEL", "openai:gpt-4o-mini")
@@ -41,10 +289,13 @@ class _LLMFactory:
         if provider not in self.providers:
             raise ValueError(f"Provider {provider} not found")
         if model in self.providers[provider]:
-            return self.providers[provider][model](model, **kwargs)
+            llm = self.providers[provider][model](model, **kwargs)
         elif "*" in self.providers[provider]:
-            return self.providers[provider]["*"](model, **kwargs)
-        raise ValueError(f"Model {model} not found for provider {provider}")
+            llm = self.providers[provider]["*"](model, **kwargs)
+        else:
+            raise ValueError(f"Model {model} not found for provider {provider}")
+        llm.rate_limit_key = f"{provider}:{model}"
+        return llm
 
 
 LLMFactory = _LLMFactory()
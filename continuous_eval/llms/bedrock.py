@@ -1,5 +1,6 @@
 import json
 import os
+import time
 from typing import Dict
 
 import boto3
@@ -44,8 +45,15 @@ class Bedrock(LLMInterface):
                 ],
             }
         )
+        tic = time.perf_counter()
         response = self.client.invoke_model(body=body, modelId=self.model)
         response_body = json.loads(response.get("body").read())
+        usage = response_body.get("usage", {})
+        self._report_usage(
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+            latency=time.perf_counter() - tic,
+        )
         return response_body.get("content")
 
         # self.client.model_kwargs["temperature"] = temperature
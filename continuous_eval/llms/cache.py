@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger("LLMCache")
+
+_CACHE_ENV_VAR = "CONTINUOUS_EVAL_LLM_CACHE"
+_CACHE_FILENAME = "llm_cache.sqlite"
+_DEFAULT_MAX_ENTRIES = 100_000
+_DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_DEFAULT_MAX_AGE = 30 * 24 * 3600.0
+_EVICT_EVERY = 256  # writes
+
+
+def cache_key(**fields: Any) -> str:
+    """Content address of a request (provider, model, prompts, ...)."""
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses, in a local SQLite database.
+
+    Values are JSON documents keyed by the content address of the request
+    (see `cache_key`). Entries older than `max_age` seconds are dropped and,
+    past `max_entries` entries or `max_bytes` bytes, the least recently used
+    ones are evicted. The cache can be shared by threads and processes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        max_age: float = _DEFAULT_MAX_AGE,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30.0, check_same_thread=False
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict()
+
+    def evict(self):
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        self._conn.execute(
+            "DELETE FROM responses WHERE created < ?",
+            (time.time() - self.max_age,),
+        )
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM responses"
+        ).fetchone()
+        excess = count - self.max_entries
+        if size > self.max_bytes and count > 0:
+            excess = max(
+                excess, int((size - self.max_bytes) / (size / count)) + 1
+            )
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                "ORDER BY accessed ASC LIMIT ?)",
+                (excess,),
+            )
+        self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else None,
+            "entries": len(self),
+        }
+
+
+class _CacheSettings:
+    def __init__(self):
+        self.cache: Optional[ResponseCache] = None
+        self.enabled = os.getenv(_CACHE_ENV_VAR, "true").lower() != "false"
+        self.all_temperatures = False
+        self._lock = threading.Lock()
+
+    def get(self) -> ResponseCache:
+        with self._lock:
+            if self.cache is None:
+                self.cache = ResponseCache(_default_path())
+            return self.cache
+
+
+def _default_path(filename: str = _CACHE_FILENAME) -> Path:
+    from appdirs import user_data_dir
+
+    return Path(user_data_dir(appname="continuous_eval")) / filename
+
+
+_settings = _CacheSettings()
+
+
+def configure_cache(
+    path: Optional[Union[str, Path]] = None,
+    enabled: bool = True,
+    all_temperatures: bool = False,
+    **kwargs,
+) -> Optional[ResponseCache]:
+    """
+    Configure the LLM response cache.
+
+    By default responses are cached (in the user data directory) only for
+    requests at temperature 0, whose responses are meant to be reproducible.
+
+    Args:
+        path: The SQLite database, defaults to the user data directory.
+        enabled (bool): Whether to use the cache at all (the
+            `CONTINUOUS_EVAL_LLM_CACHE=false` environment variable disables
+            it too).
+        all_temperatures (bool): Cache the responses at any temperature.
+        **kwargs: `max_entries`, `max_bytes` and `max_age` of the cache.
+    """
+    _settings.enabled = enabled
+    _settings.all_temperatures = all_temperatures
+    if path is None and not kwargs:
+        # Back to the default cache, opened on first use
+        _settings.cache = None
+    else:
+        _settings.cache = ResponseCache(path or _default_path(), **kwargs)
+    return _settings.cache
+
+
+def response_cache(temperature: Optional[float]) -> Optional[ResponseCache]:
+    """The cache to use for a request at `temperature`, if any."""
+    if not _settings.enabled:
+        return None
+    if not _settings.all_temperatures and temperature != 0:
+        return None
+    try:
+        return _settings.get()
+    except Exception as e:
+        logger.warning(f"LLM cache disabled: {e}")
+        _settings.enabled = False
+        return None
@@ -1,4 +1,5 @@
 import os
+import time
 from typing import Dict, Optional
 
 from .base import LLMInterface
@@ -32,6 +33,7 @@ class Cohere(LLMInterface):
     def run(self, prompt: Dict[str, str], temperature: float = 1.0) -> str:
         kwargs = self.defaults.copy()
         kwargs["temperature"] = temperature
+        tic = time.perf_counter()
         response = self.client.chat(
             model=self.model,
             messages=[
@@ -40,4 +42,11 @@ class Cohere(LLMInterface):
             ],
             **kwargs,
         )
+        tokens = response.usage.tokens if response.usage else None
+        if tokens is not None:
+            self._report_usage(
+                prompt_tokens=int(tokens.input_tokens or 0),
+                completion_tokens=int(tokens.output_tokens or 0),
+                latency=time.perf_counter() - tic,
+            )
         return response.message.content[0].text  # type: ignore
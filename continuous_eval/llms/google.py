@@ -1,4 +1,5 @@
 import os
+import time
 from typing import Dict, Optional
 
 import google.generativeai as genai
@@ -54,5 +55,13 @@ class GoogleAI(LLMInterface):
             safety_settings=self.safety_settings,
             generation_config=GenerationConfig(**kwargs),
         )
+        tic = time.perf_counter()
         response = model.generate_content(prompt["user_prompt"])
+        usage = response.usage_metadata
+        self._report_usage(
+            prompt_tokens=usage.prompt_token_count,
+            completion_tokens=usage.candidates_token_count,
+            cached_tokens=getattr(usage, "cached_content_token_count", 0),
+            latency=time.perf_counter() - tic,
+        )
         return response.text
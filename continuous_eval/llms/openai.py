@@ -1,9 +1,24 @@
 import os
+import time
 from typing import Dict
 
+from openai import AsyncOpenAI as _AsyncOpenAI
 from openai import OpenAI as _OpenAI
 
-from .base import LLMInterface
+from .base import LLMInterface, LoopClients
+
+
+def usage_counts(usage) -> Dict[str, int]:
+    # Tokens of a chat completion, including the prompt tokens served by
+    # OpenAI's (automatic) prompt cache
+    if usage is None:
+        return dict(prompt_tokens=0, completion_tokens=0)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return dict(
+        prompt_tokens=usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+        cached_tokens=getattr(details, "cached_tokens", None) or 0,
+    )
 
 
 class OpenAI(LLMInterface):
@@ -14,6 +29,7 @@ class OpenAI(LLMInterface):
                 "You can get one at https://beta.openai.com/account/api-keys."
             )
         self.client = _OpenAI()
+        self.async_clients = LoopClients(_AsyncOpenAI)
         self.model = model
         self.defaults = {
             "seed": 0,
@@ -28,6 +44,7 @@ class OpenAI(LLMInterface):
     def run(self, prompt: Dict[str, str], temperature: float = 1.0) -> str:
         kwargs = self.defaults.copy()
         kwargs["temperature"] = temperature
+        tic = time.perf_counter()
         response = self.client.chat.completions.create(
             model=self.model,
             messages=[
@@ -36,4 +53,26 @@ class OpenAI(LLMInterface):
             ],
             **kwargs,
         )
+        self._report_usage(
+            latency=time.perf_counter() - tic, **usage_counts(response.usage)
+        )
+        return response.choices[0].message.content
+
+    async def arun(
+        self, prompt: Dict[str, str], temperature: float = 1.0
+    ) -> str:
+        kwargs = self.defaults.copy()
+        kwargs["temperature"] = temperature
+        tic = time.perf_counter()
+        response = await self.async_clients.get().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": prompt["system_prompt"]},
+                {"role": "user", "content": prompt["user_prompt"]},
+            ],
+            **kwargs,
+        )
+        self._report_usage(
+            latency=time.perf_counter() - tic, **usage_counts(response.usage)
+        )
         return response.choices[0].message.content
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+# JSON file of prices loaded at import, e.g. {"openai:gpt-4o-mini":
+# {"prompt": 0.15, "completion": 0.6, "cached_prompt": 0.075}}
+_PRICES_ENV_VAR = "CONTINUOUS_EVAL_PRICES"
+
+
+@dataclass(frozen=True)
+class Price:
+    """
+    Price of a model, in USD per million tokens.
+
+    Args:
+        prompt (float): Price of the prompt tokens.
+        completion (float): Price of the completion tokens.
+        cached_prompt (float, optional): Price of the prompt tokens read from
+            the provider's prompt cache, the prompt price if not set.
+    """
+
+    prompt: float
+    completion: float
+    cached_prompt: Optional[float] = None
+
+    def cost(
+        self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+    ) -> float:
+        cached_price = (
+            self.prompt if self.cached_prompt is None else self.cached_prompt
+        )
+        return (
+            (prompt_tokens - cached_tokens) * self.prompt
+            + cached_tokens * cached_price
+            + completion_tokens * self.completion
+        ) / 1e6
+
+
+# Public list prices, override them with `LLMFactory.set_price`
+_DEFAULT_PRICES = {
+    "openai:gpt-4o-mini": Price(0.15, 0.60, 0.075),
+    "openai:gpt-4o": Price(2.50, 10.00, 1.25),
+}
+
+
+class PriceTable:
+    """Prices of the models, keyed by `provider:model`."""
+
+    def __init__(self, prices: Optional[Dict[str, Price]] = None):
+        self._prices: Dict[str, Price] = dict(prices or {})
+        self._lock = threading.Lock()
+
+    def set(self, model: str, price: Price):
+        with self._lock:
+            self._prices[model] = price
+
+    def update(self, prices: Dict[str, Union[Price, Dict[str, Any]]]):
+        for model, price in prices.items():
+            if not isinstance(price, Price):
+                price = Price(**price)
+            self.set(model, price)
+
+    def load(self, path: Union[str, Path]):
+        with open(path) as f:
+            self.update(json.load(f))
+
+    def remove(self, model: str):
+        with self._lock:
+            self._prices.pop(model, None)
+
+    def get(self, model: Optional[str]) -> Optional[Price]:
+        # `provider:model`, or else the model name alone (e.g., "gpt-4o-mini"
+        # for a metric that does not know its provider)
+        if model is None:
+            return None
+        price = self._prices.get(model)
+        if price is not None or ":" in model:
+            return price
+        return next(
+            (
+                price
+                for key, price in self._prices.items()
+                if key.split(":", 1)[-1] == model
+            ),
+            None,
+        )
+
+    def cost(
+        self,
+        model: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+    ) -> Optional[float]:
+        """Cost of a request in USD, None for a model without a price."""
+        price = self.get(model)
+        if price is None:
+            return None
+        return price.cost(prompt_tokens, completion_tokens, cached_tokens)
+
+
+prices = PriceTable(_DEFAULT_PRICES)
+if os.getenv(_PRICES_ENV_VAR):
+    prices.load(os.environ[_PRICES_ENV_VAR])
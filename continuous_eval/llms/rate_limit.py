@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+_CHARACTERS_PER_TOKEN = 4.0
+_DEFAULT_ENCODING = "o200k_base"
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`, holding at most
+    `capacity` tokens.
+
+    Callers reserve what they need and are told how long to wait before
+    using it: the bucket may go negative, which queues the reservations
+    fairly without holding the lock while waiting. The same bucket can be
+    shared by threads and event loops.
+    """
+
+    def __init__(
+        self, rate_per_minute: float, capacity: Optional[float] = None
+    ):
+        assert rate_per_minute > 0, "Rate must be positive"
+        self.rate = rate_per_minute / 60.0
+        # By default allow bursts of one second worth of budget
+        self.capacity = max(1.0, capacity or self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Reserve `amount` tokens, returns the time to wait (s)."""
+        # A request larger than the bucket is charged in full: the balance
+        # goes below zero and the following callers wait for it to refill
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets of a provider model.
+
+    Every request is admitted against both buckets, its token cost being the
+    estimated prompt tokens plus `completion_tokens` (the expected size of
+    the completion, which providers count against the same budget).
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        completion_tokens: int = 0,
+    ):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.completion_tokens = completion_tokens
+
+    def _reserve(self, num_tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.reserve(1)
+        if self.tokens is not None:
+            wait = max(
+                wait, self.tokens.reserve(num_tokens + self.completion_tokens)
+            )
+        return wait
+
+    def acquire(self, num_tokens: int = 0):
+        wait = self._reserve(num_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, num_tokens: int = 0):
+        wait = self._reserve(num_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@lru_cache(maxsize=32)
+def _encoder(model: str):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding(_DEFAULT_ENCODING)
+    except Exception:
+        # Encodings are downloaded on first use, offline we approximate
+        return None
+
+
+def estimate_tokens(prompt: Any, model: str = "") -> int:
+    """
+    Estimate the prompt tokens of a request with tiktoken (the encoding of
+    `model` if known). The estimate is only used for admission, so other
+    providers' models use the default encoding, and the character count is
+    used when no encoding is available.
+    """
+    if isinstance(prompt, dict):
+        text = "\n".join(str(v) for v in prompt.values())
+    elif isinstance(prompt, (list, tuple)):
+        text = "\n".join(
+            str(m.get("content", "")) if isinstance(m, dict) else str(m)
+            for m in prompt
+        )
+    else:
+        text = str(prompt)
+    try:
+        encoder = _encoder(model)
+    except Exception:
+        encoder = None
+    if encoder is None:
+        return int(len(text) / _CHARACTERS_PER_TOKEN)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+class RateLimitRegistry:
+    """Process-wide rate limiters, keyed by `provider:model`."""
+
+    def __init__(self):
+        self._limiters: Dict[str, RateLimiter] = dict()
+        self._lock = threading.Lock()
+
+    def set(
+        self,
+        key: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        completion_tokens: int = 0,
+    ) -> RateLimiter:
+        limiter = RateLimiter(rpm, tpm, completion_tokens)
+        with self._lock:
+            self._limiters[key] = limiter
+        return limiter
+
+    def get(self, key: Optional[str]) -> Optional[RateLimiter]:
+        if key is None:
+            return None
+        return self._limiters.get(key)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._limiters.pop(key, None)
+
+    def throttle(self, key: Optional[str], prompt: Any):
+        limiter = self.get(key)
+        if limiter is not None:
+            limiter.acquire(estimate_tokens(prompt, key.split(":", 1)[-1]))
+
+    async def athrottle(self, key: Optional[str], prompt: Any):
+        limiter = self.get(key)
+        if limiter is not None:
+            await limiter.aacquire(
+                estimate_tokens(prompt, key.split(":", 1)[-1])
+            )
+
+
+rate_limits = RateLimitRegistry()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+_SINGLE_FLIGHT_ENV_VAR = "CONTINUOUS_EVAL_SINGLE_FLIGHT"
+
+# Outcome of a leader interrupted by a non-`Exception` (e.g., cancelled), its
+# waiters retry instead of sharing it
+_RETRY = object()
+
+
+class SingleFlight:
+    """
+    Coalescing of identical requests in flight.
+
+    The first caller of a key (the leader) makes the request, the callers of
+    the same key arriving before it completes wait for its outcome, response
+    or exception, instead of making their own. A leader interrupted by a
+    `BaseException` that is not an `Exception` (cancellation, keyboard
+    interrupt) does not hand it to its waiters, one of them makes the request
+    instead. Leaders and waiters can be threads or coroutines of any event
+    loop.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.calls = 0  # Requests actually made
+        self.saved = 0  # Requests served by an identical one in flight
+        self._in_flight: Dict[str, Future] = dict()
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.saved += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.calls += 1
+            return future, True
+
+    def _release(self, key: str):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _retry(self):
+        with self._lock:
+            self.saved -= 1
+
+    def _settle(self, key: str, future: Future, error: BaseException):
+        # The key is released first so that retrying waiters elect a new leader
+        self._release(key)
+        if isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            future.set_result(_RETRY)
+
+    def do(self, key: Optional[str], fn: Callable[[], Any]) -> Any:
+        if key is None or not self.enabled:
+            return fn()
+        future, leader = self._join(key)
+        while not leader:
+            result = future.result()
+            if result is not _RETRY:
+                return result
+            self._retry()
+            future, leader = self._join(key)
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, e)
+            raise
+        self._release(key)
+        future.set_result(result)
+        return result
+
+    async def ado(
+        self, key: Optional[str], fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if key is None or not self.enabled:
+            return await fn()
+        future, leader = self._join(key)
+        while not leader:
+            result = await asyncio.wrap_future(future)
+            if result is not _RETRY:
+                return result
+            self._retry()
+            future, leader = self._join(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(key, future, e)
+            raise
+        self._release(key)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.saved
+        return {
+            "calls": self.calls,
+            "saved": self.saved,
+            "saved_rate": self.saved / total if total > 0 else None,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = 0
+            self.saved = 0
+
+
+def flight_key(key: str, temperature: Optional[float]) -> Optional[str]:
+    """
+    The key to coalesce a request at `temperature` on, if any.
+
+    Only deterministic requests are coalesced, identical requests sampled at
+    a positive temperature are expected to get their own responses.
+    """
+    return key if temperature == 0 else None
+
+
+single_flight = SingleFlight(
+    enabled=os.getenv(_SINGLE_FLIGHT_ENV_VAR, "true").lower() != "false"
+)
@@ -1 +1,12 @@
-from continuous_eval.metrics.base import Metric
+from typing import TYPE_CHECKING
+
+from continuous_eval.utils.lazy import lazy_exports
+
+# Metrics are imported on first access: importing a metric family does not
+# pay for the dependencies (NLTK, OpenAI, torch, ...) of the others.
+if TYPE_CHECKING:
+    from continuous_eval.metrics.base import Metric
+
+__all__ = ["Metric"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {"Metric": ".base"})
@@ -1,2 +1,4 @@
-from .metric import Arg, Field, Metric
+from .metric import Arg, Field, Metric, RetryPolicy
+from .cascade import Cascade
+from .packing import Packing
 from .prompt import MetricPrompt
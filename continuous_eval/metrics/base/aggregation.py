@@ -0,0 +1,212 @@
+from numbers import Number
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+_DEFAULT_SKETCH_SIZE = 256
+_DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class QuantileSketch:
+    """
+    Mergeable, bounded-memory quantile sketch.
+
+    Values are stored as weighted centroids. Until the sketch holds more than
+    `2 * max_size` points, quantiles are exact; past that, the points are
+    compressed into `max_size` centroids of (roughly) equal weight.
+    """
+
+    def __init__(self, max_size: int = _DEFAULT_SKETCH_SIZE):
+        self.max_size = max_size
+        self._values = np.empty(0, dtype=float)
+        self._weights = np.empty(0, dtype=float)
+        self._compressed = False
+
+    def update(self, values: Union[Sequence[float], np.ndarray]):
+        values = np.asarray(values, dtype=float).ravel()
+        self._values = np.concatenate([self._values, values])
+        self._weights = np.concatenate([self._weights, np.ones(len(values))])
+        if len(self._values) > 2 * self.max_size:
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch"):
+        self._values = np.concatenate([self._values, other._values])
+        self._weights = np.concatenate([self._weights, other._weights])
+        self._compressed = self._compressed or other._compressed
+        if len(self._values) > 2 * self.max_size:
+            self._compress()
+        return self
+
+    def _compress(self):
+        order = np.argsort(self._values, kind="stable")
+        values, weights = self._values[order], self._weights[order]
+        cum = np.cumsum(weights)
+        bins = np.minimum(
+            ((cum - weights / 2) / cum[-1] * self.max_size).astype(int),
+            self.max_size - 1,
+        )
+        new_weights = np.bincount(
+            bins, weights=weights, minlength=self.max_size
+        )
+        new_values = np.bincount(
+            bins, weights=values * weights, minlength=self.max_size
+        )
+        mask = new_weights > 0
+        self._values = new_values[mask] / new_weights[mask]
+        self._weights = new_weights[mask]
+        self._compressed = True
+
+    def quantile(self, q: Union[float, Sequence[float]]):
+        if len(self._values) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        if not self._compressed:
+            return np.quantile(self._values, q)
+        order = np.argsort(self._values, kind="stable")
+        values, weights = self._values[order], self._weights[order]
+        cum = np.cumsum(weights) - weights / 2
+        return np.interp(np.asarray(q) * weights.sum(), cum, values)
+
+
+class Accumulator:
+    """
+    Streaming statistics of a numeric field: count, mean, variance (Welford,
+    merged with Chan's parallel formula), min, max and quantiles.
+
+    Accumulators can be updated incrementally as results arrive and merged
+    across shards.
+    """
+
+    def __init__(self, sketch_size: int = _DEFAULT_SKETCH_SIZE):
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(sketch_size)
+
+    def _combine(self, count: int, mean: float, m2: float):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    def update(self, values: Union[Number, Sequence[float], np.ndarray]):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        mean = values.mean()
+        self._combine(len(values), mean, ((values - mean) ** 2).sum())
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other: "Accumulator"):
+        self._combine(other.count, other._mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return float(self._mean) if self.count > 0 else np.nan
+
+    @property
+    def variance(self) -> float:
+        # Sample variance
+        return float(self._m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def quantile(self, q: Union[float, Sequence[float]]):
+        return self.sketch.quantile(q)
+
+    def to_dict(
+        self, quantiles: Sequence[float] = _DEFAULT_QUANTILES
+    ) -> Dict[str, float]:
+        values = np.atleast_1d(self.quantile(list(quantiles)))
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": float(self.min) if self.count > 0 else np.nan,
+            "max": float(self.max) if self.count > 0 else np.nan,
+            **{
+                f"p{round(q * 100)}": float(v)
+                for q, v in zip(quantiles, values)
+            },
+        }
+
+
+def _is_numeric(value: Any) -> bool:
+    return isinstance(value, (Number, np.number)) and not isinstance(
+        value, complex
+    )
+
+
+class MetricAggregator:
+    """
+    Incremental aggregation of per-sample metric results.
+
+    Numeric fields (including booleans) of each result are accumulated,
+    anything else (strings, lists, nested error records) is ignored.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        sketch_size: int = _DEFAULT_SKETCH_SIZE,
+    ):
+        self._sketch_size = sketch_size
+        self._fields = set(fields) if fields is not None else None
+        self.accumulators: Dict[str, Accumulator] = dict()
+
+    def _accumulator(self, key: str) -> Accumulator:
+        if key not in self.accumulators:
+            self.accumulators[key] = Accumulator(self._sketch_size)
+        return self.accumulators[key]
+
+    def update(self, results: Union[Dict[str, Any], List[Dict[str, Any]]]):
+        if isinstance(results, dict):
+            results = [results]
+        columns: Dict[str, List[float]] = dict()
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            for key, value in result.items():
+                if self._fields is not None and key not in self._fields:
+                    continue
+                if _is_numeric(value):
+                    columns.setdefault(key, []).append(value)
+        for key, values in columns.items():
+            self._accumulator(key).update(values)
+        return self
+
+    def merge(self, other: "MetricAggregator"):
+        for key, acc in other.accumulators.items():
+            self._accumulator(key).merge(acc)
+        return self
+
+    def means(self) -> Dict[str, float]:
+        return {
+            key: acc.mean
+            for key, acc in self.accumulators.items()
+            if acc.count > 0
+        }
+
+    def summary(
+        self, quantiles: Sequence[float] = _DEFAULT_QUANTILES
+    ) -> Dict[str, Dict[str, float]]:
+        return {
+            key: acc.to_dict(quantiles)
+            for key, acc in self.accumulators.items()
+            if acc.count > 0
+        }
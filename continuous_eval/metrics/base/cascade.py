@@ -0,0 +1,210 @@
+from typing import Any, Dict, List, Optional
+
+from continuous_eval.metrics.base.instrumentation import MetricStats
+from continuous_eval.metrics.base.metric import Arg, Field, Metric, is_error
+
+CHEAP_TIER = "cheap"
+JUDGE_TIER = "judge"
+
+
+class Cascade(Metric):
+    """
+    Cascaded evaluation: a cheap metric (e.g., a deterministic or semantic
+    one) scores every sample and decides the clear cases, the expensive judge
+    (e.g., an LLM-based metric) only runs on the samples it leaves uncertain.
+
+    A sample passes if the cheap score is at least `accept`, fails if it is at
+    most `reject`, and is sent to the judge in between, where it passes if the
+    judge score is at least `judge_threshold`. Samples whose cheap metric
+    failed in `batch` are sent to the judge as well.
+
+    Every result holds the fields of the cheap metric, those of the judge for
+    the escalated samples, the verdict (`<name>_verdict`) and the tier that
+    decided it (`<name>_tier`, "cheap" or "judge").
+    """
+
+    def __init__(
+        self,
+        cheap: Metric,
+        judge: Metric,
+        field: str,
+        accept: float,
+        reject: float,
+        judge_field: str,
+        judge_threshold: float = 0.5,
+        name: str = "Cascade",
+    ):
+        """
+        Args:
+            cheap (Metric): The metric scoring every sample.
+            judge (Metric): The metric scoring the uncertain samples.
+            field (str): Field of the cheap metric holding its score.
+            accept (float): Cheap score from which a sample passes.
+            reject (float): Cheap score up to which a sample fails.
+            judge_field (str): Field of the judge holding its score.
+            judge_threshold (float): Judge score from which a sample passes.
+            name (str): Name of the metric, prefix of its fields.
+        """
+        if reject > accept:
+            raise ValueError(
+                f"reject ({reject}) must not be greater than accept ({accept})"
+            )
+        super().__init__(is_cpu_bound=False)
+        self.cheap = cheap
+        self.judge = judge
+        self.field = field
+        self.accept = accept
+        self.reject = reject
+        self.judge_field = judge_field
+        self.judge_threshold = judge_threshold
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    def _cheap_verdict(self, result: Any) -> Optional[bool]:
+        # None in the uncertain band (or if the cheap metric failed)
+        if is_error(result) or not isinstance(result, dict):
+            return None
+        score = result.get(self.field)
+        if score is None:
+            return None
+        if score >= self.accept:
+            return True
+        if score <= self.reject:
+            return False
+        return None
+
+    def _result(self, cheap_result: Any, judge_result: Any = None) -> Any:
+        base = (
+            cheap_result
+            if isinstance(cheap_result, dict) and not is_error(cheap_result)
+            else dict()
+        )
+        if judge_result is None:
+            return {
+                **base,
+                f"{self.name}_verdict": self._cheap_verdict(cheap_result),
+                f"{self.name}_tier": CHEAP_TIER,
+            }
+        if is_error(judge_result):
+            return judge_result
+        return {
+            **base,
+            **judge_result,
+            f"{self.name}_verdict": (
+                judge_result[self.judge_field] >= self.judge_threshold
+            ),
+            f"{self.name}_tier": JUDGE_TIER,
+        }
+
+    def compute(self, **kwargs):
+        cheap_result = self.cheap.compute(**self._kwargs(self.cheap, kwargs))
+        if self._cheap_verdict(cheap_result) is not None:
+            return self._result(cheap_result)
+        judge_result = self.judge.compute(**self._kwargs(self.judge, kwargs))
+        return self._result(cheap_result, judge_result)
+
+    async def acompute(self, **kwargs):
+        cheap_result = await self.cheap.acompute(
+            **self._kwargs(self.cheap, kwargs)
+        )
+        if self._cheap_verdict(cheap_result) is not None:
+            return self._result(cheap_result)
+        judge_result = await self.judge.acompute(
+            **self._kwargs(self.judge, kwargs)
+        )
+        return self._result(cheap_result, judge_result)
+
+    @staticmethod
+    def _kwargs(metric: Metric, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Arguments of one of the tiers, among those of the cascade
+        names = metric._arg_names() or set(kwargs)
+        return {key: val for key, val in kwargs.items() if key in names}
+
+    def _arg_names(self) -> set:
+        return self.cheap._arg_names() | self.judge._arg_names()
+
+    def _escalated(self, cheap_results: List[Any]) -> List[int]:
+        return [
+            idx
+            for idx, result in enumerate(cheap_results)
+            if self._cheap_verdict(result) is None
+        ]
+
+    def _combine(
+        self,
+        cheap_results: List[Any],
+        escalated: List[int],
+        judge_results: List[Any],
+    ) -> List[Any]:
+        judged = dict(zip(escalated, judge_results))
+        results = [
+            self._result(result, judged.get(idx))
+            for idx, result in enumerate(cheap_results)
+        ]
+        self.stats.items = len(results)
+        self.stats.errors = len(self.failed_indices(results))
+        self.stats.retries = self.cheap.stats.retries
+        self.stats.usage.add(self.cheap.stats.usage)
+        if escalated:
+            self.stats.retries += self.judge.stats.retries
+            self.stats.usage.add(self.judge.stats.usage)
+        self.stats.extra["cascade"] = {
+            "escalated": len(escalated),
+            "escalation_rate": (
+                len(escalated) / len(results) if results else None
+            ),
+        }
+        self._stop_stats()
+        return results
+
+    def _batch(self, kwargs: Dict[str, Any]) -> List[Any]:
+        self.stats = MetricStats().start()
+        cheap_results = self.cheap.batch(**self._kwargs(self.cheap, kwargs))
+        escalated = self._escalated(cheap_results)
+        judge_results = (
+            self.judge.batch(**self.judge._subset(kwargs, escalated))
+            if escalated
+            else []
+        )
+        return self._combine(cheap_results, escalated, judge_results)
+
+    async def _abatch(
+        self, kwargs: Dict[str, Any], max_concurrency: Optional[int]
+    ) -> List[Any]:
+        self.stats = MetricStats().start()
+        cheap_results = await self.cheap.abatch(
+            max_concurrency=max_concurrency,
+            **self._kwargs(self.cheap, kwargs),
+        )
+        escalated = self._escalated(cheap_results)
+        judge_results = (
+            await self.judge.abatch(
+                max_concurrency=max_concurrency,
+                **self.judge._subset(kwargs, escalated),
+            )
+            if escalated
+            else []
+        )
+        return self._combine(cheap_results, escalated, judge_results)
+
+    @property
+    def args(self) -> Dict[str, Arg]:
+        return {**self.cheap.args, **self.judge.args}
+
+    @property
+    def schema(self) -> Dict[str, Field]:
+        return {
+            **self.cheap.schema,
+            **self.judge.schema,
+            f"{self.name}_verdict": Field(
+                type=bool, description="Whether the sample passes."
+            ),
+            f"{self.name}_tier": Field(
+                type=str,
+                description="The tier that decided the sample "
+                "(cheap or judge).",
+            ),
+        }
@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from continuous_eval.metrics.base.instrumentation import ItemRecord
+
+_OVERLOAD_STATUS_CODES = {408, 409, 429}
+
+
+def is_overload(exc: BaseException) -> bool:
+    """
+    Whether an exception signals that the provider is overloaded: rate
+    limiting (429), timeouts or server errors (5xx).
+
+    Works with the OpenAI and Anthropic clients (and any client exposing a
+    `status_code`, directly or on its `response`) without importing them.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in _OVERLOAD_STATUS_CODES or status >= 500
+    return type(exc).__name__ in {
+        "RateLimitError",
+        "APITimeoutError",
+        "InternalServerError",
+        "OverloadedError",
+    }
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Whether an exception is worth retrying: the provider is overloaded (see
+    `is_overload`), or the connection failed or timed out.
+    """
+    if is_overload(exc):
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    return type(exc).__name__ in {
+        "APIConnectionError",
+        "ConnectError",
+        "ConnectTimeout",
+        "ReadTimeout",
+        "RemoteProtocolError",
+    }
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD (additive increase, multiplicative decrease) controller of the number
+    of samples in flight.
+
+    The limit grows by `increase` per round trip (i.e., by `increase / limit`
+    per completed sample) while samples complete without being throttled and
+    with a latency within `latency_tolerance` times the best latency observed.
+    It is multiplied by `decrease` when a sample was throttled (429, timeout
+    or 5xx), at most once per round trip so that a burst of errors from the
+    requests already in flight counts as a single congestion signal.
+
+    The controller is updated from the thread (or event loop) consuming the
+    results and keeps its state across batches.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ):
+        assert 1 <= min_limit <= max_limit, "Invalid limits"
+        initial = max(min_limit, min(initial, max_limit))
+        assert 0 < decrease < 1, "decrease must be in (0, 1)"
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(initial)
+        self._best_latency: Optional[float] = None
+        self._cooldown = 0
+        self.peak = initial
+        self.cuts = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def update(self, record: ItemRecord):
+        if self._cooldown > 0:
+            self._cooldown -= 1
+        if record.throttled > 0:
+            if self._cooldown == 0:
+                self._limit = max(
+                    float(self.min_limit), self._limit * self.decrease
+                )
+                self._cooldown = self.limit
+                self.cuts += 1
+            return
+        if record.error:
+            return
+        if self._best_latency is None or record.latency < self._best_latency:
+            self._best_latency = record.latency
+        if record.latency <= self.latency_tolerance * self._best_latency:
+            self._limit = min(
+                float(self.max_limit), self._limit + self.increase / self._limit
+            )
+            self.peak = max(self.peak, self.limit)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "peak": self.peak,
+            "cuts": self.cuts,
+        }
+
+
+class AdaptiveGate:
+    """Async counterpart of a semaphore whose size follows a controller."""
+
+    def __init__(self, controller: AdaptiveConcurrency):
+        self.controller = controller
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._in_flight < max(1, self.controller.limit)
+            )
+            self._in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
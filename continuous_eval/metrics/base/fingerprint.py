@@ -0,0 +1,112 @@
+import dataclasses
+import enum
+import hashlib
+import inspect
+import json
+import re
+from typing import Any, Dict, Optional
+
+# Attributes never included in a configuration (e.g., API keys of a client)
+_SECRET = re.compile(r"key|secret|token|password|credential", re.IGNORECASE)
+_MAX_DEPTH = 4
+
+
+def _qualname(obj: Any) -> str:
+    return f"{obj.__module__}.{obj.__qualname__}"
+
+
+def stable_value(value: Any, depth: int = 0) -> Any:
+    """
+    JSON-ready representation of a value that does not change across runs
+    or processes (no memory addresses, sorted sets and keys).
+
+    Objects are described by their class and, in order of preference, their
+    `asdict()`, `serialize()` or `model_dump()` output, their dataclass
+    fields, or their public attributes holding plain values.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return stable_value(value.value, depth)
+    if depth >= _MAX_DEPTH:
+        return _qualname(type(value))
+    if isinstance(value, (list, tuple)):
+        return [stable_value(v, depth + 1) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(
+            (stable_value(v, depth + 1) for v in value),
+            key=lambda v: json.dumps(v, sort_keys=True),
+        )
+    if isinstance(value, dict):
+        return {str(k): stable_value(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, type) or inspect.isroutine(value):
+        return _qualname(value)
+    if hasattr(value, "tolist"):  # NumPy arrays and scalars
+        return value.tolist()
+    desc: Dict[str, Any] = {"__class__": _qualname(type(value))}
+    for method in ("asdict", "serialize", "model_dump"):
+        if callable(getattr(value, method, None)):
+            try:
+                desc["state"] = stable_value(
+                    getattr(value, method)(), depth + 1
+                )
+                return desc
+            except Exception:
+                pass
+    if dataclasses.is_dataclass(value):
+        fields = {
+            f.name: getattr(value, f.name) for f in dataclasses.fields(value)
+        }
+    else:
+        fields = {
+            k: v
+            for k, v in getattr(value, "__dict__", {}).items()
+            if not k.startswith("_")
+            and (v is None or isinstance(v, (bool, int, float, str)))
+        }
+    for k, v in sorted(fields.items()):
+        if not _SECRET.search(k):
+            desc[k] = stable_value(v, depth + 1)
+    return desc
+
+
+def init_params(
+    cls: type, args: tuple, kwargs: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Stable description of the arguments a metric was constructed with."""
+    try:
+        bound = inspect.signature(cls.__init__).bind(None, *args, **kwargs)
+        bound.apply_defaults()
+    except (TypeError, ValueError):
+        return None
+    params = dict()
+    for name, value in list(bound.arguments.items())[1:]:
+        kind = bound.signature.parameters[name].kind
+        if kind is inspect.Parameter.VAR_KEYWORD:
+            params.update(value)
+        else:
+            params[name] = value
+    return {
+        k: stable_value(v) for k, v in params.items() if not _SECRET.search(k)
+    }
+
+
+def fingerprint(value: Any) -> str:
+    payload = json.dumps(stable_value(value), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return stable_value(value)
+
+
+def sample_key(metric_fingerprint: str, kwargs: Dict[str, Any]) -> str:
+    """Cache key of the computation of a metric on a single sample."""
+    payload = json.dumps(
+        [metric_fingerprint, kwargs], sort_keys=True, default=_json_default
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
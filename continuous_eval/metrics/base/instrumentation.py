@@ -0,0 +1,271 @@
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from continuous_eval.metrics.base.aggregation import QuantileSketch
+
+_LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+@dataclass
+class Usage:
+    """LLM usage of a request, or accumulated over several requests."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # Prompt tokens read from the provider's cache
+    latency: float = 0.0  # Time spent waiting for the provider (s)
+    requests: int = 0
+    cost: Optional[float] = None  # USD, None if no request has a known price
+    # Tokens reported without a prompt / completion split
+    other_tokens: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens + self.other_tokens
+
+    def add(self, other: "Usage") -> "Usage":
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.latency += other.latency
+        self.requests += other.requests
+        self.other_tokens += other.other_tokens
+        if other.cost is not None:
+            self.cost = (self.cost or 0.0) + other.cost
+        return self
+
+    def split(self, parts: int) -> List["Usage"]:
+        # Usage of `parts` samples served by the same requests: the shares add
+        # up to it, remainders going to the first shares and the requests
+        # being counted in the first one
+        def spread(total: int) -> List[int]:
+            quotient, remainder = divmod(total, parts)
+            return [quotient + (i < remainder) for i in range(parts)]
+
+        prompt = spread(self.prompt_tokens)
+        completion = spread(self.completion_tokens)
+        cached = spread(self.cached_tokens)
+        other = spread(self.other_tokens)
+        return [
+            Usage(
+                prompt_tokens=prompt[i],
+                completion_tokens=completion[i],
+                cached_tokens=cached[i],
+                latency=self.latency / parts,
+                requests=self.requests if i == 0 else 0,
+                cost=None if self.cost is None else self.cost / parts,
+                other_tokens=other[i],
+            )
+            for i in range(parts)
+        ]
+
+
+# Usage of the sample being computed in the current thread / task
+_usage: ContextVar[Optional[Usage]] = ContextVar("usage", default=None)
+
+
+def record_usage(usage: Usage):
+    """
+    Report the usage of an LLM request to the sample being computed.
+
+    LLM clients call this after every request, it is a no-op outside of an
+    instrumented metric computation.
+    """
+    counter = _usage.get()
+    if counter is not None:
+        counter.add(usage)
+
+
+def record_tokens(num_tokens: Optional[int]):
+    """Report tokens used without a prompt / completion split."""
+    if num_tokens:
+        record_usage(Usage(other_tokens=num_tokens))
+
+
+@contextmanager
+def track_usage() -> Iterator[Usage]:
+    usage = Usage()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+@dataclass
+class ItemRecord:
+    """Instrumentation of a single sample computation."""
+
+    latency: float  # Wall time of the computation, retries included (s)
+    queue_wait: float  # Time between submission and start (s)
+    attempts: int
+    error: bool
+    throttled: int = 0  # Attempts failed because the provider was overloaded
+    usage: Usage = field(default_factory=Usage)
+    index: Optional[int] = None
+
+    @property
+    def tokens(self) -> int:
+        return self.usage.tokens
+
+
+ItemCallback = Callable[[str, ItemRecord], None]
+
+
+def _distribution(
+    sketch: QuantileSketch, total: float, count: int
+) -> Dict[str, Optional[float]]:
+    # Empty distributions are reported as None (JSON null), not NaN
+    if count == 0:
+        return {
+            "mean": None,
+            **{f"p{round(q * 100)}": None for q in _LATENCY_QUANTILES},
+        }
+    quantiles = np.atleast_1d(sketch.quantile(list(_LATENCY_QUANTILES)))
+    return {
+        "mean": total / count,
+        **{
+            f"p{round(q * 100)}": float(v)
+            for q, v in zip(_LATENCY_QUANTILES, quantiles)
+        },
+    }
+
+
+class MetricStats:
+    """
+    Running statistics of the computations of a metric: latency and queue
+    wait histograms, throughput, retries, errors and token usage.
+
+    Records are added from the thread consuming the results, so no locking
+    is needed.
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.errors = 0
+        self.retries = 0
+        self.usage = Usage()
+        self._latency = QuantileSketch()
+        self._latency_total = 0.0
+        self._queue_wait = QuantileSketch()
+        self._queue_wait_total = 0.0
+        self._timed = 0
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+        self.extra: Dict[str, Any] = dict()
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._end = None
+        return self
+
+    def stop(self):
+        self._end = time.perf_counter()
+        return self
+
+    @property
+    def wall_time(self) -> float:
+        if self._start is None:
+            return 0.0
+        return (self._end or time.perf_counter()) - self._start
+
+    def record(self, item: ItemRecord):
+        self.items += 1
+        self.errors += int(item.error)
+        self.retries += max(0, item.attempts - 1)
+        self.usage.add(item.usage)
+        self._timed += 1
+        self._latency.update([item.latency])
+        self._latency_total += item.latency
+        self._queue_wait.update([max(0.0, item.queue_wait)])
+        self._queue_wait_total += max(0.0, item.queue_wait)
+
+    def merge(self, other: "MetricStats") -> "MetricStats":
+        # Statistics of consecutive batches (e.g., the draws of a sequential
+        # evaluation): the wall time spans from the first to the last one
+        self.items += other.items
+        self.errors += other.errors
+        self.retries += other.retries
+        self.usage.add(other.usage)
+        self._latency.merge(other._latency)
+        self._latency_total += other._latency_total
+        self._queue_wait.merge(other._queue_wait)
+        self._queue_wait_total += other._queue_wait_total
+        self._timed += other._timed
+        if other._start is not None:
+            self._start = min(self._start or other._start, other._start)
+            self._end = max(self._end or 0.0, other._end or time.perf_counter())
+        self.extra.update(other.extra)
+        return self
+
+    def record_batch(self, num_items: int):
+        # Vectorized kernels compute the whole batch at once: only the item
+        # count (and so the throughput) is known.
+        self.items += num_items
+
+    def summary(self) -> Dict[str, Any]:
+        wall_time = self.wall_time
+        summary = {
+            "items": self.items,
+            "errors": self.errors,
+            "retries": self.retries,
+            "wall_time": wall_time,
+            "items_per_sec": self.items / wall_time if wall_time > 0 else None,
+            "latency": _distribution(
+                self._latency, self._latency_total, self._timed
+            ),
+            "queue_wait": _distribution(
+                self._queue_wait, self._queue_wait_total, self._timed
+            ),
+        }
+        summary.update(self._usage_summary(wall_time))
+        summary.update(self.extra)
+        return summary
+
+    @property
+    def tokens(self) -> int:
+        return self.usage.tokens
+
+    def _usage_summary(self, wall_time: float) -> Dict[str, Any]:
+        usage = self.usage
+        if usage.tokens == 0:
+            return dict()
+        summary: Dict[str, Any] = {
+            "tokens": usage.tokens,
+            "tokens_per_sec": (
+                usage.tokens / wall_time if wall_time > 0 else None
+            ),
+        }
+        if usage.requests > 0:
+            summary.update(
+                {
+                    "requests": usage.requests,
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "cached_tokens": usage.cached_tokens,
+                    # Share of the prompt served by the provider's cache
+                    "prompt_cache_hit_rate": (
+                        usage.cached_tokens / usage.prompt_tokens
+                        if usage.prompt_tokens > 0
+                        else None
+                    ),
+                    "llm_latency": usage.latency / usage.requests,
+                    # Generation speed of the provider
+                    "completion_tokens_per_sec": (
+                        usage.completion_tokens / usage.latency
+                        if usage.latency > 0
+                        else None
+                    ),
+                    "cost": usage.cost,
+                }
+            )
+        return summary
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.summary(), **kwargs)
@@ -1,8 +1,17 @@
-from typing import Any, Dict
+import json
+from typing import Any, Dict, List
+
+from json_repair import repair_json
 
 from continuous_eval.llms import LLMFactory
+from continuous_eval.llms.rate_limit import estimate_tokens
 from continuous_eval.metrics.base import Field as MetricField
 from continuous_eval.metrics.base import Metric, MetricPrompt
+from continuous_eval.metrics.base.packing import (
+    PACKED_INSTRUCTIONS,
+    pack_keys,
+    packed_prompt,
+)
 from continuous_eval.metrics.base.response_type import ScoringFunction
 
 
@@ -74,14 +83,67 @@ class LLMMetric(Metric):
             name=name, prompt=prompt, temperature=temperature, model=model
         )
 
-    def compute(self, **kwargs):
+    def _margs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         if self.overloaded_params is not None:
-            margs = {
+            return {
                 arg: kwargs[f.name] for arg, f in self.overloaded_params.items()
             }
-        else:
-            margs = kwargs
-        prompt = self.prompt.render(**margs)
+        return kwargs
+
+    def _packable(self) -> bool:
+        # Metrics judging a sample with a single prompt (see `_margs`)
+        return self._specializes("_margs")
+
+    def _sample_tokens(self, kwargs: Dict[str, Any]) -> int:
+        prompt = self.prompt.render(**self._margs(kwargs))
+        return estimate_tokens(prompt["user_prompt"], self._llm_model)
+
+    def _pack_prefix_tokens(self) -> int:
+        return estimate_tokens(
+            self.prompt.system_prompt() + PACKED_INSTRUCTIONS, self._llm_model
+        )
+
+    @property
+    def _llm_model(self) -> str:
+        return self.model.split(":", 1)[-1]
+
+    def _compute_pack(self, kwargs: List[Dict[str, Any]]) -> List[Any]:
+        prompts = [self.prompt.render(**self._margs(kw)) for kw in kwargs]
+        if len(prompts) == 1 or any(
+            p["system_prompt"] != prompts[0]["system_prompt"] for p in prompts
+        ):
+            return [None] * len(prompts)
+        res = self._llm.run(
+            prompt=packed_prompt(prompts), temperature=self.temperature
+        )
+        responses = repair_json(res, return_objects=True)
+        if not isinstance(responses, dict):
+            return [None] * len(prompts)
+        scores = list()
+        for key in pack_keys(len(prompts)):
+            response = responses.get(key)
+            if response is None:
+                scores.append(None)
+                continue
+            if not isinstance(response, str):
+                response = json.dumps(response)
+            try:
+                score = self.prompt.response_format.score(response)  # type: ignore
+            except Exception:
+                score = None
+            scores.append(score)
+        return scores
+
+    def compute(self, **kwargs):
+        prompt = self.prompt.render(**self._margs(kwargs))
         res = self._llm.run(prompt=prompt, temperature=self.temperature)
         score = self.prompt.response_format.score(res)  # type: ignore
         return score
+
+    async def acompute(self, **kwargs):
+        if not self._native_async():
+            return await super().acompute(**kwargs)
+        prompt = self.prompt.render(**self._margs(kwargs))
+        res = await self._llm.arun(prompt=prompt, temperature=self.temperature)
+        score = self.prompt.response_format.score(res)  # type: ignore
+        return score
@@ -0,0 +1,107 @@
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, List, Tuple, Union
+
+Path = Tuple[Union[str, int], ...]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SCALAR = re.compile(r"-?\d+(\.\d+)?([eE][-+]?\d+)?|true|false|null")
+
+
+class _Truncated(Exception):
+    pass
+
+
+def _value_offsets(text: str) -> Dict[Path, int]:
+    # Offset of the first character of every scalar value of a JSON text (the
+    # first character inside the quotes for a string), keyed by its path.
+    # The values before a truncation or a syntax error are kept.
+    offsets: Dict[Path, int] = dict()
+
+    def skip(pos: int) -> int:
+        pos = _WHITESPACE.match(text, pos).end()  # type: ignore
+        if pos >= len(text):
+            raise _Truncated()
+        return pos
+
+    def value(pos: int, path: Path) -> int:
+        pos = skip(pos)
+        char = text[pos]
+        if char == "{":
+            return members(pos + 1, path, "}", with_keys=True)
+        if char == "[":
+            return members(pos + 1, path, "]", with_keys=False)
+        if char == '"':
+            offsets[path] = pos + 1
+            return scanstring(text, pos + 1)[1]
+        match = _SCALAR.match(text, pos)
+        if match is None:
+            raise _Truncated()
+        offsets[path] = pos
+        return match.end()
+
+    def members(pos: int, path: Path, close: str, with_keys: bool) -> int:
+        pos = skip(pos)
+        if text[pos] == close:
+            return pos + 1
+        index = 0
+        while True:
+            key: Union[str, int] = index
+            if with_keys:
+                pos = skip(pos)
+                if text[pos] != '"':
+                    raise _Truncated()
+                key, pos = scanstring(text, pos + 1)
+                pos = skip(pos)
+                if text[pos] != ":":
+                    raise _Truncated()
+                pos += 1
+            pos = skip(value(pos, path + (key,)))
+            if text[pos] == close:
+                return pos + 1
+            if text[pos] != ",":
+                raise _Truncated()
+            pos, index = pos + 1, index + 1
+
+    try:
+        value(0, ())
+    except (_Truncated, ValueError):
+        pass
+    return offsets
+
+
+def value_tokens(tokens: List[Any]) -> Dict[Path, Any]:
+    """
+    Logprob tokens of the scalar values of a JSON completion.
+
+    The text of the completion is decoded from the tokens themselves and
+    parsed, then the character offset of every value is mapped back to the
+    token holding its first character, however the keys and punctuation are
+    split into tokens. A completion cut short (e.g., by `max_tokens`) yields
+    the values generated before the cut.
+
+    Args:
+        tokens (List[Any]): The logprobs content of the completion.
+
+    Returns:
+        Dict[Path, Any]: The token of every value, keyed by its path in the
+        JSON document (e.g., `("sample_1", "score")` or `("verdicts", 0)`).
+    """
+    text = "".join(tok.token for tok in tokens)
+    ends, end = list(), 0
+    for tok in tokens:
+        end += len(tok.token)
+        ends.append(end)
+    result = dict()
+    idx = 0
+    offsets = sorted(_value_offsets(text).items(), key=lambda item: item[1])
+    for path, offset in offsets:
+        while ends[idx] <= offset:
+            idx += 1
+        result[path] = tokens[idx]
+    return result
+
+
+def token_value(token: Any) -> str:
+    """Text of a value token, without whitespace and quotes."""
+    return token.token.strip().strip('"')
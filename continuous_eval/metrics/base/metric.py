@@ -1,29 +1,75 @@
+import asyncio
+import base64
+import contextvars
 import inspect
 import logging
 import os
+import pickle
+import time
 from abc import ABC, ABCMeta
-from collections import defaultdict
-from concurrent.futures import (
-    ProcessPoolExecutor,
-    ThreadPoolExecutor,
-    as_completed,
-)
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import dataclass
+from itertools import islice
 from os import cpu_count
 from typing import (
     Any,
+    Awaitable,
     Callable,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Optional,
+    Sequence,
     Tuple,
+    Type,
     TypeVar,
     _GenericAlias,  # type: ignore
 )
+from weakref import WeakKeyDictionary
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, ConfigDict, field_serializer, field_validator
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+    wait_none,
+)
 from tqdm import tqdm
 
+from continuous_eval.execution import (
+    MetricNotLoaded,
+    get_executor,
+    metric_descriptor,
+    run_chunk,
+)
+from continuous_eval.metrics.base.aggregation import MetricAggregator
+from continuous_eval.metrics.base.concurrency import (
+    AdaptiveConcurrency,
+    AdaptiveGate,
+    is_overload,
+    is_transient,
+)
+from continuous_eval.metrics.base.fingerprint import (
+    fingerprint,
+    init_params,
+    sample_key,
+)
+from continuous_eval.metrics.base.instrumentation import (
+    ItemCallback,
+    ItemRecord,
+    MetricStats,
+    record_usage,
+    track_usage,
+)
+from continuous_eval.metrics.base.packing import Packing
+from continuous_eval.utils.columnar import is_table, table_columns
 from continuous_eval.utils.telemetry import telemetry
 from continuous_eval.utils.types import str_to_type_hint, type_hint_to_str
 
@@ -33,6 +79,74 @@ logger = logging.getLogger("Metric")
 logger.setLevel(logging.DEBUG)  # Set to lowest level to allow all messages
 
 _DISABLE_MULTIPROCESSING_ENV_VAR = "CONTINUOUS_EVAL_DISABLE_MULTIPROCESSING"
+_MAX_CONCURRENCY_ENV_VAR = "CONTINUOUS_EVAL_MAX_CONCURRENCY"
+_DEFAULT_MAX_CONCURRENCY = 64
+# Number of in-flight tasks (items or chunks) per worker when streaming
+_IN_FLIGHT_PER_WORKER = 2
+# Chunking of the per-sample arguments shipped to process-pool workers
+_CHUNKS_PER_WORKER = 4
+_MAX_CHUNK_SIZE = 64
+_RESULT_CACHE_FILENAME = "metric_cache.sqlite"
+
+# Whether the current thread / task is a sub-request of a sample
+_in_fan_out: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "in_fan_out", default=False
+)
+# Bound on the sub-requests in flight, per event loop (a semaphore each)
+_fan_out_gates: WeakKeyDictionary = WeakKeyDictionary()
+# Bound on the samples in flight shared by the metrics run concurrently in
+# the current task, see `shared_concurrency`
+_shared_gate: contextvars.ContextVar[Optional[asyncio.Semaphore]] = (
+    contextvars.ContextVar("shared_gate", default=None)
+)
+
+
+def _encode_result(result: Any) -> Dict[str, str]:
+    # Results are pickled rather than stored as JSON, which would turn
+    # tuples into lists and non-string keys (e.g., the categories of a
+    # `*_probabilities` output) into strings
+    return {"pickle": base64.b64encode(pickle.dumps(result)).decode("ascii")}
+
+
+def _decode_result(cached: Dict[str, Any]) -> Any:
+    return pickle.loads(base64.b64decode(cached["pickle"]))
+
+
+def _max_concurrency() -> int:
+    return int(os.getenv(_MAX_CONCURRENCY_ENV_VAR, _DEFAULT_MAX_CONCURRENCY))
+
+
+@contextmanager
+def shared_concurrency(max_concurrency: Optional[int] = None):
+    """
+    Share a single bound on the samples in flight between the `abatch` calls
+    made within the block (and the tasks it starts), on top of the bound of
+    every call. Used by `EvaluationRunner.aevaluate`.
+    """
+    token = _shared_gate.set(
+        asyncio.Semaphore(max_concurrency or _max_concurrency())
+    )
+    try:
+        yield
+    finally:
+        _shared_gate.reset(token)
+
+
+async def _consume(
+    fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any], workers: int
+) -> List[Any]:
+    # Apply `fn` to the items, results in input order. `workers` consumers
+    # pull from the same iterator, so that at most `workers` coroutines exist
+    # at a time and the items are only generated as they are consumed.
+    results: Dict[int, Any] = dict()
+    iterator = enumerate(items)
+
+    async def worker():
+        for idx, item in iterator:
+            results[idx] = await fn(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    return [results[idx] for idx in range(len(results))]
 
 
 class Arg(BaseModel):
@@ -93,6 +207,61 @@ class Field(BaseModel):
         return type_hint_to_str(type)
 
 
+ERROR_KEY = "__error__"
+
+
+def error_record(exc: BaseException, attempts: int) -> Dict[str, Any]:
+    """Result returned in place of a sample whose computation failed."""
+    return {
+        ERROR_KEY: {
+            "type": exc.__class__.__name__,
+            "message": str(exc),
+            "attempts": attempts,
+        }
+    }
+
+
+def is_error(result: Any) -> bool:
+    return isinstance(result, dict) and ERROR_KEY in result
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a failing sample is retried before being recorded as an error.
+
+    Args:
+        max_attempts (int): Total number of attempts (1 means no retry).
+        backoff (float): Initial wait in seconds, doubled after every attempt.
+        max_backoff (float): Upper bound on the wait between attempts.
+        retry_on (tuple): Exception types that trigger a retry, by default
+            only transient errors (rate limiting, timeouts, connection and
+            server errors, see `is_transient`). Use `(Exception,)` to retry
+            any failure.
+    """
+
+    max_attempts: int = 3
+    backoff: float = 1.0
+    max_backoff: float = 30.0
+    retry_on: Optional[Tuple[Type[BaseException], ...]] = None
+
+    def _tenacity_kwargs(self) -> Dict[str, Any]:
+        return dict(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=(
+                wait_exponential(multiplier=self.backoff, max=self.max_backoff)
+                if self.backoff > 0
+                else wait_none()
+            ),
+            retry=(
+                retry_if_exception(is_transient)
+                if self.retry_on is None
+                else retry_if_exception_type(self.retry_on)
+            ),
+            reraise=True,
+        )
+
+
 class MetricDecoratorMeta(ABCMeta, type):
     def __new__(cls, name, bases, dct):
         # Skip the Metric class itself
@@ -104,6 +273,12 @@ class MetricDecoratorMeta(ABCMeta, type):
                 )(method)
         return type.__new__(cls, name, bases, dct)
 
+    def __call__(cls, *args, **kwargs):
+        # Record the configuration of every metric (see `Metric.asdict`)
+        instance = super().__call__(*args, **kwargs)
+        instance._init_params = init_params(cls, args, kwargs)
+        return instance
+
 
 class Metric(ABC, metaclass=MetricDecoratorMeta):
     def __init__(
@@ -128,16 +303,130 @@ class Metric(ABC, metaclass=MetricDecoratorMeta):
                 # If the metric is IO-bound, use a larger number of workers
                 self.max_workers = min(32, self.max_workers * 5)
         self.show_progress = show_progress
+        # Deterministic failures would fail again, only transient IO errors
+        # are retried
+        self.retry_policy = RetryPolicy(max_attempts=3 if self.io_bound else 1)
+        # Instrumentation of the last (or current) batch
+        self.stats = MetricStats()
+        self.callbacks: List[ItemCallback] = list()
+        # Adaptive number of samples in flight (IO-bound metrics only), the
+        # fixed `max_workers` window is used when not set
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        # Opt-in cache of the results, see `with_result_cache`
+        self.result_cache = None
+        # Opt-in packing of several samples per request, see `with_packing`
+        self.packing: Optional[Packing] = None
 
     def use(self, **kwargs) -> "Metric":
         self._overloaded_params = kwargs
         return self
 
+    def with_retry_policy(self, retry_policy: RetryPolicy) -> "Metric":
+        self.retry_policy = retry_policy
+        return self
+
+    def with_adaptive_concurrency(
+        self, controller: Optional[AdaptiveConcurrency] = None
+    ) -> "Metric":
+        """
+        Let an AIMD controller pick the number of samples in flight instead of
+        the fixed `max_workers` window (IO-bound metrics only, opt-in). By
+        default the limit starts at `max_workers` and ranges up to
+        `CONTINUOUS_EVAL_MAX_CONCURRENCY` (64).
+        """
+        if controller is None:
+            max_limit = _max_concurrency()
+            controller = AdaptiveConcurrency(
+                initial=min(self.max_workers or 1, max_limit),
+                max_limit=max_limit,
+            )
+        self.concurrency = controller
+        return self
+
+    def with_result_cache(self, cache: Any = True) -> "Metric":
+        """
+        Cache the results of the metric across runs, keyed on the metric
+        configuration (see `fingerprint`) and the arguments of every sample.
+        Samples seen before, and duplicate samples within a batch, are then
+        computed only once. Failed samples are never cached. Results are
+        stored pickled, so cached ones are identical to computed ones; those
+        that can not be pickled are counted as `unstored` in the stats.
+
+        Args:
+            cache: A `ResponseCache`, the path of its SQLite database, or True
+                for the default one (in the user data directory). False or
+                None disables the cache.
+        """
+        if cache is None or cache is False:
+            self.result_cache = None
+            return self
+        from continuous_eval.llms.cache import ResponseCache, _default_path
+
+        if cache is True:
+            cache = _default_path(_RESULT_CACHE_FILENAME)
+        if not isinstance(cache, ResponseCache):
+            cache = ResponseCache(cache)
+        self.result_cache = cache
+        return self
+
+    def with_packing(self, packing: Optional[Packing] = None) -> "Metric":
+        """
+        Judge several samples in a single LLM request in `batch` and `abatch`
+        (metrics rendering one prompt per sample only). The samples of a pack
+        share the system prompt and their number is picked from the token
+        budget of `packing`. Samples whose response can not be read back from
+        the packed response are computed one by one.
+
+        Args:
+            packing (Packing, optional): Budget of a packed request, the
+                default one if not set.
+        """
+        if not self._packable():
+            raise ValueError(f"{self.name} does not support packing")
+        self.packing = packing or Packing()
+        return self
+
+    def fingerprint(self) -> str:
+        """Stable hash of the metric configuration."""
+        config = {
+            "class": f"{type(self).__module__}.{type(self).__qualname__}",
+            "metric": self.asdict(),
+            "overloaded_params": self._overloaded_params,
+        }
+        if self.packing is not None:
+            # Packed prompts differ from the per-sample ones
+            config["packing"] = self.packing
+        return fingerprint(config)
+
+    def add_callback(self, callback: ItemCallback) -> "Metric":
+        """
+        Register a callback invoked with `(metric_name, ItemRecord)` every
+        time a sample is computed, in the thread consuming the results.
+        """
+        self.callbacks.append(callback)
+        return self
+
+    def __getstate__(self):
+        # Instrumentation stays in the parent process: it would make every
+        # descriptor shipped to the workers different (see `metric_descriptor`)
+        state = self.__dict__.copy()
+        state.pop("stats", None)
+        state.pop("callbacks", None)
+        state.pop("result_cache", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.stats = MetricStats()
+        self.callbacks = list()
+        self.result_cache = None
+
     @property
     def overloaded_params(self):
         return self._overloaded_params
 
     def __call__(self, *args, **kwargs):
+        # Only counted in process, sent at the end of the next batch or at exit
         telemetry.log_event(
             name=self.name, info={"type": "metric", "batch": False}
         )
@@ -147,22 +436,314 @@ class Metric(ABC, metaclass=MetricDecoratorMeta):
         # Implement this method in the subclass
         raise NotImplementedError()
 
-    def _batch_sequential(
-        self, generate_items: Callable[[], Any], tot: int
-    ) -> Any:
-        return [
-            self.__call__(**kwargs)
-            for kwargs in tqdm(
-                generate_items(),
-                desc=self.name,
-                disable=not self.show_progress,
-                total=tot,
-            )
+    async def acompute(self, **kwargs):
+        # Default implementation: run the synchronous computation in a thread
+        # so that the event loop is never blocked. IO-bound metrics override
+        # this method with a native coroutine.
+        return await asyncio.to_thread(self.compute, **kwargs)
+
+    def _safe_call(self, **kwargs) -> Any:
+        # Compute a single sample, retrying according to the retry policy.
+        # A sample that keeps failing yields an error record instead of
+        # failing the whole batch.
+        return self._timed_call(time.time(), kwargs)[0]
+
+    def _timed_call(
+        self, submitted: float, kwargs: Dict[str, Any]
+    ) -> Tuple[Any, ItemRecord]:
+        # `_safe_call` with instrumentation. `submitted` is a wall-clock
+        # timestamp, comparable across the processes of a pool.
+        start, tic = time.time(), time.perf_counter()
+        attempts = throttled = 0
+        with track_usage() as usage:
+            try:
+                for attempt in Retrying(**self.retry_policy._tenacity_kwargs()):
+                    with attempt:
+                        attempts = attempt.retry_state.attempt_number
+                        try:
+                            result = self.compute(**kwargs)
+                        except Exception as e:
+                            throttled += is_overload(e)
+                            raise
+            except Exception as e:
+                logger.warning(
+                    f"{self.name} failed after {attempts} attempts: {e}"
+                )
+                result = error_record(e, attempts)
+        record = ItemRecord(
+            latency=time.perf_counter() - tic,
+            queue_wait=start - submitted,
+            attempts=attempts,
+            error=is_error(result),
+            throttled=throttled,
+            usage=usage,
+        )
+        return result, record
+
+    async def _asafe_call(self, call: Callable) -> Any:
+        return (await self._atimed_call(time.time(), call))[0]
+
+    async def _atimed_call(
+        self, submitted: float, call: Callable
+    ) -> Tuple[Any, ItemRecord]:
+        start, tic = time.time(), time.perf_counter()
+        attempts = throttled = 0
+        with track_usage() as usage:
+            try:
+                async for attempt in AsyncRetrying(
+                    **self.retry_policy._tenacity_kwargs()
+                ):
+                    with attempt:
+                        attempts = attempt.retry_state.attempt_number
+                        try:
+                            result = await call()
+                        except Exception as e:
+                            throttled += is_overload(e)
+                            raise
+            except Exception as e:
+                logger.warning(
+                    f"{self.name} failed after {attempts} attempts: {e}"
+                )
+                result = error_record(e, attempts)
+        record = ItemRecord(
+            latency=time.perf_counter() - tic,
+            queue_wait=start - submitted,
+            attempts=attempts,
+            error=is_error(result),
+            throttled=throttled,
+            usage=usage,
+        )
+        return result, record
+
+    def _fan_out(
+        self, fn: Callable[[Any], Any], items: Sequence[Any]
+    ) -> List[Any]:
+        """
+        Apply `fn` to the items concurrently, results in input order. Used by
+        metrics making several requests per sample (e.g., one per retrieved
+        chunk), so that a sample takes about one round trip.
+
+        Requests run on the shared "fan_out" pool, whose size is the global
+        concurrency limit (`CONTINUOUS_EVAL_MAX_CONCURRENCY`).
+        """
+        items = list(items)
+        if len(items) <= 1 or _in_fan_out.get():
+            return [fn(item) for item in items]
+
+        def run(item):
+            _in_fan_out.set(True)
+            # Each request counts its own usage, added to the sample by the
+            # caller: the requests run in parallel threads
+            with track_usage() as usage:
+                return fn(item), usage
+
+        executor = get_executor("fan_out", _max_concurrency())
+        futures = [
+            executor.submit(contextvars.copy_context().run, run, item)
+            for item in items
         ]
+        try:
+            results = list()
+            for future in futures:
+                result, usage = future.result()
+                record_usage(usage)
+                results.append(result)
+            return results
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def _afan_out(
+        self, fn: Callable[[Any], Any], items: Sequence[Any]
+    ) -> List[Any]:
+        """Asynchronous counterpart of `_fan_out`, `fn` being a coroutine."""
+        loop = asyncio.get_running_loop()
+        gate = _fan_out_gates.get(loop)
+        if gate is None:
+            gate = _fan_out_gates[loop] = asyncio.Semaphore(_max_concurrency())
+
+        async def run(item):
+            async with gate:
+                return await fn(item)
+
+        items = list(items)
+        return await _consume(run, items, min(len(items), _max_concurrency()))
+
+    def _stop_stats(self):
+        self.stats.stop()
+        if self.concurrency is not None:
+            self.stats.extra["concurrency"] = self.concurrency.summary()
 
-    def batch(self, **kwargs) -> Any:
+    def _record(self, idx: int, record: ItemRecord):
+        record.index = idx
+        self.stats.record(record)
+        if self.concurrency is not None:
+            self.concurrency.update(record)
+        for callback in self.callbacks:
+            try:
+                callback(self.name, record)
+            except Exception as e:
+                logger.warning(f"{self.name} callback failed: {e}")
+
+    def _packable(self) -> bool:
+        # Whether `_compute_pack` can judge several samples at once
+        return False
+
+    def _sample_tokens(self, kwargs: Dict[str, Any]) -> int:
+        # Estimated prompt tokens of a sample in a packed request
+        raise NotImplementedError()
+
+    def _pack_prefix_tokens(self) -> int:
+        # Estimated tokens shared by the samples of a packed request
+        return 0
+
+    def _compute_pack(self, kwargs: List[Dict[str, Any]]) -> List[Any]:
+        # Results of several samples from a single request, None for the
+        # samples that could not be read back from the response
+        raise NotImplementedError()
+
+    def _timed_pack(
+        self, submitted: float, pack: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[List[Tuple[int, Any, ItemRecord]], int]:
+        # `_timed_call` for a pack. Returns the rows of the samples and the
+        # number of samples computed one by one.
+        start, tic = time.time(), time.perf_counter()
+        attempts = throttled = 0
+        with track_usage() as usage:
+            try:
+                for attempt in Retrying(**self.retry_policy._tenacity_kwargs()):
+                    with attempt:
+                        attempts = attempt.retry_state.attempt_number
+                        try:
+                            packed = self._compute_pack([kw for _, kw in pack])
+                        except Exception as e:
+                            throttled += is_overload(e)
+                            raise
+            except Exception as e:
+                logger.warning(
+                    f"{self.name} packed request failed after {attempts} "
+                    f"attempts ({e}), computing sample by sample"
+                )
+                packed = [None] * len(pack)
+        latency = time.perf_counter() - tic
+        num_scored = sum(result is not None for result in packed)
+        # The usage of the request is shared by its samples
+        shares = iter(usage.split(num_scored) if num_scored else [])
+        rows = list()
+        for (idx, kw), result in zip(pack, packed):
+            if result is None:
+                rows.append((idx, *self._timed_call(time.time(), kw)))
+                continue
+            record = ItemRecord(
+                latency=latency,
+                queue_wait=start - submitted,
+                attempts=attempts,
+                error=False,
+                throttled=throttled,
+                usage=next(shares),
+            )
+            rows.append((idx, result, record))
+        if num_scored == 0:
+            # Unreadable packed response: still paid for
+            rows[0][2].usage.add(usage)
+        return rows, len(pack) - num_scored
+
+    def _batch_packed(self, kwargs: Dict[str, Any]) -> List[Any]:
+        # Packs are built lazily, in input order, and sent concurrently
+        generate_items, tot = self._items(kwargs)
+        packs = self.packing.split(  # type: ignore
+            enumerate(generate_items()),
+            self._sample_tokens,
+            self._pack_prefix_tokens(),
+        )
+        workers = self.max_workers or 1
+        executor = get_executor("thread", workers)
+        results: List[Any] = [None] * tot
+        in_flight = dict()
+        num_packs = fallbacks = 0
+        self.stats = MetricStats().start()
+        pbar = tqdm(total=tot, desc=self.name, disable=not self.show_progress)
+
+        def fill():
+            nonlocal num_packs
+            while len(in_flight) < workers:
+                pack = next(packs, None)
+                if pack is None:
+                    break
+                future = executor.submit(self._timed_pack, time.time(), pack)
+                in_flight[future] = pack
+                num_packs += 1
+
+        try:
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.pop(future)
+                    rows, num_fallbacks = future.result()
+                    fallbacks += num_fallbacks
+                    for idx, result, record in rows:
+                        results[idx] = result
+                        self._record(idx, record)
+                        pbar.update(1)
+                fill()
+            return results
+        finally:
+            for future in in_flight:
+                future.cancel()
+            self.stats.extra["packing"] = {
+                "packs": num_packs,
+                "samples_per_pack": tot / num_packs if num_packs else None,
+                "fallbacks": fallbacks,
+            }
+            self._stop_stats()
+            pbar.close()
+
+    def compute_columns(self, **kwargs) -> List[Any]:
+        # Optional vectorized kernel: receives whole argument columns (lists
+        # or NumPy arrays) and returns the list of per-sample results.
+        raise NotImplementedError()
+
+    def _specializes(self, method: str) -> bool:
+        # Whether the most derived override of `method` is at least as
+        # specific as the most derived `compute` (and is not the default).
+        for cls in type(self).__mro__:
+            if method in cls.__dict__:
+                return cls is not Metric
+            if "compute" in cls.__dict__:
+                return False
+        return False
+
+    def _native_async(self) -> bool:
+        return self._specializes("acompute")
+
+    def _arg_names(self) -> set:
         signature = inspect.signature(self.compute)
-        arg_names = set(signature.parameters.keys()) - {"kwargs"}
+        return set(signature.parameters.keys()) - {"kwargs"}
+
+    def _columns(
+        self,
+        table: Any,
+        column_mapping: Optional[Dict[str, str]],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        # Merge the columns of a DataFrame / Arrow table with explicit kwargs
+        if table is None:
+            return kwargs
+        if not is_table(table):
+            raise ValueError(
+                "Expected a pandas DataFrame or a pyarrow Table, "
+                f"got {type(table).__name__}"
+            )
+        return {
+            **table_columns(table, self._arg_names(), column_mapping),
+            **kwargs,
+        }
+
+    def _items(self, kwargs: Dict[str, Any]) -> Tuple[Callable, int]:
+        # Metrics whose `compute` only takes **kwargs (e.g., custom metrics)
+        # receive every given argument
+        arg_names = self._arg_names() or set(kwargs)
         tot = len(next(iter(kwargs.values())))
 
         def generate_items():
@@ -170,52 +751,415 @@ class Metric(ABC, metaclass=MetricDecoratorMeta):
                 kw = {key: kwargs[key][idx] for key in arg_names}
                 yield kw
 
-        if self.max_workers is None or self.max_workers == 1:
-            return self._batch_sequential(generate_items, tot)
-        process_pool = (
-            ThreadPoolExecutor if self.io_bound else ProcessPoolExecutor
+        return generate_items, tot
+
+    def stream(
+        self,
+        table: Any = None,
+        /,
+        column_mapping: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Compute the metric over the batch, yielding `(index, result)` pairs as
+        soon as each item is done (i.e., in completion order).
+
+        At most `_IN_FLIGHT_PER_WORKER * max_workers` tasks are submitted to
+        the executor at any time, so per-item arguments are materialized
+        lazily and memory stays bounded regardless of the dataset size.
+
+        The arguments can be given as lists (one keyword per argument) and/or
+        as a pandas DataFrame or pyarrow Table, whose columns are matched to
+        the arguments by name or through `column_mapping`.
+        """
+        kwargs = self._columns(table, column_mapping, kwargs)
+        generate_items, tot = self._items(kwargs)
+        self.stats = MetricStats().start()
+        pbar = tqdm(total=tot, desc=self.name, disable=not self.show_progress)
+        try:
+            if self.max_workers is None or self.max_workers == 1:
+                stream = (
+                    (idx, *self._timed_call(time.time(), item))
+                    for idx, item in enumerate(generate_items())
+                )
+            elif self.io_bound:
+                stream = self._stream_threads(generate_items)
+            else:
+                stream = self._stream_processes(generate_items, tot)
+            for idx, result, record in stream:
+                self._record(idx, record)
+                yield idx, result
+                pbar.update(1)
+        finally:
+            self._stop_stats()
+            pbar.close()
+
+    def _stream_threads(
+        self, generate_items: Callable
+    ) -> Iterator[Tuple[int, Any, ItemRecord]]:
+        controller = self.concurrency
+        if controller is not None:
+            # The window follows the controller, which is updated (in this
+            # thread) as results are consumed
+            executor = get_executor("thread", controller.max_limit)
+
+            def window():
+                return max(1, controller.limit)
+        else:
+            executor = get_executor("thread", self.max_workers)  # type: ignore
+
+            def window():
+                return _IN_FLIGHT_PER_WORKER * self.max_workers  # type: ignore
+
+        items = enumerate(generate_items())
+        in_flight = dict()
+
+        def fill():
+            while len(in_flight) < window():
+                item = next(items, None)
+                if item is None:
+                    break
+                idx, kwargs = item
+                future = executor.submit(self._timed_call, time.time(), kwargs)
+                in_flight[future] = idx
+
+        try:
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), *future.result()
+                fill()
+        finally:
+            # The executor is shared: only drop the work of this batch
+            for future in in_flight:
+                future.cancel()
+
+    def _stream_processes(
+        self, generate_items: Callable, tot: int
+    ) -> Iterator[Tuple[int, Any, ItemRecord]]:
+        # The metric is serialized once, workers rebuild and cache it and then
+        # only receive chunks of per-sample arguments (see `run_chunk`).
+        workers: int = self.max_workers  # type: ignore
+        window = _IN_FLIGHT_PER_WORKER * workers
+        chunk_size = max(
+            1, min(_MAX_CHUNK_SIZE, tot // (workers * _CHUNKS_PER_WORKER))
         )
+        key, payload = metric_descriptor(self)
+        items = enumerate(generate_items())
+        executor = get_executor("process", workers)
+        in_flight = dict()
+        num_submitted = 0
+
+        def submit(chunk, with_payload):
+            future = executor.submit(
+                run_chunk,
+                key,
+                payload if with_payload else None,
+                chunk,
+                time.time(),
+            )
+            in_flight[future] = chunk
+
+        def fill():
+            nonlocal num_submitted
+            while len(in_flight) < window:
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    break
+                # The first round of chunks warms up every worker
+                submit(chunk, with_payload=num_submitted < window)
+                num_submitted += 1
+
         try:
-            with process_pool(max_workers=self.max_workers) as executor:
-                futures = [
-                    executor.submit(self.__call__, **item)
-                    for item in generate_items()
-                ]
-            results = [
-                future.result()
-                for future in tqdm(
-                    as_completed(futures),
-                    total=tot,
-                    desc=self.name,
-                    disable=not self.show_progress,
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        results = future.result()
+                    except MetricNotLoaded:
+                        submit(chunk, with_payload=True)
+                        continue
+                    yield from results
+                fill()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def batch(
+        self,
+        table: Any = None,
+        /,
+        column_mapping: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Compute the metric over the batch, results are in input order.
+
+        Samples that keep failing after the retry policy is exhausted are
+        returned as error records (see `failed_indices` and `rerun_failed`),
+        while the rest of the batch completes in parallel.
+
+        Metrics implementing a vectorized kernel (`compute_columns`) receive
+        the whole argument columns at once.
+        """
+        kwargs = self._columns(table, column_mapping, kwargs)
+        if self.result_cache is None:
+            return self._batch(kwargs)
+        keys, results, todo = self._cache_lookup(kwargs)
+        self.stats = MetricStats().start()
+        computed = self._batch(self._subset(kwargs, todo)) if todo else []
+        if not todo:
+            self._stop_stats()
+        return self._cache_store(keys, results, todo, computed)
+
+    def _batch(self, kwargs: Dict[str, Any]) -> List[Any]:
+        if self.packing is not None:
+            return self._batch_packed(kwargs)
+        if self._specializes("compute_columns"):
+            self.stats = MetricStats().start()
+            try:
+                results = self.compute_columns(
+                    **{
+                        key: kwargs[key]
+                        for key in self._arg_names()
+                        if key in kwargs
+                    }
                 )
-            ]
+                self.stats.record_batch(len(results))
+                self._stop_stats()
+                return results
+            except Exception as e:
+                logger.warning(
+                    f"{self.name} vectorized kernel failed ({e}), "
+                    "computing sample by sample"
+                )
+        generate_items, tot = self._items(kwargs)
+        results = [None] * tot
+        try:
+            for idx, result in self.stream(**kwargs):
+                results[idx] = result
             return results
         except Exception as e:
+            # Only infrastructure failures (e.g., unpicklable metric or broken
+            # process pool) get here, sample failures are isolated
             logger.warning(f"Processing failed with error: {str(e)}")
             logger.warning("Falling back to sequential processing")
-            return self._batch_sequential(generate_items, tot)
+            self.stats = MetricStats().start()
+            for idx, item in enumerate(
+                tqdm(
+                    generate_items(),
+                    desc=self.name,
+                    disable=not self.show_progress,
+                    total=tot,
+                )
+            ):
+                results[idx], record = self._timed_call(time.time(), item)
+                self._record(idx, record)
+            self._stop_stats()
+            return results
 
-    def aggregate(self, results: List[Any]) -> Any:
-        # Default implementation
-        def sanitize(results: List[Any]) -> List[Any]:
-            return [
-                {k: v for k, v in r.items() if not isinstance(v, (list, str))}
-                for r in results
-            ]
-
-        sanitized_results = sanitize(results)
-        sums = defaultdict(float)
-        counts = defaultdict(int)
-        for result in sanitized_results:
-            for key, value in result.items():
-                if isinstance(value, (int, float)):
-                    sums[key] += value
-                    counts[key] += 1
-        means = {
-            key: sums[key] / counts[key] for key in sums if counts[key] > 0
+    def _subset(
+        self, kwargs: Dict[str, Any], indices: List[int]
+    ) -> Dict[str, Any]:
+        return {
+            key: [kwargs[key][idx] for idx in indices]
+            for key in self._arg_names() or kwargs
+            if key in kwargs
+        }
+
+    def _cache_lookup(
+        self, kwargs: Dict[str, Any]
+    ) -> Tuple[List[str], List[Any], List[int]]:
+        # Key every sample and look up the first occurrence of each one in
+        # the result cache. Returns the keys, the results found so far and the
+        # indices of the samples left to compute.
+        generate_items, tot = self._items(kwargs)
+        metric_fingerprint = self.fingerprint()
+        keys = [sample_key(metric_fingerprint, kw) for kw in generate_items()]
+        results: List[Any] = [None] * tot
+        todo = list()
+        seen = set()
+        for idx, key in enumerate(keys):
+            if key in seen:
+                continue
+            seen.add(key)
+            cached = self.result_cache.get(key)  # type: ignore
+            # Entries of an older format are computed (and stored) again
+            if not isinstance(cached, dict) or "pickle" not in cached:
+                todo.append(idx)
+                continue
+            try:
+                results[idx] = _decode_result(cached)
+            except Exception as e:
+                logger.warning(f"{self.name} unreadable cached result: {e}")
+                todo.append(idx)
+        return keys, results, todo
+
+    def _cache_store(
+        self,
+        keys: List[str],
+        results: List[Any],
+        todo: List[int],
+        computed: List[Any],
+    ) -> List[Any]:
+        unstored = 0
+        for idx, result in zip(todo, computed):
+            results[idx] = result
+            if is_error(result):
+                continue
+            try:
+                self.result_cache.set(keys[idx], _encode_result(result))  # type: ignore
+            except Exception as e:
+                # Computed again next time
+                logger.warning(f"{self.name} result not cached: {e}")
+                unstored += 1
+        # Duplicate samples get a copy of the result of their first occurrence
+        first: Dict[str, int] = dict()
+        duplicates = 0
+        for idx, key in enumerate(keys):
+            if key in first:
+                results[idx] = deepcopy(results[first[key]])
+                duplicates += 1
+            else:
+                first[key] = idx
+        self.stats.extra["result_cache"] = {
+            "hits": len(first) - len(todo),
+            "misses": len(todo),
+            "duplicates": duplicates,
+            "unstored": unstored,
         }
-        return means
+        return results
+
+    @staticmethod
+    def failed_indices(results: Sequence[Any]) -> List[int]:
+        """Indices of the samples whose computation failed."""
+        return [idx for idx, result in enumerate(results) if is_error(result)]
+
+    def rerun_failed(
+        self,
+        results: List[Any],
+        table: Any = None,
+        /,
+        column_mapping: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> List[Any]:
+        """
+        Recompute only the failed samples of a previous `batch` call.
+
+        Args:
+            results (List[Any]): The output of a previous `batch` call.
+            table, column_mapping, **kwargs: The same inputs given to `batch`
+                (a DataFrame or Arrow table and/or argument columns).
+
+        Returns:
+            List[Any]: A copy of `results` with the failed samples recomputed.
+        """
+        failed = self.failed_indices(results)
+        results = list(results)
+        if not failed:
+            return results
+        kwargs = self._columns(table, column_mapping, kwargs)
+        subset = self._subset(kwargs, failed)
+        for idx, result in zip(failed, self.batch(**subset)):
+            results[idx] = result
+        return results
+
+    async def abatch(
+        self,
+        table: Any = None,
+        /,
+        max_concurrency: Optional[int] = None,
+        column_mapping: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> List[Any]:
+        """
+        Asynchronous counterpart of `batch`.
+
+        The items are computed by `max_concurrency` workers (defaults to the
+        `CONTINUOUS_EVAL_MAX_CONCURRENCY` environment variable, or 64) pulling
+        them in order, so that the number in flight is bounded. Within
+        `shared_concurrency`, the bound is also shared with the other metrics.
+        Results are returned in input order.
+        """
+        kwargs = self._columns(table, column_mapping, kwargs)
+        if self.result_cache is None:
+            return await self._abatch(kwargs, max_concurrency)
+        keys, results, todo = self._cache_lookup(kwargs)
+        self.stats = MetricStats().start()
+        computed = (
+            await self._abatch(self._subset(kwargs, todo), max_concurrency)
+            if todo
+            else []
+        )
+        if not todo:
+            self._stop_stats()
+        return self._cache_store(keys, results, todo, computed)
+
+    async def _abatch(
+        self, kwargs: Dict[str, Any], max_concurrency: Optional[int]
+    ) -> List[Any]:
+        if not self.io_bound or self.packing is not None:
+            # CPU-bound metrics keep using the process pool, and packed
+            # requests their thread pool, off the loop
+            return await asyncio.to_thread(self._batch, kwargs)
+        generate_items, tot = self._items(kwargs)
+        if max_concurrency is None and self.concurrency is not None:
+            # No explicit bound: let the controller find the right one
+            gate = AdaptiveGate(self.concurrency)
+            max_concurrency = self.concurrency.max_limit
+        else:
+            max_concurrency = max_concurrency or _max_concurrency()
+            gate = asyncio.Semaphore(max_concurrency)
+        shared = _shared_gate.get()
+        native = self._native_async()
+        loop = asyncio.get_running_loop()
+        executor = None if native else get_executor("thread", max_concurrency)
+        self.stats = MetricStats().start()
+        pbar = tqdm(total=tot, desc=self.name, disable=not self.show_progress)
+
+        async def call(submitted: float, kw: Dict[str, Any]):
+            if native:
+                return await self._atimed_call(
+                    submitted, lambda: self.acompute(**kw)
+                )
+            return await loop.run_in_executor(
+                executor, self._timed_call, submitted, kw
+            )
+
+        async def run(item: Tuple[int, Dict[str, Any]]):
+            idx, kw = item
+            submitted = time.time()
+            async with gate:
+                if shared is None:
+                    res, record = await call(submitted, kw)
+                else:
+                    async with shared:
+                        res, record = await call(submitted, kw)
+            self._record(idx, record)
+            pbar.update(1)
+            return res
+
+        try:
+            return await _consume(
+                run, enumerate(generate_items()), min(tot, max_concurrency)
+            )
+        finally:
+            self._stop_stats()
+            pbar.close()
+
+    def aggregator(self) -> MetricAggregator:
+        """
+        Streaming aggregator of the metric results: it can be updated as
+        results arrive (e.g., from `stream`) and merged across shards.
+        """
+        return MetricAggregator()
+
+    def aggregate(self, results: List[Any]) -> Any:
+        # Default implementation: mean of every numeric field
+        return self.aggregator().update(results).means()
 
     @property
     def name(self):
@@ -252,4 +1196,5 @@ class Metric(ABC, metaclass=MetricDecoratorMeta):
         return {
             "__class__": self.__class__.__name__,
             "name": self.name,
+            "params": getattr(self, "_init_params", None),
         }
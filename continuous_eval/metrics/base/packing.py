@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Appended to the system prompt of a packed request
+PACKED_INSTRUCTIONS = """
+
+-- SEVERAL SAMPLES --
+You will be given several samples, each one introduced by its key (e.g., ### sample_1). Evaluate every sample independently of the others, exactly as you would if it were the only one. Respond with a single JSON object with one entry per sample: the key of the sample mapped to the response you would give for that sample alone."""
+
+
+@dataclass(frozen=True)
+class Packing:
+    """
+    How samples are packed into a single LLM request (see
+    `Metric.with_packing`).
+
+    Args:
+        token_budget (int): Upper bound on the estimated tokens of a packed
+            request: the shared system prompt, the samples and their expected
+            responses.
+        max_samples (int): Upper bound on the number of samples per request.
+        completion_tokens (int): Expected response tokens per sample.
+    """
+
+    token_budget: int = 8000
+    max_samples: int = 16
+    completion_tokens: int = 200
+
+    def split(
+        self,
+        items: Iterable[Tuple[int, Dict[str, Any]]],
+        cost: Callable[[Dict[str, Any]], int],
+        prefix: int = 0,
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Group `(index, kwargs)` items, in order, into packs fitting the budget.
+
+        `cost` estimates the prompt tokens of a sample and `prefix` those of
+        the shared system prompt. A sample too large for the budget on its own
+        still gets a pack.
+        """
+        pack: List[Tuple[int, Dict[str, Any]]] = list()
+        used = prefix
+        for item in items:
+            tokens = cost(item[1]) + self.completion_tokens
+            if pack and (
+                len(pack) >= self.max_samples
+                or used + tokens > self.token_budget
+            ):
+                yield pack
+                pack, used = list(), prefix
+            pack.append(item)
+            used += tokens
+        if pack:
+            yield pack
+
+
+def pack_keys(num_samples: int) -> List[str]:
+    return [f"sample_{i + 1}" for i in range(num_samples)]
+
+
+def packed_prompt(prompts: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Single prompt evaluating several samples, from their rendered prompts.
+    The system prompt is shared, the user prompts follow their keys.
+    """
+    user_prompt = "\n\n".join(
+        f"### {key}\n{prompt['user_prompt']}"
+        for key, prompt in zip(pack_keys(len(prompts)), prompts)
+    )
+    return {
+        "system_prompt": prompts[0]["system_prompt"] + PACKED_INSTRUCTIONS,
+        "user_prompt": user_prompt,
+    }
@@ -1,14 +1,31 @@
+import inspect
 import json
+import logging
 import os
+import threading
+import time
 from dataclasses import dataclass
 from functools import cached_property
-from typing import Any, Dict, Generic, TypeVar
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 
 import numpy as np
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion
 from pydantic import BaseModel, ConfigDict
 
 from continuous_eval.metrics.base import Field as MetricField
+from continuous_eval.llms.base import LoopClients, report_usage
+from continuous_eval.llms.cache import cache_key, response_cache
+from continuous_eval.llms.rate_limit import estimate_tokens, rate_limits
+from continuous_eval.llms.single_flight import flight_key, single_flight
+from continuous_eval.llms.openai import usage_counts
+from continuous_eval.metrics.base.fingerprint import fingerprint
+from continuous_eval.metrics.base.logprobs import token_value, value_tokens
+from continuous_eval.metrics.base.packing import (
+    PACKED_INSTRUCTIONS,
+    pack_keys,
+    packed_prompt,
+)
 from continuous_eval.metrics.base.prompt import MetricPrompt
 from continuous_eval.utils.telemetry import telemetry
 from continuous_eval.metrics.base.metric import Metric
@@ -17,6 +34,14 @@ DEFAULT_MODEL = os.getenv(
     "DEFAULT_PROBABILISTIC_METRIC_MODEL", "openai:gpt-4o-mini"
 )
 
+logger = logging.getLogger("ProbabilisticMetric")
+
+# Room for `{"score":"<category>"` and the closing tokens in fast mode
+FAST_MODE_MAX_TOKENS = 8
+
+# Guards the escalation counters, updated from the worker threads
+_ESCALATION_LOCK = threading.Lock()
+
 T = TypeVar("T")
 
 
@@ -27,6 +52,22 @@ class Evaluation(BaseModel, Generic[T]):
     score: T
 
 
+@dataclass(frozen=True)
+class Escalation:
+    """
+    Judgments re-scored by a stronger model (see
+    `ProbabilisticMetric.with_escalation`).
+
+    Args:
+        model (str): The model re-scoring the judgments (e.g., "gpt-4o").
+        threshold (float): Judgments whose most likely category has a lower
+            probability are re-scored.
+    """
+
+    model: str
+    threshold: float = 0.8
+
+
 @dataclass
 class Score:
     probabilities: dict[Any, float]
@@ -45,29 +86,54 @@ class Score:
         return self.probabilities[self.score]
 
 
-"""
-ProbabilisticMetric is a class that implement a probabilistic scoring mechanism.
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
 
-This metric utilizes a prompt to generate responses from a probabilistic model, evaluates the responses based on
-the provided scoring criteria, and computes scores along with their associated probabilities. The class is designed
-to work with various probabilistic models and allows for customization through parameters such as temperature and model type.
 
-Attention: each class in the scoring function must be a single token.
-"""
+def _json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
 
 
 class ProbabilisticMetric(Metric):
+    """
+    Probabilistic scoring: the metric prompts a model with the scoring
+    criteria and reads the probability of every category from the top
+    logprobs of the score token, the score being the most likely one.
+
+    Attention: each class in the scoring function must be a single token.
+
+    In fast mode the score is generated first, its category distribution is
+    read from the top logprobs of the score token and the generation is
+    capped right after it, so no reasoning is produced (unless
+    `fast_reasoning` is set, in which case the reasoning follows the score
+    and the generation is not capped).
+    """
+
     def __init__(
         self,
         name: str,
         prompt: MetricPrompt,
         temperature: float = 1.0,
         model: str = DEFAULT_MODEL,
+        fast: bool = False,
+        fast_reasoning: bool = False,
     ):
         super().__init__()
         self._name = name
         self.prompt = prompt
+        # Opt-in model cascade, see `with_escalation`
+        self.escalation: Optional[Escalation] = None
         self.temperature = temperature
+        self.fast = fast
+        self.fast_reasoning = fast_reasoning
         self.provider = model.split(":")[0]
         self.model = model.split(":")[1]
         if self.provider != "openai":
@@ -75,6 +141,8 @@ class ProbabilisticMetric(Metric):
                 f"At the moment, only OpenAI is supported for probabilistic metrics. Got {self.provider}."
             )
         self._client = OpenAI()
+        self._aclients = LoopClients(AsyncOpenAI)
+        self._aclient_override: Optional[Any] = None
 
         score_type = (
             self.prompt.response_format
@@ -86,12 +154,57 @@ class ProbabilisticMetric(Metric):
         )
         self._validate()
 
+    @property
+    def _aclient(self):
+        # The async client of the running event loop, unless one was assigned
+        if self._aclient_override is not None:
+            return self._aclient_override
+        return self._aclients.get()
+
+    @_aclient.setter
+    def _aclient(self, client):
+        self._aclient_override = client
+
+    def with_escalation(
+        self, model: str, threshold: float = 0.8
+    ) -> "ProbabilisticMetric":
+        """
+        Re-score with a stronger model the judgments the metric's model is
+        unsure about: those whose most likely category has a probability
+        below `threshold`. The score of the stronger model is kept.
+
+        The run stats report the escalation rate and, on the escalated
+        judgments, the agreement of the two models on the most likely
+        category.
+
+        Args:
+            model (str): The stronger model, e.g. "openai:gpt-4o".
+            threshold (float): Probability of the most likely category below
+                which a judgment is escalated.
+        """
+        provider, _, name = model.rpartition(":")
+        if provider and provider != self.provider:
+            raise ValueError(
+                f"Escalation must use the provider of the metric "
+                f"({self.provider}), got {provider}"
+            )
+        self.escalation = Escalation(model=name, threshold=threshold)
+        return self
+
+    def fingerprint(self) -> str:
+        if self.escalation is None:
+            return super().fingerprint()
+        # Escalated judgments come from another model
+        return fingerprint([super().fingerprint(), self.escalation])
+
     def serialize(self):
         return {
             "name": self.name,
             "prompt": self.prompt.serialize(),
             "temperature": self.temperature,
             "model": self.model,
+            "fast": self.fast,
+            "fast_reasoning": self.fast_reasoning,
         }
 
     @classmethod
@@ -101,7 +214,12 @@ class ProbabilisticMetric(Metric):
         temperature = data["temperature"]
         model = data["model"]
         return cls(
-            name=name, prompt=prompt, temperature=temperature, model=model
+            name=name,
+            prompt=prompt,
+            temperature=temperature,
+            model=model,
+            fast=data.get("fast", False),
+            fast_reasoning=data.get("fast_reasoning", False),
         )
 
     @property
@@ -129,9 +247,9 @@ class ProbabilisticMetric(Metric):
         return self.prompt.args
 
     def _validate(self):
-        assert (
-            len(self.prompt.get_identifiers()) > 0
-        ), "User prompt must have at least one identifier"
+        assert len(self.prompt.get_identifiers()) > 0, (
+            "User prompt must have at least one identifier"
+        )
         assert self.temperature >= 0, "Temperature must be non-negative"
         assert self.model, "Model must be specified"
         assert "gpt" in self.model, "Model must be a GPT model"
@@ -142,18 +260,9 @@ class ProbabilisticMetric(Metric):
                 return i
         return None
 
-    def _process(self, **kwargs) -> Score:
-        # Init categories
-        category_map = {
-            str(cat): cat
-            for cat in self.prompt.response_format.values()  # type: ignore
-        }  # type: ignore
-        logprobs = {
-            str(cat): -float("inf")
-            for cat in self.prompt.response_format.values()  # type: ignore
-        }  # type: ignore
+    def _request(self, **kwargs) -> Dict[str, Any]:
         msgs = self.prompt.render(**kwargs)
-        model_response = self._client.beta.chat.completions.parse(
+        request = dict(
             model=self.model,
             messages=[
                 {"role": "system", "content": msgs["system_prompt"]},
@@ -161,37 +270,383 @@ class ProbabilisticMetric(Metric):
             ],
             temperature=self.temperature,
             logprobs=True,
-            top_logprobs=len(logprobs),
+            top_logprobs=len(self.prompt.response_format.values()),  # type: ignore
             response_format=self._response_format_type,
         )
-        message = json.loads(model_response.choices[0].message.content)  # type: ignore
-        tok_idx = self._find_token_index(
-            model_response.choices[0].logprobs.content,  # type: ignore
-            str(message.get("score", "")),
-        )  # type: ignore
-        top_logprobs = (
-            model_response.choices[0].logprobs.content[tok_idx].top_logprobs  # type: ignore
-        )  # type: ignore
+        if self.fast:
+            request["response_format"] = self._score_first_format()
+            if not self.fast_reasoning:
+                request["max_tokens"] = FAST_MODE_MAX_TOKENS
+        return request
+
+    def _evaluation_schema(self) -> Dict[str, Any]:
+        # Strict JSON schema of an evaluation. In fast mode the score is the
+        # first property, so that the score token is generated right away.
+        values = list(self.prompt.response_format.values())  # type: ignore
+        score = {
+            "type": (
+                "integer"
+                if all(isinstance(v, int) for v in values)
+                else "string"
+            ),
+            "enum": values,
+        }
+        if not self.fast:
+            properties = {"reasoning": {"type": "string"}, "score": score}
+        elif self.fast_reasoning:
+            properties = {"score": score, "reasoning": {"type": "string"}}
+        else:
+            properties = {"score": score}
+        return _strict_object(properties)
+
+    def _score_first_format(self) -> Dict[str, Any]:
+        return _json_schema_format("Evaluation", self._evaluation_schema())
+
+    def _packed_format(self, num_samples: int) -> Dict[str, Any]:
+        evaluation = self._evaluation_schema()
+        return _json_schema_format(
+            "Evaluations",
+            _strict_object({key: evaluation for key in pack_keys(num_samples)}),
+        )
+
+    def _probabilities(self, top_logprobs) -> Dict[Any, float]:
+        # Probabilities of the categories at a token, from its top logprobs
+        category_map = {
+            str(cat): cat
+            for cat in self.prompt.response_format.values()  # type: ignore
+        }  # type: ignore
+        logprobs = {
+            str(cat): -float("inf")
+            for cat in self.prompt.response_format.values()  # type: ignore
+        }  # type: ignore
         for logprob in top_logprobs:
             token = logprob.token.strip()
             if token in logprobs:
                 logprobs[token] = max(logprobs[token], logprob.logprob)
         probs = {cat: np.exp(lp) for cat, lp in logprobs.items()}
         total_prob = sum(probs.values())
-        normalized_probs = {
+        return {
             category_map[cat]: (prob / total_prob).item()
             for cat, prob in probs.items()
         }
+
+    def _score(self, model_response) -> Score:
+        message = json.loads(model_response.choices[0].message.content)  # type: ignore
+        tok_idx = self._find_token_index(
+            model_response.choices[0].logprobs.content,  # type: ignore
+            str(message.get("score", "")),
+        )  # type: ignore
+        top_logprobs = (
+            model_response.choices[0].logprobs.content[tok_idx].top_logprobs  # type: ignore
+        )  # type: ignore
         return Score(
-            probabilities=normalized_probs,
+            probabilities=self._probabilities(top_logprobs),
             reasoning=message.get("reasoning", ""),
         )
 
-    def compute(self, **kwargs):
-        telemetry.log_event(name="ProbabilisticMetric", info={"internal": True})
-        score = self._process(**kwargs)
+    def _fast_score(self, model_response) -> Score:
+        # The content may be cut right after the score: the score token is
+        # the token of the "score" value in the decoded text
+        tokens = model_response.choices[0].logprobs.content  # type: ignore
+        categories = {
+            str(cat)
+            for cat in self.prompt.response_format.values()  # type: ignore
+        }
+        score_token = value_tokens(tokens).get(("score",))
+        if score_token is None or token_value(score_token) not in categories:
+            # Not valid JSON up to the score: the first category token
+            score_token = next(
+                (tok for tok in tokens if token_value(tok) in categories),
+                None,
+            )
+            if score_token is None:
+                raise ValueError("Score token not found in the model response")
+            logger.warning(
+                f"{self.name}: score value not found in the response, read "
+                "at its first category token"
+            )
+        reasoning = ""
+        if self.fast_reasoning:
+            try:
+                message = json.loads(model_response.choices[0].message.content)  # type: ignore
+                reasoning = message.get("reasoning", "")
+            except (TypeError, ValueError):
+                pass
+        return Score(
+            probabilities=self._probabilities(score_token.top_logprobs),
+            reasoning=reasoning,
+        )
+
+    def _prompt_args(self, **kwargs) -> Dict[str, Any]:
+        # Arguments of the prompt of a sample, from the arguments of `compute`
+        return kwargs
+
+    def _format(self, result: Dict[str, Any]) -> Any:
+        # Output of `compute`, from the result of the prompt
+        return result
+
+    def _sample_args(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        params = inspect.signature(self._prompt_args).parameters
+        if not any(p.kind is p.VAR_KEYWORD for p in params.values()):
+            kwargs = {k: v for k, v in kwargs.items() if k in params}
+        return self._prompt_args(**kwargs)
+
+    def _sample_prompt(self, kwargs: Dict[str, Any]) -> Dict[str, str]:
+        return self.prompt.render(**self._sample_args(kwargs))
+
+    def _packable(self) -> bool:
+        # Metrics judging a sample with a single prompt (see `_prompt_args`)
+        return self._specializes("_prompt_args")
+
+    def _sample_tokens(self, kwargs: Dict[str, Any]) -> int:
+        return estimate_tokens(
+            self._sample_prompt(kwargs)["user_prompt"], self.model
+        )
+
+    def _pack_prefix_tokens(self) -> int:
+        return estimate_tokens(
+            self.prompt.system_prompt() + PACKED_INSTRUCTIONS, self.model
+        )
+
+    def _compute_pack(self, kwargs: List[Dict[str, Any]]) -> List[Any]:
+        prompts = [self._sample_prompt(kw) for kw in kwargs]
+        if len(prompts) == 1 or any(
+            p["system_prompt"] != prompts[0]["system_prompt"] for p in prompts
+        ):
+            return [None] * len(prompts)
+        msgs = packed_prompt(prompts)
+        request = dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": msgs["system_prompt"]},
+                {"role": "user", "content": msgs["user_prompt"]},
+            ],
+            temperature=self.temperature,
+            logprobs=True,
+            top_logprobs=len(self.prompt.response_format.values()),  # type: ignore
+            response_format=self._packed_format(len(prompts)),
+        )
+        scores = self._packed_scores(self._completion(request), len(prompts))
+        results = list()
+        for score, kw in zip(scores, kwargs):
+            if score is None:
+                results.append(None)
+                continue
+            # Unsure samples are escalated one by one
+            sample_request = self._request(**self._sample_args(kw))
+            score = self._escalate(score, sample_request)
+            results.append(self._format(self._result(score)))
+        return results
+
+    def _packed_scores(
+        self, model_response, num_samples: int
+    ) -> List[Optional[Score]]:
+        # Scores of the samples of a packed response, in order. The score of
+        # every sample is read at the token of its "score" value; None for
+        # all the samples if they can not be matched.
+        unmatched: List[Optional[Score]] = [None] * num_samples
+        try:
+            message = json.loads(model_response.choices[0].message.content)
+            tokens = value_tokens(model_response.choices[0].logprobs.content)
+        except (AttributeError, IndexError, TypeError, ValueError):
+            return unmatched
+        if not isinstance(message, dict):
+            return unmatched
+        scores: List[Optional[Score]] = list()
+        for key in pack_keys(num_samples):
+            evaluation = message.get(key)
+            token = tokens.get((key, "score"))
+            if (
+                not isinstance(evaluation, dict)
+                or token is None
+                or str(evaluation.get("score")) != token_value(token)
+            ):
+                logger.warning(
+                    f"{self.name}: score of {key} not found in the packed "
+                    "response, judging its samples one by one"
+                )
+                return unmatched
+            scores.append(
+                Score(
+                    probabilities=self._probabilities(token.top_logprobs),
+                    reasoning=evaluation.get("reasoning", ""),
+                )
+            )
+        return scores
+
+    def _rate_limit_key(self, request: Dict[str, Any]) -> str:
+        return f"{self.provider}:{request['model']}"
+
+    def _request_key(self, request: Dict[str, Any]) -> str:
+        # Identifies a request for the response cache and for coalescing
+        response_format = request["response_format"]
+        if isinstance(response_format, type):
+            response_format = response_format.model_json_schema()
+        return cache_key(
+            provider=self.provider,
+            model=request["model"],
+            temperature=self.temperature,
+            seed=request.get("seed"),
+            system_prompt=request["messages"][0]["content"],
+            user_prompt=request["messages"][1]["content"],
+            response_format=response_format,
+            top_logprobs=request["top_logprobs"],
+            **(
+                {"max_tokens": request["max_tokens"]}
+                if "max_tokens" in request
+                else {}
+            ),
+        )
+
+    @staticmethod
+    def _cached_response(cached: Dict[str, Any]):
+        # The full completion is cached, logprobs included
+        return ChatCompletion.model_validate(cached)
+
+    def _process(self, **kwargs) -> Score:
+        request = self._request(**kwargs)
+        score = self._read_score(self._completion(request))
+        return self._escalate(score, request)
+
+    async def _aprocess(self, **kwargs) -> Score:
+        request = self._request(**kwargs)
+        score = self._read_score(await self._acompletion(request))
+        return await self._aescalate(score, request)
+
+    def _escalation_request(
+        self, score: Score, request: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        # Request to the stronger model if the judgment is escalated, None
+        # (and counted as kept) otherwise
+        if self.escalation is None:
+            return None
+        if score.score_probability >= self.escalation.threshold:
+            self._record_escalation(score, None)
+            return None
+        return {**request, "model": self.escalation.model}
+
+    def _escalated(self, score: Score, model_response) -> Score:
+        escalated = self._read_score(model_response)
+        self._record_escalation(score, escalated)
+        return escalated
+
+    def _escalate(self, score: Score, request: Dict[str, Any]) -> Score:
+        escalation_request = self._escalation_request(score, request)
+        if escalation_request is None:
+            return score
+        return self._escalated(score, self._completion(escalation_request))
+
+    async def _aescalate(self, score: Score, request: Dict[str, Any]) -> Score:
+        escalation_request = self._escalation_request(score, request)
+        if escalation_request is None:
+            return score
+        return self._escalated(
+            score, await self._acompletion(escalation_request)
+        )
+
+    def _record_escalation(self, score: Score, escalated: Optional[Score]):
+        # Counted in the stats of the current batch
+        with _ESCALATION_LOCK:
+            counts = self.stats.extra.setdefault(
+                "escalation",
+                {
+                    "model": self.escalation.model,  # type: ignore
+                    "threshold": self.escalation.threshold,  # type: ignore
+                    "judgments": 0,
+                    "escalated": 0,
+                    "agreed": 0,
+                },
+            )
+            counts["judgments"] += 1
+            if escalated is not None:
+                counts["escalated"] += 1
+                counts["agreed"] += int(escalated.score == score.score)
+            num_escalated = counts["escalated"]
+            counts["escalation_rate"] = num_escalated / counts["judgments"]
+            counts["agreement"] = (
+                counts["agreed"] / num_escalated if num_escalated else None
+            )
+
+    def _read_score(self, model_response) -> Score:
+        if self.fast:
+            return self._fast_score(model_response)
+        return self._score(model_response)
+
+    def _send(self, request: Dict[str, Any]):
+        # Score-first requests are plain JSON schema completions: a response
+        # capped after the score could not be parsed
+        if isinstance(request["response_format"], type):
+            return self._client.beta.chat.completions.parse(**request)
+        return self._client.chat.completions.create(**request)
+
+    async def _asend(self, request: Dict[str, Any]):
+        if isinstance(request["response_format"], type):
+            return await self._aclient.beta.chat.completions.parse(**request)
+        return await self._aclient.chat.completions.create(**request)
+
+    def _report_usage(
+        self, request: Dict[str, Any], response: ChatCompletion, latency: float
+    ):
+        report_usage(
+            self._rate_limit_key(request),
+            latency=latency,
+            **usage_counts(response.usage),
+        )
+
+    def _completion(self, request: Dict[str, Any]) -> ChatCompletion:
+        key = self._request_key(request)
+        cache = response_cache(self.temperature)
+        if cache is not None and (hit := cache.get(key)) is not None:
+            return self._cached_response(hit)
+
+        def call():
+            # Identical deterministic requests in flight (e.g., the same
+            # question and chunk in several samples) share this one
+            rate_limits.throttle(
+                self._rate_limit_key(request), request["messages"]
+            )
+            tic = time.perf_counter()
+            response = self._send(request)
+            self._report_usage(request, response, time.perf_counter() - tic)
+            if cache is not None:
+                cache.set(key, response.model_dump(mode="json"))
+            return response
+
+        return single_flight.do(flight_key(key, self.temperature), call)
+
+    async def _acompletion(self, request: Dict[str, Any]) -> ChatCompletion:
+        key = self._request_key(request)
+        cache = response_cache(self.temperature)
+        if cache is not None and (hit := cache.get(key)) is not None:
+            return self._cached_response(hit)
+
+        async def call():
+            await rate_limits.athrottle(
+                self._rate_limit_key(request), request["messages"]
+            )
+            tic = time.perf_counter()
+            response = await self._asend(request)
+            self._report_usage(request, response, time.perf_counter() - tic)
+            if cache is not None:
+                cache.set(key, response.model_dump(mode="json"))
+            return response
+
+        return await single_flight.ado(flight_key(key, self.temperature), call)
+
+    def _result(self, score: Score) -> Dict[str, Any]:
         return {
             f"{self.name}_score": score.score,
             f"{self.name}_reasoning": score.reasoning,
             f"{self.name}_probabilities": score.probabilities,
         }
+
+    def compute(self, **kwargs):
+        telemetry.log_event(name="ProbabilisticMetric", info={"internal": True})
+        score = self._process(**kwargs)
+        return self._result(score)
+
+    async def acompute(self, **kwargs):
+        if not self._native_async():
+            return await super().acompute(**kwargs)
+        score = await self._aprocess(**kwargs)
+        return self._result(score)
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from typing import Dict, Optional, Union
 
@@ -10,6 +11,8 @@ from continuous_eval.metrics.base.response_type import (
     get_response_format,
 )
 
+_MAX_SYSTEM_PROMPTS = 64
+
 
 class PromptTemplate:
     def __init__(
@@ -28,9 +31,10 @@ class PromptTemplate:
         self._user_prompt_template = self._env.from_string(
             self._raw_user_prompt
         )
-        self._vars = self._get_vars(self._raw_user_prompt) | self._get_vars(
-            self._raw_system_prompt
-        )
+        self._sys_vars = self._get_vars(self._raw_system_prompt)
+        self._vars = self._get_vars(self._raw_user_prompt) | self._sys_vars
+        # Rendered system prompts, by value of the system prompt variables
+        self._sys_prompts: Dict[str, str] = dict()
         self._args = args or {var: Arg() for var in self._vars}
         self._validate()
 
@@ -86,12 +90,25 @@ class PromptTemplate:
         return meta.find_undeclared_variables(ast)
 
     def system_prompt(self, **kwargs):
-        return self._sys_prompt_template.render(**kwargs)
+        # The system prompt only sees its own variables (e.g., `use_few_shot`)
+        # so that it is the same text for all the samples of a run, a stable
+        # prefix for the prompt caches of the providers. It is rendered once.
+        values = {k: kwargs[k] for k in self._sys_vars if k in kwargs}
+        key = json.dumps(values, sort_keys=True, default=str)
+        system_prompt = self._sys_prompts.get(key)
+        if system_prompt is None:
+            if len(self._sys_prompts) >= _MAX_SYSTEM_PROMPTS:
+                self._sys_prompts.clear()
+            system_prompt = self._sys_prompt_template.render(**values)
+            self._sys_prompts[key] = system_prompt
+        return system_prompt
 
     def user_prompt(self, **kwargs):
         return self._user_prompt_template.render(**kwargs)
 
     def render(self, **kwargs):
+        # The static part of the prompt (system prompt with the instructions,
+        # rubric and few-shot examples) comes first, the sample data last
         return {
             "system_prompt": self.system_prompt(**kwargs),
             "user_prompt": self.user_prompt(**kwargs),
@@ -1,3 +1,14 @@
-from continuous_eval.metrics.classification.classification import (
-    SingleLabelClassification,
-)
+from typing import TYPE_CHECKING
+
+from continuous_eval.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from continuous_eval.metrics.classification.classification import (
+        SingleLabelClassification,
+    )
+
+_EXPORTS = {"SingleLabelClassification": ".classification"}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
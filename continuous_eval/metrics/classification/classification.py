@@ -10,6 +10,7 @@ from sklearn.metrics import (
 )
 
 from continuous_eval.metrics.base import Field, Metric
+from continuous_eval.metrics.base.metric import is_error
 
 
 class SingleLabelClassification(Metric):
@@ -60,6 +61,7 @@ class SingleLabelClassification(Metric):
         self,
         results: List[Dict[str, Union[str, int]]],
     ) -> Any:
+        results = [r for r in results if not is_error(r)]
         if self._classes is None:
             classes = {r["classification_prediction"] for r in results}
             classes.update({r["classification_ground_truth"] for r in results})
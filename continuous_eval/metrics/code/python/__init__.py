@@ -1 +1,15 @@
-from .code_deterministic_metrics import CodeStringMatch, PythonASTSimilarity
+from typing import TYPE_CHECKING
+
+from continuous_eval.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .code_deterministic_metrics import CodeStringMatch, PythonASTSimilarity
+
+_EXPORTS = {
+    "CodeStringMatch": ".code_deterministic_metrics",
+    "PythonASTSimilarity": ".code_deterministic_metrics",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
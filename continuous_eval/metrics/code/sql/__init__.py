@@ -1,2 +1,17 @@
-from .deterministic import SQLASTSimilarity, SQLSyntaxMatch
-from .llm import SQLCorrectness
+from typing import TYPE_CHECKING
+
+from continuous_eval.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .deterministic import SQLASTSimilarity, SQLSyntaxMatch
+    from .llm import SQLCorrectness
+
+_EXPORTS = {
+    "SQLASTSimilarity": ".deterministic",
+    "SQLSyntaxMatch": ".deterministic",
+    "SQLCorrectness": ".llm",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -62,7 +62,7 @@ class SQLSyntaxMatch(Metric, _SQLMetric):
     """
 
     def __init__(self, optimize: bool = False, schema: Optional[Dict] = None):
-        super(SQLSyntaxMatch, self).__init__()
+        super(SQLSyntaxMatch, self).__init__(is_cpu_bound=True)
         _SQLMetric.__init__(self, optimize=optimize, schema=schema)
 
     def compute(self, answer: str, ground_truth_answers: Union[List[str], str]):
@@ -108,7 +108,7 @@ class SQLASTSimilarity(Metric, _SQLMetric):
         schema: Optional[Dict] = None,
         diff_weights: ASTDiffWeightConfig = ASTDiffWeightConfig(),
     ):
-        super(SQLASTSimilarity, self).__init__()
+        super(SQLASTSimilarity, self).__init__(is_cpu_bound=True)
         _SQLMetric.__init__(self, optimize=optimize, schema=schema)
         self._diff_weights = diff_weights
 
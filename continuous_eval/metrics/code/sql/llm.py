@@ -25,6 +25,7 @@ class SQLCorrectness(ProbabilisticMetric):
         self,
         temperature: float = 1.0,
         model: str = DEFAULT_MODEL,
+        fast: bool = False,
     ):
         prompt = MetricPrompt.from_file(
             system_prompt_path=_CWD / "prompts" / "sql_correctness_sys.jinja2",
@@ -37,22 +38,24 @@ class SQLCorrectness(ProbabilisticMetric):
             prompt=prompt,
             temperature=temperature,
             model=model,
+            fast=fast,
         )
 
-    def compute(
+    def _prompt_args(
         self,
         question: str,
         answer: str,
         ground_truth_answers: Union[List[str], str],
         schema: Optional[Dict] = None,
-        **kwargs,
     ):
-        score = super().compute(
+        return dict(
             question=question,
             answer=answer,
             ground_truth_answers=ground_truth_answers,
             schema=schema,
         )
+
+    def _format(self, score):
         return {
             "reasoning": score["SQLCorrectness_reasoning"],
             "score": self.prompt.response_format.weighted_score(
@@ -60,6 +63,32 @@ class SQLCorrectness(ProbabilisticMetric):
             ),
         }
 
+    def compute(
+        self,
+        question: str,
+        answer: str,
+        ground_truth_answers: Union[List[str], str],
+        schema: Optional[Dict] = None,
+        **kwargs,
+    ):
+        score = super().compute(
+            **self._prompt_args(question, answer, ground_truth_answers, schema)
+        )
+        return self._format(score)
+
+    async def acompute(
+        self,
+        question: str,
+        answer: str,
+        ground_truth_answers: Union[List[str], str],
+        schema: Optional[Dict] = None,
+        **kwargs,
+    ):
+        score = await super().acompute(
+            **self._prompt_args(question, answer, ground_truth_answers, schema)
+        )
+        return self._format(score)
+
     @property
     def args(self):
         return {
@@ -1 +1,16 @@
-from .custom_metric import ProbabilisticCustomMetric,CustomMetric, Example
+from typing import TYPE_CHECKING
+
+from continuous_eval.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .custom_metric import CustomMetric, Example, ProbabilisticCustomMetric
+
+_EXPORTS = {
+    "CustomMetric": ".custom_metric",
+    "Example": ".custom_metric",
+    "ProbabilisticCustomMetric": ".custom_metric",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -77,6 +77,7 @@ class ProbabilisticCustomMetric(ProbabilisticMetric):
         examples: Optional[List[Example]] = None,
         temperature: float = 1.0,
         model: str = LLMFactory.default(),
+        fast: bool = False,
     ):
         if not isinstance(
             response_format, response_type.ResponseFormatBaseType
@@ -107,7 +108,11 @@ class ProbabilisticCustomMetric(ProbabilisticMetric):
             response_format=response_format,
         )
         super().__init__(
-            name=name, prompt=self.prompt, temperature=temperature, model=model
+            name=name,
+            prompt=self.prompt,
+            temperature=temperature,
+            model=model,
+            fast=fast,
         )
 
     @property
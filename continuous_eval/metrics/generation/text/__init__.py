@@ -1,20 +1,51 @@
-from continuous_eval.metrics.generation.text.deterministic import (
-    DeterministicAnswerCorrectness,
-    DeterministicFaithfulness,
-    FleschKincaidReadability,
-)
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
+
+from continuous_eval.utils.lazy import lazy_exports
 
-try:
+if TYPE_CHECKING:
+    from continuous_eval.metrics.generation.text.deterministic import (
+        DeterministicAnswerCorrectness,
+        DeterministicFaithfulness,
+        FleschKincaidReadability,
+    )
+    from continuous_eval.metrics.generation.text.llm_based import (
+        AnswerCorrectness,
+        AnswerRelevance,
+        Faithfulness,
+        StyleConsistency,
+    )
     from continuous_eval.metrics.generation.text.semantic import (
         BertAnswerRelevance,
         BertAnswerSimilarity,
         DebertaAnswerScores,
     )
-except ImportError:
-    pass
-from continuous_eval.metrics.generation.text.llm_based import (
-    AnswerCorrectness,
-    AnswerRelevance,
-    Faithfulness,
-    StyleConsistency,
+
+# The semantic metrics require the optional `semantic` extra (torch,
+# transformers, ...): accessing them without it raises an ImportError, and
+# they are left out of `import *`.
+_SEMANTIC_EXTRA = "semantic"
+_SEMANTIC_DEPENDENCIES = ("torch", "transformers", "sentence_transformers")
+_EXPORTS = {
+    "DeterministicAnswerCorrectness": ".deterministic",
+    "DeterministicFaithfulness": ".deterministic",
+    "FleschKincaidReadability": ".deterministic",
+    "BertAnswerRelevance": ".semantic",
+    "BertAnswerSimilarity": ".semantic",
+    "DebertaAnswerScores": ".semantic",
+    "AnswerCorrectness": ".llm_based",
+    "AnswerRelevance": ".llm_based",
+    "Faithfulness": ".llm_based",
+    "StyleConsistency": ".llm_based",
+}
+
+__all__ = [
+    name
+    for name, module in _EXPORTS.items()
+    if module != ".semantic"
+    or all(find_spec(dep) is not None for dep in _SEMANTIC_DEPENDENCIES)
+]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__, _EXPORTS, extras={".semantic": _SEMANTIC_EXTRA}
 )
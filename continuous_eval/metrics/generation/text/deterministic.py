@@ -9,6 +9,7 @@ from continuous_eval.metrics.generation.text.utils import (
     RougeScore,
     TokenOverlap,
 )
+from continuous_eval.utils.nltk_resources import ensure_nltk_resources
 
 
 @dataclass(frozen=True)
@@ -185,6 +186,7 @@ class FleschKincaidReadability(Metric):
 
     def __init__(self):
         super().__init__(is_cpu_bound=True)
+        ensure_nltk_resources("punkt", "punkt_tab")
         self._word_tokenizer = nltk.tokenize.RegexpTokenizer(r"\w+")
         self._syl_tokenizer = nltk.tokenize.SyllableTokenizer()
 
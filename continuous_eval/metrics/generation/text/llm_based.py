@@ -26,6 +26,7 @@ class Faithfulness(ProbabilisticMetric):
         use_few_shot: bool = True,
         temperature=1.0,
         model: str = DEFAULT_MODEL,
+        fast: bool = False,
     ):
         prompt = MetricPrompt.from_file(
             system_prompt_path=_CWD / "prompts" / "faithfulness_sys.jinja2",
@@ -38,25 +39,43 @@ class Faithfulness(ProbabilisticMetric):
             prompt=prompt,
             temperature=temperature,
             model=model,
+            fast=fast,
         )
         self.use_few_shot = use_few_shot
 
-    def compute(
-        self,
-        retrieved_context: List[str],
-        answer: str,
-        **kwargs,
-    ):
-        score = super().compute(
+    def _prompt_args(self, retrieved_context: List[str], answer: str):
+        return dict(
             context=retrieved_context,
             statement=answer,
             use_few_shot=self.use_few_shot,
         )
+
+    def _format(self, score):
         return {
             "faithfulness": score["Faithfulness_probabilities"]["yes"],
             "reasoning": score["Faithfulness_reasoning"],
         }
 
+    def compute(
+        self,
+        retrieved_context: List[str],
+        answer: str,
+        **kwargs,
+    ):
+        score = super().compute(**self._prompt_args(retrieved_context, answer))
+        return self._format(score)
+
+    async def acompute(
+        self,
+        retrieved_context: List[str],
+        answer: str,
+        **kwargs,
+    ):
+        score = await super().acompute(
+            **self._prompt_args(retrieved_context, answer)
+        )
+        return self._format(score)
+
     @property
     def args(self):
         return {
@@ -91,6 +110,7 @@ class AnswerCorrectness(ProbabilisticMetric):
         use_few_shot: bool = True,
         temperature=1.0,
         model: str = DEFAULT_MODEL,
+        fast: bool = False,
     ):
         prompt = MetricPrompt.from_file(
             system_prompt_path=_CWD / "prompts" / "ans_correctness_sys.jinja2",
@@ -103,24 +123,26 @@ class AnswerCorrectness(ProbabilisticMetric):
             prompt=prompt,
             temperature=temperature,
             model=model,
+            fast=fast,
         )
         self.use_few_shot = use_few_shot
 
-    def compute(
+    def _prompt_args(
         self,
         question: str,
         answer: str,
         ground_truth_answers: Union[List[str], str],
-        **kwargs,
     ):
         if not isinstance(ground_truth_answers, list):
             ground_truth_answers = [ground_truth_answers]
-        score = super().compute(
+        return dict(
             question=question,
             answer=answer,
             ground_truth_answers=ground_truth_answers,
             use_few_shot=self.use_few_shot,
         )
+
+    def _format(self, score):
         return {
             "correctness": self.prompt.response_format.weighted_score(  # type: ignore
                 score["AnswerCorrectness_probabilities"]
@@ -128,6 +150,30 @@ class AnswerCorrectness(ProbabilisticMetric):
             "reasoning": score["AnswerCorrectness_reasoning"],
         }
 
+    def compute(
+        self,
+        question: str,
+        answer: str,
+        ground_truth_answers: Union[List[str], str],
+        **kwargs,
+    ):
+        score = super().compute(
+            **self._prompt_args(question, answer, ground_truth_answers)
+        )
+        return self._format(score)
+
+    async def acompute(
+        self,
+        question: str,
+        answer: str,
+        ground_truth_answers: Union[List[str], str],
+        **kwargs,
+    ):
+        score = await super().acompute(
+            **self._prompt_args(question, answer, ground_truth_answers)
+        )
+        return self._format(score)
+
     @property
     def args(self):
         return {
@@ -162,6 +208,7 @@ class AnswerRelevance(ProbabilisticMetric):
         use_few_shot: bool = True,
         temperature=1.0,
         model: str = DEFAULT_MODEL,
+        fast: bool = False,
     ):
         prompt = MetricPrompt.from_file(
             system_prompt_path=_CWD / "prompts" / "ans_relevance_sys.jinja2",
@@ -174,15 +221,18 @@ class AnswerRelevance(ProbabilisticMetric):
             prompt=prompt,
             temperature=temperature,
             model=model,
+            fast=fast,
         )
         self.use_few_shot = use_few_shot
 
-    def compute(self, question: str, answer: str, **kwargs):
-        score = super().compute(
+    def _prompt_args(self, question: str, answer: str):
+        return dict(
             question=question,
             answer=answer,
             use_few_shot=self.use_few_shot,
         )
+
+    def _format(self, score):
         return {
             "relevance": self.prompt.response_format.weighted_score(  # type: ignore
                 score["AnswerRelevance_probabilities"]
@@ -190,6 +240,14 @@ class AnswerRelevance(ProbabilisticMetric):
             "reasoning": score["AnswerRelevance_reasoning"],
         }
 
+    def compute(self, question: str, answer: str, **kwargs):
+        score = super().compute(**self._prompt_args(question, answer))
+        return self._format(score)
+
+    async def acompute(self, question: str, answer: str, **kwargs):
+        score = await super().acompute(**self._prompt_args(question, answer))
+        return self._format(score)
+
     @property
     def args(self):
         return {
@@ -220,6 +278,7 @@ class StyleConsistency(ProbabilisticMetric):
         use_few_shot: bool = True,
         temperature=1.0,
         model: str = DEFAULT_MODEL,
+        fast: bool = False,
     ):
         prompt = MetricPrompt.from_file(
             system_prompt_path=_CWD
@@ -234,17 +293,20 @@ class StyleConsistency(ProbabilisticMetric):
             prompt=prompt,
             temperature=temperature,
             model=model,
+            fast=fast,
         )
         self.use_few_shot = use_few_shot
 
-    def compute(
-        self, answer: str, ground_truth_answers: Union[List[str], str], **kwargs
+    def _prompt_args(
+        self, answer: str, ground_truth_answers: Union[List[str], str]
     ):
-        score = super().compute(
+        return dict(
             answer=answer,
             ground_truth_answers=ground_truth_answers,
             use_few_shot=self.use_few_shot,
         )
+
+    def _format(self, score):
         return {
             "consistency": self.prompt.response_format.weighted_score(  # type: ignore
                 score["StyleConsistency_probabilities"]
@@ -252,6 +314,22 @@ class StyleConsistency(ProbabilisticMetric):
             "reasoning": score["StyleConsistency_reasoning"],
         }
 
+    def compute(
+        self, answer: str, ground_truth_answers: Union[List[str], str], **kwargs
+    ):
+        score = super().compute(
+            **self._prompt_args(answer, ground_truth_answers)
+        )
+        return self._format(score)
+
+    async def acompute(
+        self, answer: str, ground_truth_answers: Union[List[str], str], **kwargs
+    ):
+        score = await super().acompute(
+            **self._prompt_args(answer, ground_truth_answers)
+        )
+        return self._format(score)
+
     @property
     def args(self):
         return {
@@ -7,6 +7,7 @@ import nltk
 from rouge import Rouge
 
 from continuous_eval.metrics.retrieval.simple_tokenizer import SimpleTokenizer
+from continuous_eval.utils.nltk_resources import ensure_nltk_resources
 
 
 def _numeric_matcher(input_val, min_val, max_val) -> Optional[float]:
@@ -34,6 +35,7 @@ class ScoringFunctions:
 class TokenOverlap:
     def __init__(self):
         super().__init__()
+        ensure_nltk_resources("punkt", "punkt_tab")
         self._tokenizer = SimpleTokenizer()
 
     def _tokenize(self, text, language="english"):
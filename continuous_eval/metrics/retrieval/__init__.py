@@ -1,19 +1,36 @@
-from continuous_eval.metrics.retrieval.llm_based import (
-    ContextCoverage,
-    ContextPrecision,
-)
-from continuous_eval.metrics.retrieval.matching_strategy import (
-    ExactChunkMatch,
-    ExactSentenceMatch,
-    RougeChunkMatch,
-    RougeSentenceMatch,
-)
-from continuous_eval.metrics.retrieval.precision_recall_f1 import PrecisionRecallF1
-from continuous_eval.metrics.retrieval.ranked import RankedRetrievalMetrics
-from continuous_eval.metrics.retrieval.tokens import TokenCount
+from typing import TYPE_CHECKING
 
-from nltk import download as nltk_download
+from continuous_eval.utils.lazy import lazy_exports
 
-nltk_download("punkt", quiet=True)
-nltk_download("punkt_tab", quiet=True)
-nltk_download("stopwords", quiet=True)
+if TYPE_CHECKING:
+    from continuous_eval.metrics.retrieval.llm_based import (
+        ContextCoverage,
+        ContextPrecision,
+    )
+    from continuous_eval.metrics.retrieval.matching_strategy import (
+        ExactChunkMatch,
+        ExactSentenceMatch,
+        RougeChunkMatch,
+        RougeSentenceMatch,
+    )
+    from continuous_eval.metrics.retrieval.precision_recall_f1 import (
+        PrecisionRecallF1,
+    )
+    from continuous_eval.metrics.retrieval.ranked import RankedRetrievalMetrics
+    from continuous_eval.metrics.retrieval.tokens import TokenCount
+
+_EXPORTS = {
+    "ContextCoverage": ".llm_based",
+    "ContextPrecision": ".llm_based",
+    "ExactChunkMatch": ".matching_strategy",
+    "ExactSentenceMatch": ".matching_strategy",
+    "RougeChunkMatch": ".matching_strategy",
+    "RougeSentenceMatch": ".matching_strategy",
+    "PrecisionRecallF1": ".precision_recall_f1",
+    "RankedRetrievalMetrics": ".ranked",
+    "TokenCount": ".tokens",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
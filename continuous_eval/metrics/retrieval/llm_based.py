@@ -1,7 +1,10 @@
+import json
+import logging
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 import numpy as np
+from pydantic import BaseModel, ConfigDict
 
 from continuous_eval.metrics.base import (
     Arg,
@@ -10,6 +13,7 @@ from continuous_eval.metrics.base import (
     response_type,
 )
 from continuous_eval.metrics.base.llm import LLMMetric
+from continuous_eval.metrics.base.logprobs import token_value, value_tokens
 from continuous_eval.metrics.base.probabilistic import (
     DEFAULT_MODEL,
     ProbabilisticMetric,
@@ -17,6 +21,15 @@ from continuous_eval.metrics.base.probabilistic import (
 
 _CWD = Path(__file__).parent
 
+logger = logging.getLogger("ContextPrecision")
+
+
+class ChunkVerdicts(BaseModel):
+    model_config = ConfigDict(title="ChunkVerdicts")
+
+    reasoning: str
+    verdicts: List[Literal["yes", "no"]]
+
 
 class ContextPrecision(ProbabilisticMetric):
     """Calculate the precision of the retrieved context given the ground truth context."""
@@ -27,7 +40,15 @@ class ContextPrecision(ProbabilisticMetric):
         log_relevance_by_context: bool = False,
         temperature=1.0,
         model: str = DEFAULT_MODEL,
+        single_request: bool = False,
     ):
+        """
+        Args:
+            single_request (bool): Judge all the retrieved chunks of a sample
+                in a single request (one verdict per chunk) instead of one
+                request per chunk. Samples whose verdicts can not be read
+                back from the response fall back to one request per chunk.
+        """
         prompt = MetricPrompt.from_file(
             system_prompt_path=_CWD
             / "prompts"
@@ -44,19 +65,114 @@ class ContextPrecision(ProbabilisticMetric):
         )
         self.use_few_shot = use_few_shot
         self.log_relevance_by_context = log_relevance_by_context
+        self.single_request = single_request
+        self._chunks_prompt = MetricPrompt.from_file(
+            system_prompt_path=_CWD
+            / "prompts"
+            / "context_precision_chunks_sys.jinja2",
+            user_prompt_path=_CWD
+            / "prompts"
+            / "context_precision_chunks_user.jinja2",
+            response_format=response_type.YesOrNo,  # type: ignore
+        )
+
+    def _chunks_request(
+        self, question: str, retrieved_context: List[str]
+    ) -> Dict[str, Any]:
+        msgs = self._chunks_prompt.render(
+            question=question,
+            contexts=retrieved_context,
+            use_few_shot=self.use_few_shot,
+        )
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": msgs["system_prompt"]},
+                {"role": "user", "content": msgs["user_prompt"]},
+            ],
+            temperature=self.temperature,
+            logprobs=True,
+            top_logprobs=len(self.prompt.response_format.values()),  # type: ignore
+            response_format=ChunkVerdicts,
+        )
+
+    def _chunk_scores(
+        self, model_response, num_chunks: int
+    ) -> Optional[List[float]]:
+        # Probability of "yes" at every verdict token, None if the verdicts
+        # can not be matched with the chunks
+        try:
+            message = json.loads(model_response.choices[0].message.content)
+            tokens = value_tokens(model_response.choices[0].logprobs.content)
+        except (AttributeError, IndexError, TypeError, ValueError):
+            return None
+        verdicts = message.get("verdicts")
+        if not isinstance(verdicts, list) or len(verdicts) != num_chunks:
+            return None
+        verdict_tokens = [
+            tokens.get(("verdicts", i)) for i in range(num_chunks)
+        ]
+        if any(
+            tok is None or token_value(tok) != verdict
+            for tok, verdict in zip(verdict_tokens, verdicts)
+        ):
+            return None
+        return [
+            self._probabilities(tok.top_logprobs)["yes"]
+            for tok in verdict_tokens
+        ]
 
     def compute(self, retrieved_context, question, **kwargs):
         """
         Calculate the context precision score for the given datum.
         """
-        scores = list()
-        for context in retrieved_context:
-            score = super().compute(
+        if self.single_request and len(retrieved_context) > 1:
+            scores = self._chunk_scores(
+                self._completion(
+                    self._chunks_request(question, retrieved_context)
+                ),
+                len(retrieved_context),
+            )
+            if scores is not None:
+                return self._precision(scores)
+            logger.warning("Unreadable verdicts, judging chunk by chunk")
+
+        def relevance(context):
+            score = super(ContextPrecision, self).compute(
                 question=question,
                 context=context,
                 use_few_shot=self.use_few_shot,
             )
-            scores.append(score["ContextPrecision_probabilities"]["yes"])
+            return score["ContextPrecision_probabilities"]["yes"]
+
+        # The chunks are judged concurrently
+        return self._precision(self._fan_out(relevance, retrieved_context))
+
+    async def acompute(self, retrieved_context, question, **kwargs):
+        if self.single_request and len(retrieved_context) > 1:
+            scores = self._chunk_scores(
+                await self._acompletion(
+                    self._chunks_request(question, retrieved_context)
+                ),
+                len(retrieved_context),
+            )
+            if scores is not None:
+                return self._precision(scores)
+            logger.warning("Unreadable verdicts, judging chunk by chunk")
+
+        async def relevance(context):
+            score = await super(ContextPrecision, self).acompute(
+                question=question,
+                context=context,
+                use_few_shot=self.use_few_shot,
+            )
+            return score["ContextPrecision_probabilities"]["yes"]
+
+        return self._precision(
+            await self._afan_out(relevance, retrieved_context)
+        )
+
+    def _precision(self, scores: List[float]):
         relevant_count = 0
         mAP = 0
         for i, score in enumerate(scores):
@@ -142,15 +258,42 @@ class ContextCoverage(LLMMetric):
     ):
         if not isinstance(ground_truth_answers, list):
             ground_truth_answers = [ground_truth_answers]
-        scores_by_gt_answer = list()
-        for gt in ground_truth_answers:
-            score = super().compute(
+
+        def statements(gt):
+            return super(ContextCoverage, self).compute(
                 question=question,
                 context=retrieved_context,
                 answer=gt,
                 use_few_shot=self.use_few_shot,
             )
-            scores_by_gt_answer.append(score)
+
+        # The ground truth answers are evaluated concurrently
+        return self._coverage(self._fan_out(statements, ground_truth_answers))
+
+    async def acompute(
+        self,
+        question: str,
+        retrieved_context: List[str],
+        ground_truth_answers: Union[List[str], str],
+        **kwargs,
+    ):
+        if not isinstance(ground_truth_answers, list):
+            ground_truth_answers = [ground_truth_answers]
+
+        async def statements(gt):
+            return await super(ContextCoverage, self).acompute(
+                question=question,
+                context=retrieved_context,
+                answer=gt,
+                use_few_shot=self.use_few_shot,
+            )
+
+        return self._coverage(
+            await self._afan_out(statements, ground_truth_answers)
+        )
+
+    @staticmethod
+    def _coverage(scores_by_gt_answer: List[Any]):
         scores = [
             np.mean([x["attribution"] for x in score])
             for score in scores_by_gt_answer
@@ -8,6 +8,7 @@ from continuous_eval.metrics.retrieval.matching_strategy import (
     MatchingStrategyType,
     RougeChunkMatch,
 )
+from continuous_eval.utils.nltk_resources import ensure_nltk_resources
 
 
 class PrecisionRecallF1(Metric):
@@ -19,6 +20,8 @@ class PrecisionRecallF1(Metric):
             matching_strategy, MatchingStrategy
         ), "Matching strategy must be an instance of MatchingStrategy."
         self.matching_strategy = matching_strategy
+        if matching_strategy.type == MatchingStrategyType.SENTENCE_MATCH:
+            ensure_nltk_resources("punkt", "punkt_tab")
 
     def compute(
         self,
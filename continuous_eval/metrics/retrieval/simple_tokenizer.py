@@ -7,11 +7,7 @@ from nltk.corpus import stopwords
 from nltk.tokenize.api import TokenizerI
 from nltk.tokenize.destructive import MacIntyreContractions
 
-# This is a workaround to avoid make sure that the stopwords are loaded before the tokenizer is used by a thread
-try:
-    stopwords.ensure_loaded()
-except LookupError:
-    stopwords.ensure_loaded()
+from continuous_eval.utils.nltk_resources import ensure_nltk_resources
 
 
 # Modified version of NLTKWordTokenizer
@@ -23,6 +19,12 @@ class SimpleTokenizer(TokenizerI):
 
     IS_NUMBER = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
 
+    def __init__(self):
+        ensure_nltk_resources("stopwords")
+        # Make sure that the stopwords are loaded before the tokenizer is
+        # used by a thread
+        stopwords.ensure_loaded()
+
     def tokenize(self, text: str, remove_stopwords=True) -> List[str]:
         text = copy(text.lower())
 
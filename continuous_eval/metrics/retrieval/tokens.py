@@ -1,5 +1,6 @@
-from typing import List, Union
+from typing import List, Sequence, Union
 
+import numpy as np
 import tiktoken
 
 from continuous_eval.metrics.base import Field, Metric
@@ -23,31 +24,61 @@ class TokenCount(Metric):
 
     def __init__(self, encoder_name: str = "gpt-4o-mini") -> None:
         super().__init__(is_cpu_bound=True)
+        self._encoder_name = encoder_name
+        self._encoder = self._load_encoder(encoder_name)
+
+    @staticmethod
+    def _load_encoder(encoder_name: str):
         if encoder_name == "approx":
-            self._encoder = None
-        else:
+            return None
+        try:
+            return tiktoken.get_encoding(encoder_name)
+        except ValueError:
             try:
-                self._encoder = tiktoken.get_encoding(encoder_name)
+                return tiktoken.encoding_for_model(encoder_name)
             except ValueError:
-                try:
-                    self._encoder = tiktoken.encoding_for_model(encoder_name)
-                except ValueError:
-                    raise ValueError(
-                        f"Invalid encoder name: {encoder_name}. You can use encoders names like `o200k_base` or model names like `gpt4o-mini`."
-                    )
+                raise ValueError(
+                    f"Invalid encoder name: {encoder_name}. You can use encoders names like `o200k_base` or model names like `gpt4o-mini`."
+                )
 
-    def compute(self, retrieved_context: Union[str, List[str]], **kwargs):
-        ctx = (
+    def __getstate__(self):
+        # Ship only the encoder name to process-pool workers
+        state = super().__getstate__()
+        state["_encoder"] = None
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._encoder = self._load_encoder(self._encoder_name)
+
+    @staticmethod
+    def _join(retrieved_context: Union[str, List[str]]) -> str:
+        return (
             "\n".join(retrieved_context)
-            if isinstance(retrieved_context, list)
+            if not isinstance(retrieved_context, str)
             else retrieved_context
         )
+
+    def compute(self, retrieved_context: Union[str, List[str]], **kwargs):
+        ctx = self._join(retrieved_context)
         if self._encoder is None:
             num_tokens = int(len(ctx) / _CHARACTERS_PER_TOKEN)
         else:
             num_tokens = len(self._encoder.encode(ctx))
         return {"num_tokens": num_tokens}
 
+    def compute_columns(
+        self, retrieved_context: Sequence[Union[str, List[str]]], **kwargs
+    ):
+        ctxs = [self._join(ctx) for ctx in retrieved_context]
+        if self._encoder is None:
+            lengths = np.fromiter((len(ctx) for ctx in ctxs), dtype=float)
+            counts = (lengths / _CHARACTERS_PER_TOKEN).astype(int).tolist()
+        else:
+            # tiktoken encodes the whole column in parallel, in native code
+            counts = [len(x) for x in self._encoder.encode_batch(ctxs)]
+        return [{"num_tokens": n} for n in counts]
+
     @property
     def schema(self):
         return {"num_tokens": Field(type=int)}
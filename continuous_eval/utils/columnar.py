@@ -0,0 +1,91 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# pandas and pyarrow are optional: tables are recognized by duck typing so that
+# neither library is imported unless the user already passes one of its objects.
+
+
+def _library(obj: Any) -> str:
+    return type(obj).__module__.split(".")[0]
+
+
+def is_table(obj: Any) -> bool:
+    """Whether `obj` is a pandas DataFrame or a pyarrow Table."""
+    return (_library(obj) == "pandas" and hasattr(obj, "columns")) or (
+        _library(obj) == "pyarrow" and hasattr(obj, "column_names")
+    )
+
+
+def column_names(table: Any) -> List[str]:
+    if _library(table) == "pyarrow":
+        return list(table.column_names)
+    return [str(c) for c in table.columns]
+
+
+def num_rows(table: Any) -> int:
+    if _library(table) == "pyarrow":
+        return table.num_rows
+    return len(table)
+
+
+def read_column(table: Any, name: str) -> Sequence:
+    """
+    Read a column without copying it when possible.
+
+    Numeric and boolean columns are returned as NumPy views over the table
+    buffers. Columns of Python objects (pandas `object` dtype) are returned as
+    the underlying object array. Arrow strings, lists and structs have no
+    NumPy equivalent, so they are converted to Python objects.
+    """
+    if _library(table) == "pyarrow":
+        import pyarrow as pa
+
+        column = table.column(name)
+        dtype = column.type
+        if (
+            pa.types.is_integer(dtype)
+            or pa.types.is_floating(dtype)
+            or pa.types.is_boolean(dtype)
+        ) and column.null_count == 0:
+            return column.to_numpy()
+        return column.to_pylist()
+    return table[name].to_numpy(copy=False)
+
+
+def table_columns(
+    table: Any,
+    names: Optional[Iterable[str]] = None,
+    column_mapping: Optional[Dict[str, str]] = None,
+) -> Dict[str, Sequence]:
+    """
+    Extract columns from a table.
+
+    Args:
+        table: A pandas DataFrame or a pyarrow Table.
+        names: The names to extract (e.g., the metric arguments), all the
+            columns of the table if not provided. Names missing from the table
+            are skipped.
+        column_mapping: Maps a name to the column holding it, when they differ.
+
+    Returns:
+        Dict[str, Sequence]: The columns, keyed by name.
+    """
+    column_mapping = column_mapping or dict()
+    available = set(column_names(table))
+    if names is None:
+        names = set(available) | set(column_mapping)
+    columns = dict()
+    for name in names:
+        column = column_mapping.get(name, name)
+        if column in available:
+            columns[name] = read_column(table, column)
+    return columns
+
+
+def rows_from_columns(columns: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """Explode columns into a list of row dictionaries."""
+    if not columns:
+        return list()
+    size = len(next(iter(columns.values())))
+    return [
+        {key: col[idx] for key, col in columns.items()} for idx in range(size)
+    ]
@@ -0,0 +1,50 @@
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def lazy_exports(
+    package: str,
+    exports: Dict[str, str],
+    extras: Optional[Dict[str, str]] = None,
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build the module-level `__getattr__` and `__dir__` (PEP 562) of a package
+    whose public names are imported on first access.
+
+    Args:
+        package (str): The package name (i.e., `__name__`).
+        exports (Dict[str, str]): Maps each public name to the (relative)
+            module defining it.
+        extras (Optional[Dict[str, str]]): Maps the (relative) modules
+            requiring an optional extra to the name of the extra, reported
+            when they cannot be imported.
+
+    Returns:
+        The `__getattr__` and `__dir__` functions of the package.
+    """
+    module_globals = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            )
+        module = exports[name]
+        try:
+            value = getattr(importlib.import_module(module, package), name)
+        except ImportError as exc:
+            if extras is None or module not in extras:
+                raise
+            raise ImportError(
+                f"{name} requires the optional {extras[module]!r} extra, "
+                f"install it with `pip install "
+                f"continuous-eval[{extras[module]}]`"
+            ) from exc
+        # Cache it, later lookups do not go through __getattr__ anymore
+        module_globals[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(module_globals) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,30 @@
+import threading
+
+_RESOURCE_PATHS = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+}
+
+_lock = threading.Lock()
+_available = set()
+
+
+def ensure_nltk_resources(*names: str):
+    """
+    Make sure the given NLTK resources are available, downloading the missing
+    ones. Called by the metrics that need them on first use rather than at
+    import time, and checked against the local NLTK data before downloading.
+    """
+    missing = [name for name in names if name not in _available]
+    if not missing:
+        return
+    import nltk
+
+    with _lock:
+        for name in missing:
+            try:
+                nltk.data.find(_RESOURCE_PATHS.get(name, name))
+            except LookupError:
+                nltk.download(name, quiet=True)
+            _available.add(name)
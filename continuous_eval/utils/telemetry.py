@@ -1,14 +1,22 @@
+import atexit
+import inspect
 import json
 import logging
 import os
+import queue
+import threading
+import time
 import uuid
+from collections import Counter
 from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
 
 from appdirs import user_data_dir
 from dotenv import load_dotenv
-from posthog import Posthog
+
+if TYPE_CHECKING:
+    from posthog import Posthog
 
 load_dotenv()
 
@@ -53,65 +61,209 @@ def _get_or_generate_uid() -> str:
     return user_id
 
 
+def _freeze(info: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    key = tuple(info.items())
+    try:
+        hash(key)
+    except TypeError:
+        # Unhashable properties can not be counted, drop them
+        key = tuple((k, v) for k, v in key if _is_hashable(v))
+    return key
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
 class AnonymousTelemetry:
-    def __init__(self):
-        self.uid = _get_or_generate_uid()
-        self._client = Posthog(
-            "phc_FS1KnMOU6v6FWqO5jyjiVDcdBKyHF61KCajn7oANpPC",
-            host="https://us.i.posthog.com",
-            debug=_debug_telemetry(),
-        )
-        if _do_not_track():
-            logger.debug("Telemetry is disabled")
-            self._client.disabled = True
+    """
+    Anonymous usage telemetry.
+
+    Events are never sent from the caller's thread: they are counted in
+    process and the counters are shipped, one event per (name, properties)
+    pair with its count, by a background thread when `flush` is called (at
+    the end of every batch and evaluation run, and at exit).
+    """
+
+    enabled = True
+
+    def __init__(self, client: Optional["Posthog"] = None):
+        # The Posthog client and the user id are only needed to send events,
+        # they are built by the background sender, off the import path
+        self._client_instance = client
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+        self._pending: "queue.Queue[Counter]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def uid(self) -> str:
+        return _get_or_generate_uid()
+
+    @property
+    def _client(self) -> "Posthog":
+        if self._client_instance is None:
+            from posthog import Posthog
+
+            self._client_instance = Posthog(
+                "phc_FS1KnMOU6v6FWqO5jyjiVDcdBKyHF61KCajn7oANpPC",
+                host="https://us.i.posthog.com",
+                debug=_debug_telemetry(),
+            )
+        return self._client_instance
 
     def event(self, name: Optional[str] = None, info: Dict[str, Any] = {}):
         def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                # Flushed once the coroutine completes, not when created
+                @wraps(func)
+                async def awrapper(*args, **kwargs):
+                    self.log_event(name=name or func.__qualname__, info=info)
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.flush()
+
+                return awrapper
+
             @wraps(func)
             def wrapper(*args, **kwargs):
-                # event_name = name or args[0].__class__.__name__
-                self.log_event(name=func.__qualname__, info=info)
-                return func(*args, **kwargs)
+                self.log_event(name=name or func.__qualname__, info=info)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.flush()
 
             return wrapper
 
         return decorator
 
-    def log_event(self, name: str, info: Dict[str, Any] = {}):
+    def log_event(self, name: str, info: Dict[str, Any] = {}, count: int = 1):
+        key = (name, _freeze(info))
+        with self._lock:
+            self._counters[key] += count
+
+    def flush(self):
+        """Hand the current counters over to the background sender."""
+        with self._lock:
+            if not self._counters:
+                return
+            counters, self._counters = self._counters, Counter()
+        self._pending.put(counters)
+        if self._worker is None or not self._worker.is_alive():
+            if self._client_instance is None:
+                # Imported here rather than by the sender: a module imported
+                # in a background thread is visible half-initialized to the
+                # other threads (e.g., httpx, which openai inspects)
+                import posthog  # noqa: F401
+            self._worker = threading.Thread(
+                target=self._send_pending, name="telemetry", daemon=True
+            )
+            self._worker.start()
+
+    def _send_pending(self):
+        while True:
+            counters = self._pending.get()
+            for (name, info), count in counters.items():
+                self._send(name, {**dict(info), "count": count})
+            self._pending.task_done()
+
+    def _send(self, name: str, properties: Dict[str, Any]):
         try:
             self._client.capture(
-                distinct_id=self.uid, event=name, properties=info
+                distinct_id=self.uid, event=name, properties=properties
             )
         except Exception as e:
             # This way it silences all thread level logging as well
             if _debug_telemetry():
                 logging.debug(f"Telemetry error: {e}")
 
+    def close(self, timeout: float = 1.0):
+        """Flush the counters and wait (a bounded time) for them to be sent."""
+        self.flush()
+        deadline = time.monotonic() + timeout
+        while self._pending.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if self._client_instance is not None:
+            try:
+                self._client_instance.flush()
+            except Exception:
+                pass
+
+
+class NoOpTelemetry:
+    """Telemetry used when tracking is disabled: every operation is free."""
+
+    enabled = False
+
+    def event(self, name: Optional[str] = None, info: Dict[str, Any] = {}):
+        # Leave the decorated function untouched
+        return lambda func: func
+
+    def log_event(self, name: str, info: Dict[str, Any] = {}, count: int = 1):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self, timeout: float = 1.0):
+        pass
 
-def telemetry_initializer() -> AnonymousTelemetry:
+
+def telemetry_initializer() -> Union[AnonymousTelemetry, NoOpTelemetry]:
     """
     This function is executed once per child process to initialize telemetry.
     """
     global telemetry
-    telemetry = AnonymousTelemetry()
+    if _do_not_track():
+        logger.debug("Telemetry is disabled")
+        telemetry = NoOpTelemetry()
+    else:
+        telemetry = AnonymousTelemetry()
     logger.debug("Telemetry reinitialized in child process.")
     return telemetry
 
 
 telemetry = telemetry_initializer()
+atexit.register(lambda: telemetry.close())
 
 
 def telemetry_event(name: Optional[str] = None, info: Dict[str, Any] = {}):
     global telemetry
 
     def decorator(func):
+        if not telemetry.enabled:
+            return func
+
+        def log(args):
+            telemetry.log_event(
+                name=name or args[0].__class__.__name__,
+                info={**info, "__qualname__": func.__qualname__},
+            )
+
+        if inspect.iscoroutinefunction(func):
+            # Flushed once the coroutine completes, not when created
+            @wraps(func)
+            async def awrapper(*args, **kwargs):
+                log(args)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    telemetry.flush()
+
+            return awrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            event_name = name or args[0].__class__.__name__
-            info["__qualname__"] = func.__qualname__
-            telemetry.log_event(name=event_name, info=info)
-
-            return func(*args, **kwargs)
+            log(args)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                telemetry.flush()
 
         return wrapper
 
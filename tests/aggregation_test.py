@@ -0,0 +1,52 @@
+import numpy as np
+
+from continuous_eval.metrics.base.aggregation import (
+    Accumulator,
+    MetricAggregator,
+)
+
+
+def test_accumulator_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=1000)
+    acc = Accumulator()
+    for chunk in np.array_split(values, 7):
+        acc.update(chunk)
+    assert acc.count == 1000
+    assert np.isclose(acc.mean, values.mean())
+    assert np.isclose(acc.variance, values.var(ddof=1))
+    assert acc.min == values.min() and acc.max == values.max()
+
+
+def test_accumulator_merge_shards():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(size=20_000)
+    shards = [Accumulator().update(x) for x in np.array_split(values, 4)]
+    merged = Accumulator()
+    for shard in shards:
+        merged.merge(shard)
+    assert merged.count == len(values)
+    assert np.isclose(merged.mean, values.mean())
+    assert np.isclose(merged.variance, values.var(ddof=1))
+    # Compressed sketch: approximate quantiles
+    q = merged.quantile([0.1, 0.5, 0.9])
+    assert np.allclose(q, np.quantile(values, [0.1, 0.5, 0.9]), atol=0.01)
+
+
+def test_small_sample_quantiles_are_exact():
+    acc = Accumulator().update([1, 2, 3, 4])
+    assert acc.quantile(0.5) == 2.5
+
+
+def test_metric_aggregator():
+    results = [
+        {"score": 1.0, "correct": True, "reasoning": "ok", "ids": [1, 2]},
+        {"score": 0.0, "correct": False, "reasoning": "ko", "ids": []},
+        {"__error__": {"type": "RuntimeError", "message": "", "attempts": 1}},
+    ]
+    agg = MetricAggregator().update(results[:1])
+    agg.merge(MetricAggregator().update(results[1:]))
+    assert agg.means() == {"score": 0.5, "correct": 0.5}
+    summary = agg.summary()
+    assert summary["score"]["count"] == 2
+    assert summary["score"]["max"] == 1.0
@@ -0,0 +1,682 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from continuous_eval.execution import (
+    active_executors,
+    get_executor,
+    shutdown_executors,
+)
+from continuous_eval.eval import Dataset, EvaluationRunner, SingleModulePipeline
+from continuous_eval.eval.tests import (
+    GreaterOrEqualThan,
+    MeanGreaterOrEqualThan,
+)
+from continuous_eval.metrics.base import Cascade, Field, Metric, RetryPolicy
+from continuous_eval.metrics.base.concurrency import AdaptiveConcurrency
+from continuous_eval.metrics.base.instrumentation import Usage, record_tokens
+
+
+class SleepyMetric(Metric):
+    """Simulate an IO-bound metric (e.g., an LLM judge)."""
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__(is_cpu_bound=False)
+        self.show_progress = False
+        self.delay = delay
+
+    def compute(self, answer: str, **kwargs):
+        time.sleep(self.delay)
+        return {"answer_length": len(answer)}
+
+    @property
+    def schema(self):
+        return {"answer_length": Field(type=int)}
+
+
+class AsyncSleepyMetric(SleepyMetric):
+    """Simulate an IO-bound metric with a native async client."""
+
+    async def acompute(self, answer: str, **kwargs):
+        await asyncio.sleep(self.delay)
+        return {"answer_length": len(answer)}
+
+
+def test_abatch_native_async_is_bounded_by_semaphore():
+    counts = {"now": 0, "peak": 0}
+    metric = InFlightMetric(counts, "M")
+    answers = ["x" * i for i in range(200)]
+    results = asyncio.run(metric.abatch(max_concurrency=50, answer=answers))
+    assert [r["answer_length"] for r in results] == list(range(200))
+    # As many items in flight as allowed, no more
+    assert counts["peak"] == 50
+
+
+def test_abatch_sync_metric_fallback():
+    metric = SleepyMetric(delay=0.01)
+    answers = ["a", "bb", "ccc"]
+    results = asyncio.run(metric.abatch(max_concurrency=2, answer=answers))
+    assert results == [{"answer_length": n} for n in (1, 2, 3)]
+
+
+def test_aevaluate_inside_running_loop():
+    dataset = Dataset.from_data(
+        [{"answer": "a" * i} for i in range(1, 6)]  # type: ignore
+    )
+    pipeline = SingleModulePipeline(
+        dataset=dataset,
+        eval=[AsyncSleepyMetric(delay=0.01).use(answer=dataset.answer)],  # type: ignore
+    )
+    runner = EvaluationRunner(pipeline)
+
+    async def main():
+        return await runner.aevaluate(max_concurrency=8)
+
+    results = asyncio.run(main())
+    samples = results.samples["eval"]["AsyncSleepyMetric"]
+    assert [s["answer_length"] for s in samples] == [1, 2, 3, 4, 5]
+
+
+class InFlightMetric(AsyncSleepyMetric):
+    """Tracks the samples in flight, across the instances sharing `counts`."""
+
+    def __init__(self, counts: dict, name: str):
+        super().__init__(delay=0.01)
+        self.counts = counts
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    async def acompute(self, answer: str, **kwargs):
+        self.counts["now"] += 1
+        self.counts["peak"] = max(self.counts["peak"], self.counts["now"])
+        try:
+            return await super().acompute(answer, **kwargs)
+        finally:
+            self.counts["now"] -= 1
+
+
+def test_aevaluate_shares_the_concurrency_limit():
+    counts = {"now": 0, "peak": 0}
+    dataset = Dataset.from_data([{"answer": "x" * i} for i in range(40)])  # type: ignore
+    metrics = [InFlightMetric(counts, f"M{i}") for i in range(3)]
+    pipeline = SingleModulePipeline(
+        dataset=dataset,
+        eval=[metric.use(answer=dataset.answer) for metric in metrics],  # type: ignore
+    )
+
+    async def main():
+        return await EvaluationRunner(pipeline).aevaluate(max_concurrency=4)
+
+    # Three metrics, at most 4 samples in flight among them
+    results = asyncio.run(main())
+    assert counts["peak"] == 4
+    for metric in metrics:
+        samples = results.samples["eval"][metric.name]
+        assert [s["answer_length"] for s in samples] == list(range(40))
+
+    counts["peak"] = 0
+    answers = ["x" * i for i in range(40)]
+    results = asyncio.run(metrics[0].abatch(max_concurrency=3, answer=answers))
+    assert counts["peak"] == 3
+    assert [r["answer_length"] for r in results] == list(range(40))
+
+
+class JitteryMetric(SleepyMetric):
+    """Later items finish first, to exercise out-of-order completion."""
+
+    def compute(self, answer: str, **kwargs):
+        time.sleep(0.02 / (1 + len(answer)))
+        return {"answer_length": len(answer)}
+
+
+def test_batch_preserves_input_order():
+    metric = JitteryMetric()
+    answers = ["x" * i for i in range(50)]
+    results = metric.batch(answer=answers)
+    assert [r["answer_length"] for r in results] == list(range(50))
+
+
+class LazyColumn:
+    """Lazily indexed column that records how far it has been read."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.consumed = []
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        self.consumed.append(idx)
+        return "x"
+
+
+def test_stream_bounded_window():
+    metric = SleepyMetric(delay=0.0)
+    metric.max_workers = 2
+    column = LazyColumn(1000)
+    stream = metric.stream(answer=column)
+    _, res = next(stream)
+    assert res == {"answer_length": 1}
+    assert len(column.consumed) <= 5
+    stream.close()
+    seen = sorted(i for i, _ in metric.stream(answer=["a", "bb", "ccc"]))
+    assert seen == [0, 1, 2]
+
+
+def test_shared_executor_registry():
+    shutdown_executors()
+    executor = get_executor("thread", 3)
+    assert get_executor("thread", 3) is executor
+    metric = SleepyMetric(delay=0.0)
+    metric.max_workers = 3
+    metric.batch(answer=["a", "b"])
+    metric.batch(answer=["c"])
+    assert list(active_executors()) == [("thread", 3)]
+    shutdown_executors()
+    assert not active_executors()
+    assert get_executor("thread", 3) is not executor
+    shutdown_executors()
+
+
+class SquareMetric(Metric):
+    """A CPU-bound metric evaluated in the process pool."""
+
+    def __init__(self):
+        super().__init__(is_cpu_bound=True)
+        self.show_progress = False
+
+    def compute(self, x: int, **kwargs):
+        return {"square": x * x}
+
+    @property
+    def schema(self):
+        return {"square": Field(type=int)}
+
+
+def test_process_pool_chunks():
+    metric = SquareMetric()
+    metric.max_workers = 2
+    xs = list(range(500))
+    results = metric.batch(x=xs)
+    assert [r["square"] for r in results] == [x * x for x in xs]
+    # A second run reuses the warm workers and their cached metric
+    results = metric.batch(x=xs[:10])
+    assert [r["square"] for r in results] == [x * x for x in xs[:10]]
+    shutdown_executors()
+
+
+class FlakyMetric(SleepyMetric):
+    """
+    Fails on answers marked as bad, succeeds after `flaky` attempts. Failures
+    are connection errors (transient) unless `error` is given.
+    """
+
+    def __init__(self, flaky: int = 0, error: type = ConnectionError):
+        super().__init__(delay=0.0)
+        self.flaky = flaky
+        self.error = error
+        self.calls = dict()
+
+    def compute(self, answer: str, **kwargs):
+        self.calls[answer] = self.calls.get(answer, 0) + 1
+        if answer == "bad" or self.calls[answer] <= self.flaky:
+            raise self.error(f"cannot score {answer}")
+        return {"answer_length": len(answer)}
+
+
+def test_batch_isolates_failures():
+    metric = FlakyMetric()
+    metric.with_retry_policy(RetryPolicy(max_attempts=2, backoff=0))
+    answers = ["a", "bad", "ccc"]
+    results = metric.batch(answer=answers)
+    assert results[0] == {"answer_length": 1}
+    assert results[2] == {"answer_length": 3}
+    assert metric.failed_indices(results) == [1]
+    assert results[1]["__error__"]["type"] == "ConnectionError"
+    assert results[1]["__error__"]["attempts"] == 2
+    # Only the failed sample is recomputed
+    assert metric.calls == {"a": 1, "bad": 2, "ccc": 1}
+    assert metric.aggregate(results) == {"answer_length": 2.0}
+    answers[1] = "bb"
+    results = metric.rerun_failed(results, answer=answers)
+    assert [r["answer_length"] for r in results] == [1, 2, 3]
+    assert metric.calls == {"a": 1, "bad": 2, "ccc": 1, "bb": 1}
+
+
+def test_retry_transient_failures():
+    metric = FlakyMetric(flaky=1)
+    metric.with_retry_policy(RetryPolicy(max_attempts=2, backoff=0))
+    results = metric.batch(answer=["a", "bb"])
+    assert metric.failed_indices(results) == []
+    results = asyncio.run(metric.abatch(answer=["ccc"]))
+    assert results == [{"answer_length": 3}]
+
+
+def test_only_transient_failures_are_retried_by_default():
+    metric = FlakyMetric(flaky=1, error=ValueError)
+    metric.with_retry_policy(RetryPolicy(max_attempts=2, backoff=0))
+    results = metric.batch(answer=["a"])
+    assert results[0]["__error__"]["attempts"] == 1
+    metric = FlakyMetric(flaky=1, error=ValueError)
+    metric.with_retry_policy(
+        RetryPolicy(max_attempts=2, backoff=0, retry_on=(Exception,))
+    )
+    assert metric.batch(answer=["a"]) == [{"answer_length": 1}]
+
+
+def test_batch_and_evaluate_from_dataframe():
+    import pandas as pd
+
+    df = pd.DataFrame({"response": ["a", "bb", "ccc"], "other": [1, 2, 3]})
+    metric = SleepyMetric(delay=0.0)
+    results = metric.batch(df, column_mapping={"answer": "response"})
+    assert [r["answer_length"] for r in results] == [1, 2, 3]
+
+    flaky = FlakyMetric().with_retry_policy(RetryPolicy(max_attempts=1))
+    df["response"] = ["a", "bad", "ccc"]
+    results = flaky.batch(df, column_mapping={"answer": "response"})
+    assert flaky.failed_indices(results) == [1]
+    df["response"] = ["a", "bb", "ccc"]
+    results = flaky.rerun_failed(
+        results, df, column_mapping={"answer": "response"}
+    )
+    assert [r["answer_length"] for r in results] == [1, 2, 3]
+    assert flaky.calls == {"a": 1, "bad": 1, "ccc": 1, "bb": 1}
+
+    dataset = Dataset.from_data([{"answer": "x"}])  # type: ignore
+    pipeline = SingleModulePipeline(
+        dataset=dataset,
+        eval=[SleepyMetric(delay=0.0).use(answer=dataset.answer)],  # type: ignore
+    )
+    runner = EvaluationRunner(pipeline)
+    metrics = runner.evaluate(
+        df.rename(columns={"response": "answer"}), column_mapping=None
+    )
+    samples = metrics.samples["eval"]["SleepyMetric"]
+    assert [s["answer_length"] for s in samples] == [1, 2, 3]
+
+
+class TokenMetric(SleepyMetric):
+    """Reports a token usage per sample, like an LLM metric."""
+
+    def compute(self, answer: str, **kwargs):
+        record_tokens(10 * len(answer))
+        return {"answer_length": len(answer)}
+
+
+def test_instrumentation():
+    metric = FlakyMetric(flaky=1)
+    metric.with_retry_policy(RetryPolicy(max_attempts=2, backoff=0))
+    records = []
+    metric.add_callback(lambda name, record: records.append((name, record)))
+    metric.batch(answer=["a", "bad", "ccc"])
+    stats = metric.stats.summary()
+    assert stats["items"] == 3
+    assert stats["errors"] == 1
+    assert stats["retries"] == 3
+    assert stats["items_per_sec"] > 0
+    assert set(stats["latency"]) == {"mean", "p50", "p95", "p99"}
+    assert sorted(r.index for _, r in records) == [0, 1, 2]
+    assert {name for name, _ in records} == {"FlakyMetric"}
+
+    asyncio.run(TokenMetric().abatch(answer=["a", "bb"]))
+    dataset = Dataset.from_data([{"answer": "a"}, {"answer": "bb"}])  # type: ignore
+    pipeline = SingleModulePipeline(
+        dataset=dataset,
+        eval=[TokenMetric(delay=0.0).use(answer=dataset.answer)],  # type: ignore
+    )
+    metrics = EvaluationRunner(pipeline).evaluate()
+    run_stats = json.loads(metrics.run_stats_json())
+    assert run_stats["eval"]["TokenMetric"]["tokens"] == 30
+    assert run_stats["eval"]["TokenMetric"]["tokens_per_sec"] > 0
+    usage = metrics.usage()["eval"]
+    assert usage["TokenMetric"]["tokens"] == 30
+    assert usage["total"]["requests"] == 0
+    assert usage["total"]["cost"] is None
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class ProviderMetric(SleepyMetric):
+    """Simulated provider that rejects requests beyond its capacity."""
+
+    def __init__(self, capacity: int):
+        super().__init__(delay=0.005)
+        self.capacity = capacity
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def compute(self, answer: str, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            overloaded = self.in_flight > self.capacity
+        try:
+            if overloaded:
+                raise RateLimitError("429 Too Many Requests")
+            time.sleep(self.delay)
+            return {"answer_length": len(answer)}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_usage_split_adds_up():
+    usage = Usage(
+        prompt_tokens=1001, completion_tokens=5, latency=0.3, requests=1
+    )
+    shares = usage.split(3)
+    assert [s.prompt_tokens for s in shares] == [334, 334, 333]
+    assert [s.completion_tokens for s in shares] == [2, 2, 1]
+    assert [s.requests for s in shares] == [1, 0, 0]
+    total = Usage()
+    for share in shares:
+        total.add(share)
+    assert total.tokens == usage.tokens
+    assert total.latency == pytest.approx(usage.latency)
+
+
+def test_adaptive_concurrency_converges():
+    metric = ProviderMetric(capacity=6)
+    metric.with_retry_policy(RetryPolicy(max_attempts=20, backoff=0.005))
+    metric.with_adaptive_concurrency(
+        AdaptiveConcurrency(initial=2, max_limit=32)
+    )
+    results = metric.batch(answer=["x"] * 400)
+    assert metric.failed_indices(results) == []
+    concurrency = metric.stats.summary()["concurrency"]
+    assert concurrency["cuts"] > 0
+    assert 2 <= concurrency["limit"] <= 12, concurrency
+    assert concurrency["peak"] > 6
+
+    results = asyncio.run(metric.abatch(answer=["x"] * 100))
+    assert metric.failed_indices(results) == []
+    assert metric.stats.summary()["concurrency"]["limit"] <= 12
+
+
+def test_adaptive_concurrency_is_opt_in():
+    metric = SleepyMetric()
+    assert metric.concurrency is None
+    # Starts from the fixed window it replaces
+    metric.with_adaptive_concurrency()
+    assert metric.concurrency.limit == metric.max_workers  # type: ignore
+
+
+class CountingMetric(SleepyMetric):
+    """Counts the samples actually computed."""
+
+    def __init__(self, delay: float = 0.0, scale: int = 1):
+        super().__init__(delay=delay)
+        self.scale = scale
+        self.computed = []
+
+    def compute(self, answer: str, **kwargs):
+        self.computed.append(answer)
+        return {"answer_length": self.scale * len(answer)}
+
+
+def test_result_cache(tmp_path):
+    cache_path = tmp_path / "results.sqlite"
+    answers = ["a", "bb", "a", "ccc", "bb"]
+    metric = CountingMetric().with_result_cache(cache_path)
+    results = metric.batch(answer=answers)
+    assert [r["answer_length"] for r in results] == [1, 2, 1, 3, 2]
+    # Duplicate rows are computed once
+    assert sorted(metric.computed) == ["a", "bb", "ccc"]
+    assert metric.stats.summary()["result_cache"] == {
+        "hits": 0,
+        "misses": 3,
+        "duplicates": 2,
+        "unstored": 0,
+    }
+
+    # A new run (new metric, same configuration) only computes the new row
+    metric = CountingMetric().with_result_cache(cache_path)
+    results = asyncio.run(metric.abatch(answer=answers + ["dddd"]))
+    assert [r["answer_length"] for r in results] == [1, 2, 1, 3, 2, 4]
+    assert metric.computed == ["dddd"]
+
+    # A different configuration is a different fingerprint
+    assert metric.asdict()["params"] == {"delay": 0.0, "scale": 1}
+    other = CountingMetric(scale=2).with_result_cache(cache_path)
+    assert other.fingerprint() != metric.fingerprint()
+    assert other.batch(answer=["a"]) == [{"answer_length": 2}]
+    assert other.computed == ["a"]
+
+
+class ProbabilitiesMetric(CountingMetric):
+    """Results that JSON would not round-trip: int keys and tuples."""
+
+    def compute(self, answer: str, **kwargs):
+        self.computed.append(answer)
+        if answer == "lambda":
+            return {"answer_length": 6, "fn": lambda: None}
+        return {"probabilities": {1: 0.25, 3: 0.75}, "span": (0, len(answer))}
+
+
+def test_result_cache_round_trip(tmp_path):
+    cache_path = tmp_path / "results.sqlite"
+    answers = ["a", "bb", "lambda"]
+    metric = ProbabilitiesMetric().with_result_cache(cache_path)
+    cold = metric.batch(answer=answers)
+    metric = ProbabilitiesMetric().with_result_cache(cache_path)
+    warm = metric.batch(answer=answers)
+    assert warm[:2] == cold[:2]
+    assert warm[1] == {"probabilities": {1: 0.25, 3: 0.75}, "span": (0, 2)}
+    # Results that can not be stored are counted, and computed again
+    assert metric.computed == ["lambda"]
+    assert metric.stats.summary()["result_cache"]["unstored"] == 1
+
+
+def test_evaluate_with_result_cache(tmp_path):
+    def run(rows):
+        dataset = Dataset.from_data([{"answer": a} for a in rows])  # type: ignore
+        metric = CountingMetric().use(answer=dataset.answer)  # type: ignore
+        pipeline = SingleModulePipeline(dataset=dataset, eval=[metric])
+        runner = EvaluationRunner(pipeline, result_cache=tmp_path / "r.sqlite")
+        samples = runner.evaluate().samples["eval"]["CountingMetric"]
+        return [s["answer_length"] for s in samples], metric.computed
+
+    assert run(["a", "bb", "ccc"]) == ([1, 2, 3], ["a", "bb", "ccc"])
+    assert run(["a", "bb", "cccc"]) == ([1, 2, 4], ["cccc"])
+
+
+class LengthScore(SleepyMetric):
+    """Cheap tier: confident on very short and very long answers."""
+
+    def compute(self, answer: str, **kwargs):
+        return {"length_score": len(answer) / 10}
+
+
+class JudgeMetric(CountingMetric):
+    """Expensive tier, with an argument of its own."""
+
+    def compute(self, answer: str, question: str, **kwargs):
+        self.computed.append(answer)
+        return {"judge_score": float(question.endswith("?"))}
+
+
+def test_cascade():
+    answers = ["a", "abcde", "abcdefghij", "ab", "abcdef"]
+    questions = ["Why?", "Why?", "Why?", "Why?", "Why"]
+    judge = JudgeMetric()
+    cascade = Cascade(
+        LengthScore(delay=0.0),
+        judge,
+        field="length_score",
+        accept=0.8,
+        reject=0.2,
+        judge_field="judge_score",
+    )
+    results = cascade.batch(answer=answers, question=questions)
+    # Only the samples in the uncertain band reach the judge
+    assert sorted(judge.computed) == ["abcde", "abcdef"]
+    assert [r["Cascade_tier"] for r in results] == [
+        "cheap",
+        "judge",
+        "cheap",
+        "cheap",
+        "judge",
+    ]
+    assert [r["Cascade_verdict"] for r in results] == [
+        False,
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert results[1]["judge_score"] == 1.0
+    assert "judge_score" not in results[0]
+    assert cascade.stats.summary()["cascade"] == {
+        "escalated": 2,
+        "escalation_rate": 0.4,
+    }
+    async_results = asyncio.run(
+        cascade.abatch(answer=answers, question=questions)
+    )
+    assert async_results == results
+
+    dataset = Dataset.from_data(
+        [{"answer": a, "question": q} for a, q in zip(answers, questions)]
+    )  # type: ignore
+    pipeline = SingleModulePipeline(
+        dataset=dataset,
+        eval=[
+            cascade.use(
+                answer=dataset.answer, question=dataset.question  # type: ignore
+            )
+        ],
+    )
+    metrics = EvaluationRunner(pipeline).evaluate()
+    samples = metrics.samples["eval"]["Cascade"]
+    assert samples == results
+    assert metrics.aggregate()["eval"]["Cascade_verdict"] == 0.4
+
+
+def test_sequential_estimate():
+    answers = ["x" * (i % 10 + 1) for i in range(1000)]
+    dataset = Dataset.from_data([{"answer": a} for a in answers])  # type: ignore
+    metric = SleepyMetric(delay=0.0).use(answer=dataset.answer)  # type: ignore
+    runner = EvaluationRunner(
+        SingleModulePipeline(dataset=dataset, eval=[metric])
+    )
+    metrics = runner.estimate(
+        targets={"answer_length": 0.5}, batch_size=50, seed=0
+    )
+    sampling = metrics.sampling
+    assert sampling["stop_reason"] == "converged"
+    assert 100 <= sampling["samples"] <= 200
+    estimate = sampling["estimates"]["eval"]["answer_length"]
+    assert estimate["half_width"] <= 0.5
+    assert abs(estimate["mean"] - 5.5) <= 2 * estimate["half_width"]
+    samples = metrics.samples["eval"]["SleepyMetric"]
+    assert [s["answer_length"] for s in samples] == [
+        len(answers[idx]) for idx in sampling["indices"]
+    ]
+    assert metrics.run_stats["eval"]["SleepyMetric"]["items"] == len(samples)
+
+    metrics = runner.estimate(
+        targets={"answer_length": 1e-6}, batch_size=50, max_samples=120
+    )
+    assert metrics.sampling["stop_reason"] == "max_samples"
+    assert metrics.sampling["samples"] == 120
+
+    # A zero budget draws nothing, a negative one is rejected
+    metrics = runner.estimate(targets={"answer_length": 0.5}, max_samples=0)
+    assert metrics.sampling["samples"] == 0
+    assert metrics.sampling["stop_reason"] == "max_samples"
+    with pytest.raises(ValueError):
+        runner.estimate(targets={"answer_length": 0.5}, max_samples=-1)
+
+
+def test_gate_stops_once_tests_are_decided():
+    def gate(answers, tests, metric=None):
+        dataset = Dataset.from_data([{"answer": a} for a in answers])  # type: ignore
+        metric = (metric or CountingMetric()).use(answer=dataset.answer)  # type: ignore
+        pipeline = SingleModulePipeline(
+            dataset=dataset, eval=[metric], tests=tests
+        )
+        return EvaluationRunner(pipeline).gate(batch_size=10), metric
+
+    answers = ["xx"] * 100
+    answers[15] = "x"
+    # Fails in the second batch, the other 80 samples are never scored
+    results, metric = gate(
+        answers, [GreaterOrEqualThan("min", "answer_length", 2)]
+    )
+    assert results.results == {"eval": {"min": False}}
+    assert results.scored == {"eval": 20}
+    assert len(metric.computed) == 20
+
+    # The mean of 3-char answers bounded in [0, 3] passes 1.5 at half-way
+    results, metric = gate(
+        ["xxx"] * 100,
+        [MeanGreaterOrEqualThan("mean", "answer_length", 1.5, bounds=(0, 3))],
+    )
+    assert results.results == {"eval": {"mean": True}}
+    assert results.scored == {"eval": 50}
+
+    # Without bounds, the mean needs every sample
+    results, _ = gate(
+        ["xxx"] * 30, [MeanGreaterOrEqualThan("mean", "answer_length", 1.5)]
+    )
+    assert results.results == {"eval": {"mean": True}}
+    assert results.scored == {"eval": 30}
+
+    # Bounds default to the limits of the metric field
+    class BoundedMetric(CountingMetric):
+        @property
+        def schema(self):
+            return {"answer_length": Field(type=int, limits=(0, 3))}
+
+    results, _ = gate(
+        ["xxx"] * 100,
+        [MeanGreaterOrEqualThan("mean", "answer_length", 1.5)],
+        metric=BoundedMetric(),
+    )
+    assert results.results == {"eval": {"mean": True}}
+    assert results.scored == {"eval": 50}
+
+    # A sample whose computation failed fails the tests
+    answers = ["xxx"] * 30
+    answers[12] = "bad"
+    failing = FlakyMetric().with_retry_policy(
+        RetryPolicy(max_attempts=1, backoff=0)
+    )
+    results, _ = gate(
+        answers,
+        [
+            GreaterOrEqualThan("min", "answer_length", 1),
+            MeanGreaterOrEqualThan("mean", "answer_length", 1.5),
+        ],
+        metric=failing,
+    )
+    assert results.results == {"eval": {"min": False, "mean": False}}
+    assert results.scored == {"eval": 20}
+
+
+def test_failed_samples_fail_the_tests():
+    answers = ["xxx"] * 10
+    answers[3] = "bad"
+    dataset = Dataset.from_data([{"answer": a} for a in answers])  # type: ignore
+    metric = FlakyMetric().with_retry_policy(RetryPolicy(max_attempts=1))
+    pipeline = SingleModulePipeline(
+        dataset=dataset,
+        eval=[metric.use(answer=dataset.answer)],  # type: ignore
+        tests=[
+            GreaterOrEqualThan("min", "answer_length", 1),
+            MeanGreaterOrEqualThan("mean", "answer_length", 1.5),
+        ],
+    )
+    runner = EvaluationRunner(pipeline)
+    results = runner.test(runner.evaluate())
+    # Not skipped: the error record has no value for the tested field
+    assert results.results == {"eval": {"min": False, "mean": False}}
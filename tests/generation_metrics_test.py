@@ -1,3 +1,10 @@
+import asyncio
+import math
+import re
+
+import pytest
+
+from continuous_eval.llms.cache import configure_cache
 from continuous_eval.metrics.generation.text import (
     AnswerCorrectness,
     AnswerRelevance,
@@ -8,6 +15,14 @@ from continuous_eval.metrics.generation.text import (
     StyleConsistency,
 )
 from tests.helpers import example_datum
+from continuous_eval.metrics.base import Packing
+from tests.helpers.fake_openai import (
+    FakeOpenAI,
+    packed_completion,
+    score_completion,
+    score_first_completion,
+    yes_no_completion,
+)
 from tests.helpers.utils import all_close, validate_metric_metadata
 
 
@@ -106,6 +121,161 @@ def test_llm_based_style_consistency():
     validate_metric_metadata(metric, results)
 
 
+def test_fast_mode_reads_score_token(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    configure_cache(enabled=False)
+    top_logprobs = {"4": math.log(0.6), "5": math.log(0.3), "3": math.log(0.1)}
+    metric = AnswerCorrectness(fast=True)
+    metric._client = FakeOpenAI(
+        lambda request: score_first_completion(4, top_logprobs)
+    )
+    result = metric(**example_datum.CAPITAL_OF_FRANCE)
+    # The "score" key split across tokens
+    split = AnswerCorrectness(fast=True)
+    split._client = FakeOpenAI(
+        lambda request: score_first_completion(4, top_logprobs, split_keys=True)
+    )
+    assert split(**example_datum.CAPITAL_OF_FRANCE) == result
+    configure_cache()
+    (request,) = metric._client.requests
+    schema = request["response_format"]["json_schema"]["schema"]
+    assert list(schema["properties"]) == ["score"]
+    assert schema["properties"]["score"]["enum"] == [1, 2, 3, 4, 5]
+    assert request["max_tokens"] <= 8
+    # Weighted over the categories: 0.1 * 0.5 + 0.6 * 0.75 + 0.3 * 1
+    assert result["correctness"] == pytest.approx(0.8)
+    assert result["reasoning"] == ""
+
+
+def _relevance(user_prompt: str):
+    # Relevant when the answer mentions Paris, with a confidence depending
+    # on the prompt
+    text = user_prompt.strip()
+    score = 3 if "Paris" in text else 1
+    top_logprobs = {"1": -2.5, "2": -3.0, "3": -2.5}
+    top_logprobs[str(score)] = -0.1 - (len(text) % 7) / 10
+    return score, top_logprobs
+
+
+def _relevance_judge(request):
+    user_prompt = request["messages"][1]["content"]
+    if isinstance(request["response_format"], dict):
+        samples = re.split(r"### sample_\d+\n", user_prompt)[1:]
+        return packed_completion([_relevance(s) for s in samples])
+    return score_completion(*_relevance(user_prompt))
+
+
+_RELEVANCE_DATA = dict(
+    question=[f"What is the capital of France? ({i})" for i in range(10)],
+    answer=[
+        "Paris is the capital." if i % 3 else "Lyon, probably." * i
+        for i in range(10)
+    ],
+)
+
+
+def test_packing_parity(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    configure_cache(enabled=False)
+    reference = AnswerRelevance()
+    reference._client = FakeOpenAI(_relevance_judge)
+    packed = AnswerRelevance().with_packing(Packing(max_samples=4))
+    packed._client = FakeOpenAI(_relevance_judge)
+    expected = reference.batch(**_RELEVANCE_DATA)
+    results = packed.batch(**_RELEVANCE_DATA)
+    configure_cache()
+    assert len(packed._client.requests) == 3
+    for result, reference_result in zip(results, expected):
+        assert result["relevance"] == pytest.approx(
+            reference_result["relevance"]
+        )
+    assert packed.stats.extra["packing"]["fallbacks"] == 0
+
+
+def test_packing_reads_scores_split_across_tokens(monkeypatch):
+    def respond(request):
+        user_prompt = request["messages"][1]["content"]
+        samples = re.split(r"### sample_\d+\n", user_prompt)[1:]
+        return packed_completion(
+            [_relevance(s) for s in samples], split_keys=True
+        )
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    configure_cache(enabled=False)
+    reference = AnswerRelevance()
+    reference._client = FakeOpenAI(_relevance_judge)
+    packed = AnswerRelevance().with_packing(Packing(max_samples=4))
+    packed._client = FakeOpenAI(respond)
+    expected = reference.batch(**_RELEVANCE_DATA)
+    results = packed.batch(**_RELEVANCE_DATA)
+    configure_cache()
+    assert len(packed._client.requests) == 3
+    assert packed.stats.extra["packing"]["fallbacks"] == 0
+    for result, reference_result in zip(results, expected):
+        assert result["relevance"] == pytest.approx(
+            reference_result["relevance"]
+        )
+
+
+def test_packing_fallback(monkeypatch):
+    # Unreadable packed responses: the samples are judged one by one
+    def respond(request):
+        if isinstance(request["response_format"], dict):
+            return packed_completion([(3, {"1": -2.0, "3": -0.1})])
+        return _relevance_judge(request)
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    configure_cache(enabled=False)
+    metric = AnswerRelevance().with_packing(Packing(max_samples=5))
+    metric._client = FakeOpenAI(respond)
+    results = metric.batch(**_RELEVANCE_DATA)
+    configure_cache()
+    assert len(metric._client.requests) == 2 + 10
+    assert metric.stats.extra["packing"]["fallbacks"] == 10
+    assert [r["relevance"] > 0.5 for r in results] == [
+        "Paris" in answer for answer in _RELEVANCE_DATA["answer"]
+    ]
+
+
+def test_escalation_to_stronger_model(monkeypatch):
+    # The small model is unsure unless the answer mentions Paris, the
+    # stronger one disagrees with it
+    def respond(request):
+        if request["model"] == "gpt-4o":
+            return yes_no_completion("no")
+        if "Paris" in request["messages"][1]["content"]:
+            return yes_no_completion("yes")
+        return yes_no_completion("yes", confidence=-2.0)
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    configure_cache(enabled=False)
+    metric = Faithfulness().with_escalation("openai:gpt-4o", threshold=0.8)
+    metric._client = FakeOpenAI(respond)
+    data = dict(
+        retrieved_context=[["The capital of France."]] * 4,
+        answer=["Paris.", "Lyon.", "It is Paris.", "Nice."],
+    )
+    results = metric.batch(**data)
+    # The async path escalates the same judgments
+    metric._aclient = FakeOpenAI(respond, is_async=True)
+    assert asyncio.run(metric.abatch(**data)) == results
+    assert len(metric._aclient.requests) == 6
+    configure_cache()
+    models = [request["model"] for request in metric._client.requests]
+    assert sorted(models) == ["gpt-4o"] * 2 + ["gpt-4o-mini"] * 4
+    assert [r["faithfulness"] > 0.5 for r in results] == [
+        True,
+        False,
+        True,
+        False,
+    ]
+    escalation = metric.stats.summary()["escalation"]
+    assert escalation["judgments"] == 4
+    assert escalation["escalation_rate"] == 0.5
+    assert escalation["agreement"] == 0.0
+    assert metric.fingerprint() != Faithfulness().fingerprint()
+
+
 def test_flesch_kincaid():
     expected = {
         "flesch_reading_ease": 116.14500000000001,
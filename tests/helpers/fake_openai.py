@@ -0,0 +1,212 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from openai.types.chat import ChatCompletion
+
+
+def completion(content: str, logprobs: List[Dict]) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "cmpl",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                    "logprobs": {"content": logprobs},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 10,
+                "completion_tokens": 5,
+                "total_tokens": 15,
+            },
+        }
+    )
+
+
+def yes_no_token(verdict: str, confidence: float = -0.1) -> Dict:
+    other = "no" if verdict == "yes" else "yes"
+    return {
+        "token": verdict,
+        "logprob": confidence,
+        "top_logprobs": [
+            {"token": verdict, "logprob": confidence},
+            {"token": other, "logprob": -2.4},
+        ],
+    }
+
+
+def yes_no_completion(verdict: str, confidence: float = -0.1) -> ChatCompletion:
+    content = json.dumps({"reasoning": "ok", "score": verdict})
+    return completion(content, [yes_no_token(verdict, confidence)])
+
+
+class FakeOpenAI:
+    """
+    Stand-in for the (sync or async) OpenAI client of a ProbabilisticMetric:
+    `respond` maps the request to a ChatCompletion, after `delay` seconds.
+    `peak` is the largest number of requests seen in flight at once.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[Dict], ChatCompletion],
+        delay: float = 0.0,
+        is_async: bool = False,
+    ):
+        self.respond = respond
+        self.delay = delay
+        self.is_async = is_async
+        self.requests: List[Dict] = list()
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self.beta = self
+        self.chat = self
+        self.completions = self
+
+    def _record(self, request: Dict):
+        with self._lock:
+            self.requests.append(request)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def parse(self, **request):
+        if self.is_async:
+            return self._aparse(**request)
+        self._record(request)
+        try:
+            time.sleep(self.delay)
+        finally:
+            self._done()
+        return self.respond(request)
+
+    async def _aparse(self, **request):
+        self._record(request)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._done()
+        return self.respond(request)
+
+    # Score-first requests go through `chat.completions.create`
+    create = parse
+
+
+def verdicts_completion(
+    verdicts: List[str], confidences: List[float], split_keys: bool = False
+) -> ChatCompletion:
+    # Tokenized like a structured output: the verdicts are single tokens.
+    # With `split_keys`, the keys are split across tokens.
+    content = json.dumps({"reasoning": "yes, see below", "verdicts": verdicts})
+    keys = (
+        ['{"reason', 'ing":"', ', see below","verd', 'icts":["']
+        if split_keys
+        else [
+            '{"',
+            "reasoning",
+            '":"',
+            ", see below",
+            '","',
+            "verdicts",
+            '":["',
+        ]
+    )
+    tokens = [
+        {"token": token, "logprob": 0.0, "top_logprobs": []} for token in keys
+    ]
+    # A "yes" in the reasoning, before the verdicts
+    tokens.insert(2 if split_keys else 3, yes_no_token("yes", -0.01))
+    for i, (verdict, confidence) in enumerate(zip(verdicts, confidences)):
+        if i > 0:
+            tokens.append({"token": '","', "logprob": 0.0, "top_logprobs": []})
+        tokens.append(yes_no_token(verdict, confidence))
+    tokens.append({"token": '"]}', "logprob": 0.0, "top_logprobs": []})
+    return completion(content, tokens)
+
+
+def _plain(token: str) -> Dict:
+    return {"token": token, "logprob": 0.0, "top_logprobs": []}
+
+
+def score_token(score, top_logprobs: Dict[str, float]) -> Dict:
+    return {
+        "token": json.dumps(score),
+        "logprob": top_logprobs[str(score)],
+        "top_logprobs": [
+            {"token": token, "logprob": logprob}
+            for token, logprob in top_logprobs.items()
+        ],
+    }
+
+
+def score_completion(score, top_logprobs: Dict[str, float]) -> ChatCompletion:
+    content = json.dumps({"reasoning": "ok", "score": score})
+    return completion(content, [score_token(score, top_logprobs)])
+
+
+def score_first_completion(
+    score, top_logprobs: Dict, split_keys: bool = False
+) -> ChatCompletion:
+    # Capped right after the score, like a fast mode response
+    value = json.dumps(score)
+    keys = ['{"sc', 'ore":'] if split_keys else ['{"', "score", '":']
+    tokens = [_plain(token) for token in keys]
+    tokens.append(score_token(score, top_logprobs))
+    content = '{"score":' + value
+    response = completion(content, tokens)
+    response.choices[0].finish_reason = "length"
+    return response
+
+
+def packed_completion(
+    scores: List[Tuple[Any, Dict[str, float]]], split_keys: bool = False
+) -> ChatCompletion:
+    # Keyed evaluations of a packed request, reasoning first. With
+    # `split_keys`, the keys are split across tokens along with punctuation
+    # and the reasoning mentions the score.
+    reasoning = "the score is" if split_keys else "ok"
+    content = json.dumps(
+        {
+            f"sample_{i + 1}": {"reasoning": reasoning, "score": score}
+            for i, (score, _) in enumerate(scores)
+        }
+    )
+    tokens = list()
+    for i, (score, top_logprobs) in enumerate(scores):
+        if split_keys:
+            tokens += [
+                _plain('{"sample_' if i == 0 else '},"sample_'),
+                _plain(f'{i + 1}":{{"reason'),
+                _plain('ing":"the'),
+                _plain(" score"),
+                _plain(' is","sc'),
+                _plain('ore":'),
+                score_token(score, top_logprobs),
+            ]
+            continue
+        tokens += [
+            _plain('{"' if i == 0 else '},"'),
+            _plain(f"sample_{i + 1}"),
+            _plain('":{"'),
+            _plain("reasoning"),
+            _plain('":"'),
+            _plain("ok"),
+            _plain('","'),
+            _plain("score"),
+            _plain('":'),
+            score_token(score, top_logprobs),
+        ]
+    tokens.append(_plain("}}"))
+    return completion(content, tokens)
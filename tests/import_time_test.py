@@ -0,0 +1,77 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Generous budget: the point is to catch heavy dependencies creeping back
+# into the import path, which costs seconds rather than milliseconds
+_IMPORT_BUDGET_SECONDS = 3.0
+_HEAVY_MODULES = ["nltk", "posthog", "torch", "pandas", "openai", "sklearn"]
+
+_SCRIPT = """
+import json, sys, time
+tic = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - tic
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _import_in_fresh_interpreter(module: str):
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            _SCRIPT.format(module=module, heavy=_HEAVY_MODULES),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "continuous_eval.metrics",
+        "continuous_eval.metrics.retrieval",
+        "continuous_eval.metrics.generation.text",
+        "continuous_eval.eval",
+    ],
+)
+def test_import_time_budget(module):
+    res = _import_in_fresh_interpreter(module)
+    print(f"\nimport {module}: {res['elapsed'] * 1000:.0f}ms")
+    assert res["loaded"] == []
+    assert res["elapsed"] < _IMPORT_BUDGET_SECONDS
+
+
+def test_lazy_exports():
+    import continuous_eval.metrics.retrieval as retrieval
+
+    assert "TokenCount" in dir(retrieval)
+    from continuous_eval.metrics.retrieval import TokenCount
+    from continuous_eval.metrics.retrieval.tokens import TokenCount as Direct
+
+    assert TokenCount is Direct
+    with pytest.raises(AttributeError):
+        retrieval.NotAMetric
+
+
+def test_star_import_without_optional_extras():
+    from importlib.util import find_spec
+
+    import continuous_eval.metrics.generation.text as text
+
+    namespace = dict()
+    exec("from continuous_eval.metrics.generation.text import *", namespace)
+    assert "AnswerCorrectness" in namespace
+    if find_spec("torch") is None:
+        assert "BertAnswerSimilarity" not in text.__all__
+        with pytest.raises(ImportError, match="semantic"):
+            text.BertAnswerSimilarity
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from continuous_eval.llms.base import LLMInterface, _LLMFactory
+from continuous_eval.llms.cache import ResponseCache, configure_cache
+from continuous_eval.metrics.base.prompt import MetricPrompt
+from continuous_eval.metrics.base.response_type import YesOrNo
+
+_PROMPT = {"system_prompt": "You are a judge.", "user_prompt": "Is it good?"}
+
+
+class CountingLLM(LLMInterface):
+    def __init__(self, model: str):
+        self.model = model
+        self.defaults = {"seed": 0}
+        self.calls = 0
+
+    def run(self, prompt, temperature: float = 0) -> str:
+        self.calls += 1
+        return f"response {self.calls}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = configure_cache(tmp_path / "cache.sqlite")
+    yield cache
+    configure_cache()
+
+
+def test_cache_temperature_zero(cache):
+    factory = _LLMFactory()
+    factory.register_provider("counting", CountingLLM)
+    llm = factory.get("counting:model")
+    assert llm.run(_PROMPT) == "response 1"
+    assert llm.run(_PROMPT) == "response 1"
+    assert asyncio.run(llm.arun(_PROMPT)) == "response 1"
+    assert llm.calls == 1
+    # Different model, prompt or sampling temperature: not the same request
+    assert factory.get("counting:other").run(_PROMPT) == "response 1"
+    llm.run({**_PROMPT, "user_prompt": "Is it bad?"})
+    llm.run(_PROMPT, temperature=1.0)
+    llm.run(_PROMPT, temperature=1.0)
+    assert llm.calls == 4
+    assert cache.hits == 2
+    assert cache.stats()["entries"] == 3
+
+
+def test_cache_eviction(tmp_path):
+    cache = ResponseCache(tmp_path / "c.sqlite", max_entries=10)
+    for i in range(20):
+        cache.set(str(i), {"i": i})
+    cache.get("0")  # Recently used, kept
+    cache.evict()
+    assert len(cache) == 10
+    assert cache.get("0") == {"i": 0}
+    assert cache.get("1") is None
+    cache.max_age = 0.01
+    time.sleep(0.02)
+    assert cache.get("19") is None
+    cache.evict()
+    assert len(cache) == 0
+
+
+def _completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "cmpl",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                    "logprobs": {
+                        "content": [
+                            {
+                                "token": "yes",
+                                "logprob": -0.1,
+                                "top_logprobs": [
+                                    {"token": "yes", "logprob": -0.1},
+                                    {"token": "no", "logprob": -2.4},
+                                ],
+                            }
+                        ]
+                    },
+                }
+            ],
+        }
+    )
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, **kwargs):
+        self.calls += 1
+        return _completion(json.dumps({"reasoning": "ok", "score": "yes"}))
+
+
+class _FakeClient:
+    def __init__(self):
+        self.completions = _FakeCompletions()
+        self.beta = self
+        self.chat = self
+
+
+def test_probabilistic_metric_cache_keeps_logprobs(cache, monkeypatch):
+    from continuous_eval.metrics.base.probabilistic import ProbabilisticMetric
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    metric = ProbabilisticMetric(
+        name="Judge",
+        prompt=MetricPrompt(
+            "You are a judge.", "Is {{answer}} good?", response_format=YesOrNo
+        ),
+        temperature=0,
+    )
+    metric._client = _FakeClient()
+    first = metric.compute(answer="this")
+    second = metric.compute(answer="this")
+    assert metric._client.completions.calls == 1
+    assert first == second
+    assert second["Judge_probabilities"]["yes"] > 0.9
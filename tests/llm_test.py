@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 from dotenv import load_dotenv
@@ -27,6 +28,20 @@ def test_openai():
     assert res is not None and isinstance(res, str) and len(res) > 0
 
 
+def test_async_clients_are_per_event_loop(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    llm = OpenAI(model="gpt-4o-mini")
+
+    async def clients():
+        return llm.async_clients.get(), llm.async_clients.get()
+
+    first, again = asyncio.run(clients())
+    second, _ = asyncio.run(clients())
+    # Reused within a loop, not by the next one (the first one is closed)
+    assert first is again
+    assert second is not first
+
+
 def test_azure():
     _llm_factory = _LLMFactory()
     _llm_factory.register_provider(
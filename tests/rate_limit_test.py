@@ -0,0 +1,108 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from continuous_eval.llms.base import LLMInterface, _LLMFactory
+from continuous_eval.llms.rate_limit import TokenBucket, estimate_tokens
+
+_PROMPT = {"system_prompt": "You are a judge.", "user_prompt": "x" * 400}
+
+
+class EchoLLM(LLMInterface):
+    def __init__(self, model: str):
+        self.model = model
+
+    # Sampled responses: never served from the response cache
+    def run(self, prompt, temperature: float = 1.0) -> str:
+        return prompt["user_prompt"]
+
+
+def _prompt(i: int):
+    # Distinct requests: identical ones in flight would be coalesced
+    return {**_PROMPT, "user_prompt": f"{i:03d}" + _PROMPT["user_prompt"]}
+
+
+def _factory():
+    factory = _LLMFactory()
+    factory.register_provider("echo", EchoLLM)
+    return factory
+
+
+def test_token_bucket_waits():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 per second
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert 0.05 < bucket.reserve(1) <= 0.1
+
+
+def test_token_bucket_charges_requests_larger_than_capacity():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 per second
+    assert 0.25 < bucket.reserve(5) <= 0.3
+    # The oversized request is billed in full: the next one waits for it
+    assert 0.35 < bucket.reserve(1) <= 0.4
+
+
+def test_rpm_shared_across_threads_and_tasks():
+    factory = _factory()
+    factory.set_rate_limit("echo:rpm", rpm=12_000)  # 200/s, bursts of 200
+    try:
+        llms = [factory.get("echo:rpm") for _ in range(2)]
+        tic = time.perf_counter()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda i: llms[i % 2].run(_prompt(i)), range(200)))
+
+        async def main():
+            await asyncio.gather(
+                *(
+                    llms[0].arun(_prompt(i), temperature=1.0)
+                    for i in range(200, 300)
+                )
+            )
+
+        asyncio.run(main())
+        elapsed = time.perf_counter() - tic
+        # 300 requests, 200 admitted at once, then 200 per second
+        assert elapsed >= 0.4, elapsed
+    finally:
+        factory.remove_rate_limit("echo:rpm")
+
+
+def test_tpm_budget():
+    factory = _factory()
+    factory.set_rate_limit("echo:tpm", tpm=60_000)  # 1000 tokens per second
+    try:
+        llm = factory.get("echo:tpm")
+        cost = estimate_tokens(_PROMPT, "tpm")
+        assert cost > 0
+        num_requests = 1000 // cost + 5
+        tic = time.perf_counter()
+        for _ in range(num_requests):
+            llm.run(_PROMPT)
+        elapsed = time.perf_counter() - tic
+        assert elapsed >= (num_requests * cost - 1000) / 1000 * 0.9
+        unlimited = _factory().get("echo:other")
+        tic = time.perf_counter()
+        for _ in range(num_requests):
+            unlimited.run(_PROMPT)
+        assert time.perf_counter() - tic < 0.1
+    finally:
+        factory.remove_rate_limit("echo:tpm")
+
+
+def test_tpm_budget_with_prompts_larger_than_capacity():
+    factory = _factory()
+    big_prompt = {**_PROMPT, "user_prompt": "x " * 4000}
+    cost = estimate_tokens(big_prompt, "big")
+    # Bursts of 1s worth of budget, smaller than a single prompt
+    tpm = cost / 1.2 * 60
+    factory.set_rate_limit("echo:big", tpm=tpm)
+    try:
+        llm = factory.get("echo:big")
+        tic = time.perf_counter()
+        for i in range(2):
+            llm.run({**big_prompt, "user_prompt": f"{i}" + "x " * 4000})
+        elapsed = time.perf_counter() - tic
+        # Tokens admitted never exceed the burst plus the per-minute budget
+        assert 2 * cost <= tpm / 60 * (1 + elapsed * 1.1), elapsed
+    finally:
+        factory.remove_rate_limit("echo:big")
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from openai.types.completion_usage import PromptTokensDetails
+
+from continuous_eval.llms.base import LLMFactory, LLMInterface
+from continuous_eval.llms.cache import configure_cache
+from continuous_eval.llms.pricing import prices
+from continuous_eval.metrics.retrieval import ContextCoverage, ContextPrecision
+from tests.helpers.fake_openai import (
+    FakeOpenAI,
+    verdicts_completion,
+    yes_no_completion,
+)
+
+_DELAY = 0.2
+_CHUNKS = [
+    f"Chunk {i} about {'Paris' if i % 3 == 0 else 'Lyon'}." for i in range(10)
+]
+_QUESTION = "What is the capital of France?"
+
+
+def _judge(request):
+    # Chunks mentioning Paris are relevant
+    user_prompt = request["messages"][1]["content"]
+    return yes_no_completion("yes" if "Paris" in user_prompt else "no")
+
+
+class SlowStatementsLLM(LLMInterface):
+    def __init__(self, model: str = "slow"):
+        self.model = model
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def run(self, prompt, temperature: float = 1.0) -> str:
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(_DELAY)
+        with self._lock:
+            self.in_flight -= 1
+        return json.dumps(
+            [{"reason": "r", "statement": "s", "attribution": True}]
+        )
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    configure_cache(enabled=False)
+    yield
+    configure_cache()
+
+
+def test_context_precision_fans_out_chunks():
+    metric = ContextPrecision(log_relevance_by_context=True)
+    metric._client = FakeOpenAI(_judge, delay=_DELAY)
+    result = metric.compute(retrieved_context=_CHUNKS, question=_QUESTION)
+    # 10 chunks judged at once: one round trip instead of ten
+    assert metric._client.peak == len(_CHUNKS)
+    assert len(metric._client.requests) == len(_CHUNKS)
+    relevant = [score > 0.5 for score in result["context_relevance_by_context"]]
+    assert relevant == ["Paris" in chunk for chunk in _CHUNKS]
+    assert result["percentage_relevant"] == 0.4
+    assert result["context_mean_average_precision"] == pytest.approx(
+        (1 + 2 / 4 + 3 / 7 + 4 / 10) / 4
+    )
+
+
+def test_fan_out_usage_counted_per_request():
+    from continuous_eval.metrics.base.instrumentation import track_usage
+
+    metric = ContextPrecision()
+    metric._client = FakeOpenAI(_judge)
+    chunks = [f"{chunk} ({i})" for i in range(5) for chunk in _CHUNKS]
+    for _ in range(3):
+        with track_usage() as usage:
+            metric.compute(retrieved_context=chunks, question=_QUESTION)
+        # Every concurrent sub-request is added to the sample, none lost
+        assert usage.requests == len(chunks)
+
+
+def test_only_deterministic_requests_are_coalesced():
+    for temperature, expected in [(0, 2), (1.0, len(_CHUNKS))]:
+        metric = ContextPrecision(temperature=temperature)
+        metric._client = FakeOpenAI(_judge, delay=_DELAY)
+        # The same two chunks, judged concurrently
+        chunks = [_CHUNKS[i % 2] for i in range(len(_CHUNKS))]
+        metric.compute(retrieved_context=chunks, question=_QUESTION)
+        assert len(metric._client.requests) == expected
+
+
+def test_context_precision_async_fan_out():
+    metric = ContextPrecision()
+    metric._aclient = FakeOpenAI(_judge, delay=_DELAY, is_async=True)
+    results = asyncio.run(
+        metric.abatch(
+            retrieved_context=[_CHUNKS] * 4,
+            question=[f"{_QUESTION} ({i})" for i in range(4)],
+        )
+    )
+    # The chunks of all the samples are judged at once
+    assert metric._aclient.peak == 4 * len(_CHUNKS)
+    assert [r["percentage_relevant"] for r in results] == [0.4] * 4
+    # Tokens of the sub-requests are counted for their sample
+    assert metric.stats.summary()["tokens"] == 4 * len(_CHUNKS) * 15
+
+
+def test_context_coverage_fans_out_answers():
+    metric = ContextCoverage()
+    metric._llm = SlowStatementsLLM()
+    result = metric.compute(
+        question=_QUESTION,
+        retrieved_context=_CHUNKS,
+        ground_truth_answers=["Paris", "It is Paris", "Paris, France"],
+    )
+    # The three answers are decomposed at once
+    assert metric._llm.peak == 3
+    assert result == {"context_coverage": 1.0, "statements": ["s"]}
+
+
+def _fixture():
+    path = Path(__file__).parent / "data" / "retrieval_sm.jsonl"
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class FixtureJudge:
+    """
+    Judges a chunk relevant when it is one of the ground truth contexts of
+    the fixture, with a confidence depending on the chunk. Answers both the
+    per-chunk and the single-request prompts.
+    """
+
+    def __init__(self, rows):
+        self.relevant = {
+            c for row in rows for c in row["ground_truth_contexts"]
+        }
+
+    def verdict(self, chunk):
+        verdict = "yes" if chunk in self.relevant else "no"
+        return verdict, -0.05 - (len(chunk) % 17) / 10
+
+    def __call__(self, request):
+        chunks = re.findall(
+            r"```\n(.*?)\n```", request["messages"][1]["content"], re.DOTALL
+        )
+        verdicts, confidences = zip(*map(self.verdict, chunks))
+        if request["response_format"].__name__ == "ChunkVerdicts":
+            return verdicts_completion(list(verdicts), list(confidences))
+        return yes_no_completion(verdicts[0], confidences[0])
+
+
+def test_context_precision_single_request_parity():
+    rows = _fixture()
+    judge = FixtureJudge(rows)
+    data = dict(
+        question=[row["question"] for row in rows],
+        retrieved_context=[row["retrieved_contexts"] for row in rows],
+    )
+    per_chunk = ContextPrecision(log_relevance_by_context=True)
+    per_chunk._client = FakeOpenAI(judge)
+    single = ContextPrecision(
+        log_relevance_by_context=True, single_request=True
+    )
+    single._client = FakeOpenAI(judge)
+    expected = per_chunk.batch(**data)
+    results = single.batch(**data)
+    assert len(single._client.requests) == len(rows)
+    assert len(per_chunk._client.requests) == sum(
+        len(row["retrieved_contexts"]) for row in rows
+    )
+    for result, reference in zip(results, expected):
+        assert result.keys() == reference.keys()
+        for key, value in reference.items():
+            assert result[key] == pytest.approx(value)
+    assert any(0 < r["percentage_relevant"] < 1 for r in results)
+
+
+def test_context_precision_verdicts_split_across_tokens():
+    def respond(request):
+        verdicts = ["yes" if i % 2 else "no" for i in range(3)]
+        return verdicts_completion(verdicts, [-0.1] * 3, split_keys=True)
+
+    metric = ContextPrecision(
+        log_relevance_by_context=True, single_request=True
+    )
+    metric._client = FakeOpenAI(respond)
+    result = metric.compute(retrieved_context=_CHUNKS[:3], question=_QUESTION)
+    # Read from the single request, the "yes" of the reasoning is skipped
+    assert len(metric._client.requests) == 1
+    relevant = [score > 0.5 for score in result["context_relevance_by_context"]]
+    assert relevant == [False, True, False]
+
+
+def test_context_precision_single_request_fallback():
+    # Verdicts that do not match the chunks: judged chunk by chunk
+    def respond(request):
+        if request["response_format"].__name__ == "ChunkVerdicts":
+            return verdicts_completion(["yes"], [-0.1])
+        return yes_no_completion("yes")
+
+    metric = ContextPrecision(single_request=True)
+    metric._client = FakeOpenAI(respond)
+    result = metric.compute(retrieved_context=_CHUNKS[:3], question=_QUESTION)
+    assert len(metric._client.requests) == 4
+    assert result["percentage_relevant"] == 1.0
+
+
+def test_stable_prefix_and_cached_tokens():
+    def respond(request):
+        response = _judge(request)
+        response.usage.prompt_tokens_details = PromptTokensDetails(
+            cached_tokens=8
+        )
+        return response
+
+    metric = ContextPrecision()
+    metric._client = FakeOpenAI(respond)
+    metric.batch(
+        retrieved_context=[_CHUNKS[:2]] * 3,
+        question=[f"{_QUESTION} ({i})" for i in range(3)],
+    )
+    # Same system prompt for every sample and chunk: a cacheable prefix
+    system_prompts = {
+        request["messages"][0]["content"]
+        for request in metric._client.requests
+    }
+    assert len(metric._client.requests) == 6
+    assert len(system_prompts) == 1
+    stats = metric.stats.summary()
+    assert stats["prompt_tokens"] == 60
+    assert stats["cached_tokens"] == 48
+    assert stats["prompt_cache_hit_rate"] == pytest.approx(0.8)
+
+
+class MeteredLLM(LLMInterface):
+    def __init__(self, model: str = "metered"):
+        self.model = model
+        self.rate_limit_key = f"test:{model}"
+
+    def run(self, prompt, temperature: float = 1.0) -> str:
+        self._report_usage(
+            prompt_tokens=1000, completion_tokens=100, latency=0.5
+        )
+        return "ok"
+
+
+def test_usage_and_cost():
+    LLMFactory.set_price("openai:gpt-test", 1.0, 2.0, cached_prompt=0.5)
+    LLMFactory.set_price("test:metered", 1.0, 2.0)
+    try:
+
+        def respond(request):
+            response = _judge(request)
+            response.usage.prompt_tokens_details = PromptTokensDetails(
+                cached_tokens=8
+            )
+            return response
+
+        metric = ContextPrecision(model="openai:gpt-test")
+        metric._client = FakeOpenAI(respond)
+        metric.batch(
+            retrieved_context=[_CHUNKS[:2]] * 3,
+            question=[f"{_QUESTION} ({i})" for i in range(3)],
+        )
+        stats = metric.stats.summary()
+        assert stats["requests"] == 6
+        assert stats["completion_tokens"] == 30
+        # 2 prompt, 8 cached prompt and 5 completion tokens per request
+        assert stats["cost"] == pytest.approx(6 * 16 / 1e6)
+
+        response, usage = MeteredLLM().run_with_usage({"user_prompt": "hi"})
+        assert response == "ok"
+        assert usage.requests == 1
+        assert usage.latency == 0.5
+        assert usage.cost == pytest.approx(1200 / 1e6)
+    finally:
+        prices.remove("openai:gpt-test")
+        prices.remove("test:metered")
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from continuous_eval.llms.base import LLMInterface
+from continuous_eval.llms.cache import configure_cache
+from continuous_eval.llms.single_flight import SingleFlight, single_flight
+
+_PROMPT = {"system_prompt": "You are a judge.", "user_prompt": "Is it good?"}
+
+
+class SlowLLM(LLMInterface):
+    def __init__(self, model: str = "slow", delay: float = 0.2):
+        self.model = model
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, prompt, temperature: float = 0) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f"response to {prompt['user_prompt']}"
+
+    async def arun(self, prompt, temperature: float = 0) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"response to {prompt['user_prompt']}"
+
+
+class WrappedLLM(SlowLLM):
+    """Decorates the response of its parent, calling `super().run()`."""
+
+    def run(self, prompt, temperature: float = 0) -> str:
+        return super().run(prompt, temperature).upper()
+
+    async def arun(self, prompt, temperature: float = 0) -> str:
+        return (await super().arun(prompt, temperature)).upper()
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    # Coalesced requests are at temperature 0, which the cache would serve
+    configure_cache(enabled=False)
+    single_flight.reset_stats()
+    yield
+    configure_cache()
+
+
+def test_concurrent_identical_prompts_share_one_call():
+    llm = SlowLLM()
+    other = {**_PROMPT, "user_prompt": "Is it bad?"}
+    prompts = [_PROMPT] * 8 + [other] * 4
+    with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+        responses = list(pool.map(llm.run, prompts))
+    assert (
+        responses
+        == ["response to Is it good?"] * 8 + ["response to Is it bad?"] * 4
+    )
+    assert llm.calls == 2
+    assert single_flight.stats()["saved"] == 10
+    # Once completed, the same request is made again
+    llm.run(_PROMPT)
+    assert llm.calls == 3
+
+
+def test_async_coalescing():
+    llm = SlowLLM()
+
+    async def main():
+        return await asyncio.gather(
+            *(llm.arun(_PROMPT) for _ in range(10)),
+            *(llm.arun(_PROMPT, temperature=0.5) for _ in range(2)),
+        )
+
+    responses = asyncio.run(main())
+    assert set(responses) == {"response to Is it good?"}
+    # Sampled requests are not coalesced, each gets its own response
+    assert llm.calls == 3
+    assert single_flight.stats()["calls"] == 1
+
+
+def test_errors_are_shared_and_not_remembered():
+    group = SingleFlight()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    def call():
+        with pytest.raises(RuntimeError):
+            group.do("key", fail)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert group.do("key", lambda: "ok") == "ok"
+    assert group.stats()["saved"] == 3
+
+
+def test_cancelled_leader_is_replaced_by_a_waiter():
+    group = SingleFlight()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def main():
+        leader = asyncio.ensure_future(group.ado("key", request))
+        await asyncio.sleep(0)
+        waiters = [group.ado("key", request) for _ in range(3)]
+        waiting = asyncio.ensure_future(asyncio.gather(*waiters))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiting
+
+    # The waiters do not inherit the cancellation, one of them leads instead
+    assert asyncio.run(main()) == ["ok"] * 3
+    assert len(calls) == 2
+    assert group.stats() == {"calls": 2, "saved": 2, "saved_rate": 0.5}
+
+
+def test_subclass_calling_super_run_does_not_deadlock():
+    llm = WrappedLLM(delay=0.0)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        response = pool.submit(llm.run, _PROMPT).result(timeout=5)
+    assert response == "RESPONSE TO IS IT GOOD?"
+    assert (
+        asyncio.run(asyncio.wait_for(llm.arun(_PROMPT), timeout=5))
+        == "RESPONSE TO IS IT GOOD?"
+    )
+    # The outermost call still goes through coalescing, once
+    assert llm.calls == 2
+    assert single_flight.stats()["calls"] == 2
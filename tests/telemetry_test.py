@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from posthog import Posthog
+
+import continuous_eval.metrics.base.metric as metric_module
+import continuous_eval.utils.telemetry as telemetry_module
+from continuous_eval.metrics.base import Field, Metric
+from continuous_eval.utils.telemetry import (
+    AnonymousTelemetry,
+    NoOpTelemetry,
+    telemetry_event,
+)
+
+
+class CapturingClient(Posthog):
+    """Posthog client that records the events instead of sending them."""
+
+    def __init__(self):
+        super().__init__("test", send=False, sync_mode=True)
+        self.captured = []
+        self.threads = set()
+
+    def capture(self, distinct_id=None, event=None, properties=None, **kw):
+        self.captured.append((event, properties))
+        self.threads.add(threading.current_thread().name)
+
+
+class TrivialMetric(Metric):
+    def __init__(self):
+        super().__init__(is_cpu_bound=True, disable_multiprocessing=True)
+        self.show_progress = False
+
+    def compute(self, x: int, **kwargs):
+        return {"x": x}
+
+    @property
+    def schema(self):
+        return {"x": Field(type=int)}
+
+
+def test_counters_are_flushed_in_background():
+    client = CapturingClient()
+    telemetry = AnonymousTelemetry(client=client)
+    for _ in range(1000):
+        telemetry.log_event("Metric", {"type": "metric"})
+    assert client.captured == []
+    telemetry.close(timeout=5.0)
+    assert client.captured == [("Metric", {"type": "metric", "count": 1000})]
+
+
+def test_events_are_never_sent_from_the_caller_thread(monkeypatch):
+    client = CapturingClient()
+    telemetry = AnonymousTelemetry(client=client)
+    monkeypatch.setattr(metric_module, "telemetry", telemetry)
+    metric = TrivialMetric()
+    for x in range(1000):
+        metric(x=x)
+    # Only counted on the hot path: nothing sent, no sender started
+    assert client.captured == []
+    assert telemetry._worker is None
+    telemetry.close(timeout=5.0)
+    assert client.threads == {"telemetry"}
+    assert client.captured == [
+        ("TrivialMetric", {"type": "metric", "batch": False, "count": 1000})
+    ]
+
+
+def test_coroutine_events_are_flushed_once_completed():
+    client = CapturingClient()
+    telemetry = AnonymousTelemetry(client=client)
+
+    @telemetry.event(name="Run")
+    async def run():
+        await asyncio.sleep(0)
+        # Counted, not yet handed over to the sender
+        return dict(telemetry._counters)
+
+    counters = asyncio.run(run())
+    assert list(counters.values()) == [1]
+    assert telemetry._counters == {}
+    telemetry.close(timeout=5.0)
+    assert client.captured == [("Run", {"count": 1})]
+
+
+def test_telemetry_event_decorates_coroutines(monkeypatch):
+    telemetry = AnonymousTelemetry(client=CapturingClient())
+    monkeypatch.setattr(telemetry_module, "telemetry", telemetry)
+
+    class Runner:
+        @telemetry_event(name="Runner.aevaluate")
+        async def aevaluate(self):
+            return len(telemetry._counters)
+
+    assert asyncio.run(Runner().aevaluate()) == 1
+    assert telemetry._counters == {}
+    telemetry.close(timeout=5.0)
+
+
+def test_disabled_telemetry_leaves_functions_untouched():
+    def f():
+        pass
+
+    assert NoOpTelemetry().event(name="f")(f) is f
+    metric = TrivialMetric()
+    assert metric.batch(x=list(range(10))) == [{"x": x} for x in range(10)]
+
+
+_N = 20_000
+
+
+def _per_item(fn) -> float:
+    tic = time.perf_counter()
+    for _ in range(_N):
+        fn()
+    return (time.perf_counter() - tic) / _N
+
+
+@pytest.mark.skipif(
+    not os.getenv("CONTINUOUS_EVAL_BENCHMARKS"),
+    reason="Benchmark, set CONTINUOUS_EVAL_BENCHMARKS=1 to run it.",
+)
+def test_per_item_overhead_microbenchmark():
+    # Reports the per-item cost of telemetry, asserts nothing (run with -s)
+    info = {"type": "metric", "batch": False}
+    client = Posthog("test", send=False)
+    before = AnonymousTelemetry(client=client)
+    after = AnonymousTelemetry(client=CapturingClient())
+    noop = NoOpTelemetry()
+    # Previous design: every sample went through the Posthog client queue
+    t_before = _per_item(
+        lambda: client.capture(
+            distinct_id=before.uid, event="M", properties=info
+        )
+    )
+    t_after = _per_item(lambda: after.log_event("M", info))
+    t_noop = _per_item(lambda: noop.log_event("M", info))
+    after.close()
+    print(
+        f"\nper-item telemetry overhead: capture {t_before * 1e6:.2f}us, "
+        f"counter {t_after * 1e6:.2f}us, disabled {t_noop * 1e6:.3f}us"
+    )